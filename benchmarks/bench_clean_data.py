@@ -0,0 +1,61 @@
+"""
+Benchmark of vectorised unit conversion in cleaning.rescale_units against the
+original row by row stock_dataframe loop.
+
+Run from the repo root with:
+    python -m benchmarks.bench_clean_data
+"""
+
+
+import timeit
+import warnings
+import numpy as np
+import pandas as pd
+
+
+from isiver_utils.data import stock_dataframe
+from isiver_utils.data import cleaning
+
+
+def unit_switch_df(n_rows, seed=0):
+    """
+    Fn to generate an OHLCV dataframe in pence with a stretch quoted in pounds
+    """
+    rng = np.random.default_rng(seed)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.01, n_rows)))
+    df = pd.DataFrame({c: close for c in ['Open', 'High', 'Low', 'Close',
+                                          'AdjClose']},
+                      index=pd.bdate_range('2015-01-01', periods=n_rows))
+    df.iloc[n_rows // 3:n_rows // 2] /= 100
+    df['Volume'] = rng.integers(1e4, 1e6, n_rows).astype(float)
+    return df
+
+
+def time_loop(df):
+    stock_class = stock_dataframe('BENCH', None, df.copy())
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FutureWarning)
+        stock_class.rescale_units_loop()
+
+
+def time_vectorised(df):
+    cleaning.rescale_units(df)
+
+
+def main(lengths=(250, 1250), repeat=3):
+    results = {}
+    for n_rows in lengths:
+        df = unit_switch_df(n_rows)
+        loop = min(timeit.repeat(lambda: time_loop(df), number=1,
+                                 repeat=repeat))
+        vectorised = min(timeit.repeat(lambda: time_vectorised(df), number=10,
+                                       repeat=repeat)) / 10
+        results[n_rows] = (loop, vectorised)
+        print(f'{n_rows:>6} rows: loop {loop * 1e3:9.2f} ms, '
+              f'vectorised {vectorised * 1e3:7.3f} ms, '
+              f'speedup x{loop / vectorised:.0f}')
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark of fused get_default_metrics (indicator_plan) against adding each
+metric column separately.
+
+Run from the repo root with:
+    python -m benchmarks.bench_default_metrics
+"""
+
+
+import timeit
+import pandas as pd
+
+
+from isiver_utils.data import stock_dataframe, synthetic_provider
+
+
+def returns_df(years):
+    """
+    Fn to get a cleaned synthetic dataframe with a Returns column
+    """
+    end = pd.Timestamp('2020-12-31')
+    df = synthetic_provider().get_history('SYNAAA.L',
+                                          end - pd.DateOffset(years=years), end)
+    stock_class = stock_dataframe('SYNAAA_L', None, df)
+    stock_class.clean_data()
+    return stock_class.returns()
+
+
+def time_metrics(df, fused):
+    stock_dataframe('SYNAAA_L', None, df.copy()).get_default_metrics(
+        fused=fused)
+
+
+def main(years=(1, 5, 20), repeat=5, number=20):
+    results = {}
+    for y in years:
+        df = returns_df(y)
+        unfused = min(timeit.repeat(lambda: time_metrics(df, False),
+                                    number=number, repeat=repeat)) / number
+        fused = min(timeit.repeat(lambda: time_metrics(df, True),
+                                  number=number, repeat=repeat)) / number
+        results[y] = (unfused, fused)
+        print(f'{y:>3}y ({len(df):>5} rows): separate {unfused * 1e3:7.2f} ms, '
+              f'fused {fused * 1e3:7.2f} ms, speedup x{unfused / fused:.2f}')
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark of cleaning.fill_gaps modes: the original scipy spline against the
+linear and forward fill paths.
+
+Run from the repo root with:
+    python -m benchmarks.bench_fill_gaps
+"""
+
+
+import timeit
+import warnings
+import numpy as np
+
+
+from isiver_utils.data import cleaning
+from benchmarks.bench_default_metrics import returns_df
+
+
+def gappy_df(years, missing=0.02, seed=0):
+    """
+    Fn to get a synthetic OHLCV dataframe with a fraction of days removed
+    """
+    df = returns_df(years).iloc[:, :6]
+    rng = np.random.default_rng(seed)
+    keep = rng.random(len(df)) > missing
+    keep[[0, -1]] = True
+    return df[keep]
+
+
+def main(years=(1, 5, 10), methods=('spline', 'linear', 'ffill'), repeat=3,
+         number=1):
+    results = {}
+    for y in years:
+        df = gappy_df(y)
+        times = {}
+        for method in methods:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', UserWarning)
+                times[method] = min(timeit.repeat(
+                    lambda: cleaning.fill_gaps(df, method=method),
+                    number=number, repeat=repeat)) / number
+        results[y] = times
+        print(f'{y:>3}y ({len(df):>5} rows): ' + ', '.join(
+            f'{m} {t * 1e3:7.2f} ms' for m, t in times.items()) +
+            f', linear speedup x{times["spline"] / times["linear"]:.1f}')
+    return results
+
+
+if __name__ == '__main__':
+    main()
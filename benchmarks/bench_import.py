@@ -0,0 +1,29 @@
+"""
+Benchmark of import time for isiver_utils modules in a fresh interpreter, and
+a check of which heavy dependencies each import loads.
+
+Run from the repo root with:
+    python -m benchmarks.bench_import
+"""
+
+
+from isiver_utils.data.instrumentation import import_profile
+
+
+default_modules = ('isiver_utils', 'isiver_utils.analysis.metrics',
+                   'isiver_utils.data', 'isiver_utils.plotting.visualisation')
+
+
+def main(modules=default_modules, repeat=5):
+    results = {}
+    for module in modules:
+        runs = [import_profile(module) for _ in range(repeat)]
+        seconds = min(t for t, _ in runs)
+        results[module] = (seconds, runs[0][1])
+        print(f'{module:<38} {seconds * 1e3:8.1f} ms, '
+              f'loads {", ".join(runs[0][1]) or "nothing heavy"}')
+    return results
+
+
+if __name__ == '__main__':
+    main()
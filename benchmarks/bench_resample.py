@@ -0,0 +1,38 @@
+"""
+Benchmark of resampling minute bars with intraday.resample_ohlcv against
+pandas resample, which creates a bin for every interval including nights and
+weekends before the empty bins are dropped.
+
+Run from the repo root with:
+    python -m benchmarks.bench_resample
+"""
+
+
+import timeit
+
+
+from isiver_utils.data.intraday import resample_ohlcv, aggregations
+from benchmarks.suite import intraday_df
+
+
+def main(days=(20, 120), rules=('5min', '15min', '1h', 'D'), repeat=3,
+         number=5):
+    results = {}
+    for d in days:
+        bars = intraday_df(d)
+        for rule in rules:
+            pandas_time = min(timeit.repeat(
+                lambda: bars.resample(rule).agg(aggregations).dropna(),
+                number=number, repeat=repeat)) / number
+            reduceat_time = min(timeit.repeat(
+                lambda: resample_ohlcv(bars, rule),
+                number=number, repeat=repeat)) / number
+            results[d, rule] = (pandas_time, reduceat_time)
+            print(f'{d:>4}d {rule:>6}: pandas {pandas_time * 1e3:8.2f} ms, '
+                  f'resample_ohlcv {reduceat_time * 1e3:7.2f} ms, '
+                  f'speedup x{pandas_time / reduceat_time:.1f}')
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+Benchmark of prefix sum window sweeps (sweep.py) against calling each metric
+once per window.
+
+Run from the repo root with:
+    python -m benchmarks.bench_sweep
+"""
+
+
+import timeit
+import pandas as pd
+
+
+from isiver_utils.analysis import metrics, sweep
+from benchmarks.bench_default_metrics import returns_df
+
+
+def main(years=(5, 20), windows=range(5, 201), repeat=3, number=3):
+    results = {}
+    for y in years:
+        close = returns_df(y)['Close']
+        for metric in (metrics.moving_average, metrics.std, metrics.rsi,
+                       metrics.bollinger):
+            per_window = min(timeit.repeat(
+                lambda: pd.DataFrame({w: metric(close, w) for w in windows}),
+                number=number, repeat=repeat)) / number
+            swept = min(timeit.repeat(
+                lambda: sweep.sweep(metric, close, windows),
+                number=number, repeat=repeat)) / number
+            results[y, metric.__name__] = (per_window, swept)
+            print(f'{y:>3}y {metric.__name__:<15} {len(windows)} windows: '
+                  f'per window {per_window * 1e3:8.2f} ms, '
+                  f'sweep {swept * 1e3:7.2f} ms, '
+                  f'speedup x{per_window / swept:.1f}')
+    return results
+
+
+if __name__ == '__main__':
+    main()
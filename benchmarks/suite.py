@@ -0,0 +1,268 @@
+"""
+Benchmark suite of the acquisition -> metrics -> plotting pipeline over
+synthetic fixtures, so it runs offline and reproducibly.
+
+Fixtures are 1, 5 and 20 years of daily prices, a few weeks of minute bars and
+universes of several sizes. Each case is timed with timeit (best of repeat) and
+the results are written as JSON named after the git commit, so two runs can be
+compared to spot regressions.
+
+Run from the repo root with:
+    python -m benchmarks.suite
+    python -m benchmarks.suite --quick
+    python -m benchmarks.suite --compare benchmarks/results/<old>.json
+"""
+
+
+import os
+import sys
+import json
+import argparse
+import platform
+import subprocess
+import timeit
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+
+from isiver_utils.analysis import metrics, panel_metrics
+from isiver_utils.analysis.screening import screen_table
+from isiver_utils.data import stock_dataframe, synthetic_provider, intraday
+from isiver_utils.data.universe import load_universe
+
+
+results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'results')
+fixture_end = pd.Timestamp('2020-12-31')
+
+
+def daily_df(years, ticker='SYNAAA.L'):
+    """
+    Fn to get raw synthetic daily OHLCV prices ending on fixture_end
+    """
+    return synthetic_provider().get_history(
+        ticker, fixture_end - pd.DateOffset(years=years), fixture_end)
+
+
+def intraday_df(days, seed=0):
+    """
+    Fn to get synthetic minute OHLCV bars for LSE trading hours (08:00-16:30)
+    over the given number of business days
+    """
+    dates = pd.bdate_range(end=fixture_end, periods=days)
+    minutes = pd.timedelta_range('08:00:00', '16:29:00', freq='min')
+    index = pd.DatetimeIndex((dates.values[:, None] + minutes.values).ravel(),
+                             name='Date')
+    rng = np.random.default_rng(seed)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.0005, len(index))))
+    open_ = np.concatenate([[1000.], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.0002, (2, len(index))))
+    return pd.DataFrame({'Open': open_,
+                         'High': np.maximum(open_, close) * (1 + spread[0]),
+                         'Low': np.minimum(open_, close) * (1 - spread[1]),
+                         'Close': close, 'AdjClose': close,
+                         'Volume': rng.integers(1e2, 1e4, len(index)) * 1.},
+                        index=index)
+
+
+def processed(df, clean=True):
+    stock_class = stock_dataframe('SYNAAA_L', None, df.copy(),
+                                  provider=synthetic_provider())
+    stock_class.pre_process(clean)
+    return stock_class
+
+
+def pipeline_cases(name, df, base_df, risk_free_df, clean=True):
+    """
+    Fn to get (case name, rows, fn) for each pipeline stage on one fixture.
+    Intraday fixtures skip clean_data, which resamples to daily.
+
+    :param name: fixture name used as prefix of case names
+    :param df: raw OHLCV fixture
+    :param base_df: raw baseline fixture with the same dates
+    :param risk_free_df: raw risk free fixture with the same dates
+    """
+    from isiver_utils.plotting import visualisation
+    import matplotlib.pyplot as plt
+
+    raw = df
+    cleaned = processed(raw, clean).df[raw.columns] if clean else raw
+    with_returns = stock_dataframe('', None, cleaned.copy()).returns()
+    full = processed(raw, clean)
+    base = processed(base_df, clean)
+    risk_free = processed(risk_free_df, clean)
+    common = full.df.index.intersection(base.df.index)
+
+    def render():
+        visualisation.daily_ohlcv(full, output_window=False)
+        plt.close('all')
+
+    cases = []
+    if clean:
+        cases.append(('clean_data', len(raw), lambda: stock_dataframe(
+            '', None, raw.copy()).clean_data()))
+    cases += [
+        ('returns', len(cleaned),
+         lambda: stock_dataframe('', None, cleaned.copy()).returns()),
+        ('get_default_metrics', len(cleaned), lambda: stock_dataframe(
+            '', None, with_returns.copy()).get_default_metrics()),
+        ('get_return_metrics', len(common), lambda: metrics.get_return_metrics(
+            full.df.loc[common], base.df.loc[common],
+            risk_free.df.loc[common])),
+        ('prepare_ohlcv_list', len(full.df),
+         lambda: visualisation.prepare_ohlcv_list(full.df)),
+        ('daily_ohlcv', len(full.df), render),
+    ]
+    return [(f'{name}.{case}', rows, fn) for case, rows, fn in cases]
+
+
+def universe_cases(size):
+    """
+    Fn to get (case name, rows, fn) for batch processing a universe
+    """
+    tickers = synthetic_provider.tickers(size)
+    provider = synthetic_provider()
+    stock_classes, _ = load_universe(tickers, '2016-01-01', provider=provider,
+                                     processes=0)
+    panel = panel_metrics.price_panel(stock_classes)
+    rows = len(panel) * size
+    table = screen_table.from_stock_classes(stock_classes)
+    screen = 'RSI_14 below 30 and Close crossed above Boll_Lower_20 today'
+    return [
+        (f'universe_{size}.load_universe', rows,
+         lambda: load_universe(tickers, '2016-01-01', provider=provider,
+                               processes=0)),
+        (f'universe_{size}.panel_metrics', rows,
+         lambda: panel_metrics.panel_metrics(panel)),
+        (f'universe_{size}.screen', size, lambda: table.screen(screen)),
+        (f'universe_{size}.screen_refresh', size,
+         lambda: table.refresh(stock_classes)),
+    ]
+
+
+def time_case(fn, repeat):
+    """
+    Fn to time fn, calling it enough times per repeat to take at least 0.2s
+
+    :return: dict of best and median seconds per call and calls per repeat
+    """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    times = np.array(timer.repeat(repeat=repeat, number=number)) / number
+    return {'best': float(times.min()), 'median': float(np.median(times)),
+            'number': number}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_suite(years=(1, 5, 20), intraday_days=(5, 20), universe_sizes=(10, 50),
+              repeat=5, match=None):
+    """
+    Fn to run every benchmark case
+
+    :param years: lengths of daily fixtures in years
+    :param intraday_days: lengths of minute bar fixtures in business days
+    :param universe_sizes: numbers of tickers in universe fixtures
+    :param repeat: number of timing repeats per case
+    :param match: only run cases whose name contains this string
+    :return: dict of run metadata and case results
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+
+    cases = []
+    for y in years:
+        cases += pipeline_cases(f'daily_{y}y', daily_df(y),
+                                daily_df(y, 'SYNAAB.L'), daily_df(y, 'SYNAAC.L'))
+    for d in intraday_days:
+        cases += pipeline_cases(f'intraday_{d}d', intraday_df(d),
+                                intraday_df(d, 1), intraday_df(d, 2),
+                                clean=False)
+        bars = intraday_df(d)
+        cases.append((f'intraday_{d}d.resample_ohlcv_15min', len(bars),
+                      lambda bars=bars: intraday.resample_ohlcv(bars, '15min')))
+    for size in universe_sizes:
+        cases += universe_cases(size)
+
+    results = {}
+    for name, rows, fn in cases:
+        if match and match not in name:
+            continue
+        results[name] = dict(time_case(fn, repeat), rows=rows)
+        print(f'{name:<40} {results[name]["best"] * 1e3:10.3f} ms '
+              f'({rows} rows)')
+    return {'commit': git_commit(), 'time': datetime.now().isoformat(),
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'pandas': pd.__version__, 'results': results}
+
+
+def save_results(run, out_dir=results_dir):
+    """
+    Fn to write a suite run to {out_dir}/{commit}.json
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f'{run["commit"]}.json')
+    with open(path, 'w') as f:
+        json.dump(run, f, indent=1)
+    return path
+
+
+def compare(old_run, new_run, threshold=1.2):
+    """
+    Fn to compare two suite runs by best time per case
+
+    :param old_run: run dict or path of JSON results
+    :param new_run: run dict or path of JSON results
+    :param threshold: ratio of new to old time counted as a regression
+    :return: dict of case name: ratio for regressed cases
+    """
+    runs = []
+    for run in (old_run, new_run):
+        if isinstance(run, str):
+            with open(run) as f:
+                run = json.load(f)
+        runs.append(run['results'])
+    old, new = runs
+    regressions = {}
+    for name in sorted(set(old) & set(new)):
+        ratio = new[name]['best'] / old[name]['best']
+        flag = ''
+        if ratio > threshold:
+            regressions[name] = ratio
+            flag = '  REGRESSION'
+        print(f'{name:<40} x{ratio:6.2f}{flag}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--quick', action='store_true',
+                        help='only the smallest fixtures and fewer repeats')
+    parser.add_argument('--match', help='only run cases containing this')
+    parser.add_argument('--out', default=results_dir,
+                        help='directory to write JSON results to')
+    parser.add_argument('--compare', help='JSON results to compare against')
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        run = run_suite(years=(1,), intraday_days=(5,), universe_sizes=(10,),
+                        repeat=3, match=args.match)
+    else:
+        run = run_suite(match=args.match)
+    path = save_results(run, args.out)
+    print(f'results written to {path}')
+    if args.compare:
+        return 1 if compare(args.compare, run) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
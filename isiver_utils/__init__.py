@@ -1,3 +1,9 @@
 import os
 package_path = os.path.dirname(os.path.abspath(__file__))
-default_plot_dir = os.getcwd() + '/plots/'
+
+
+def __getattr__(name):
+    # Resolved from the working directory when used rather than at import
+    if name == 'default_plot_dir':
+        return os.getcwd() + '/plots/'
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
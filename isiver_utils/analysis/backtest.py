@@ -0,0 +1,198 @@
+"""
+Vectorised backtesting of long only entry/exit signals.
+
+Signals are boolean arrays built from stock_dataframe columns, e.g. from the
+columns added by get_default_metrics:
+
+    entries = df['Close_RSI_14'] < 30
+    exits = crossed_above(df['Close'], df['Close_Boll_Upper_20'])
+
+A position is opened at the first entry and held until the next exit. Signals
+are taken as known at the close of their bar, so the position is held from the
+following bar (lag=1) to avoid look ahead. Positions, returns, drawdowns and
+trades are found with array operations over all dates at once. Passing a
+dates x tickers dataframe (e.g. from universe_frame) backtests every ticker in
+the same call.
+"""
+
+
+import numpy as np
+import pandas as pd
+
+
+def crossed_above(a, b):
+    """
+    Fn to flag bars where a moves from at or below b to above b
+
+    :param a: series/dataframe, e.g. df['Close']
+    :param b: series/dataframe or number, e.g. df['Close_Boll_Lower_20']
+    """
+    return (a > b) & (a.shift(1) <= (b.shift(1) if hasattr(b, 'shift') else b))
+
+
+def crossed_below(a, b):
+    """
+    Fn to flag bars where a moves from at or above b to below b
+    """
+    return (a < b) & (a.shift(1) >= (b.shift(1) if hasattr(b, 'shift') else b))
+
+
+def signal_positions(entries, exits):
+    """
+    Fn to get the position (1 long, 0 flat) at each bar's close from entry and
+    exit signals, an exit on the same bar as an entry wins
+
+    :param entries: 2d boolean array, rows are dates
+    :param exits: 2d boolean array, same shape as entries
+    :return: 2d float array of positions
+    """
+    state = np.where(exits, 0.0, np.where(entries, 1.0, np.nan))
+    known = ~np.isnan(state)
+    idx = np.where(known, np.arange(len(state))[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)                                 # row of last signal, forward filled
+    positions = state[idx, np.arange(state.shape[1])]
+    return np.nan_to_num(positions, nan=0.0)
+
+
+class backtest_result():
+    def __init__(self, prices, positions, returns, trades):
+        """
+        This class holds the output of backtest, all attributes have the same
+        shape as the prices passed in
+
+        :param prices: prices the backtest was run on
+        :param positions: position held over each bar (after lag)
+        :param returns: strategy return over each bar after costs
+        :param trades: dataframe with a row per trade
+        """
+        self.prices = prices
+        self.positions = positions
+        self.returns = returns
+        self.equity = (1 + returns).cumprod()
+        self.drawdown = self.equity / self.equity.cummax() - 1
+        self.trades = trades
+
+    def summary(self):
+        """
+        Fn to get total return, max drawdown, number of trades, win rate and
+        exposure, one row per ticker
+        """
+        equity = _frame(self.equity)
+        trades = self.trades.groupby('ticker')['return']
+        return pd.DataFrame({
+            'total_return': equity.iloc[-1] - 1,
+            'max_drawdown': _frame(self.drawdown).min(),
+            'trades': trades.size().reindex(equity.columns, fill_value=0),
+            'win_rate': trades.apply(lambda r: (r > 0).mean()).reindex(
+                equity.columns),
+            'exposure': _frame(self.positions).mean()})
+
+
+def backtest(prices, entries, exits, cost=0.0, lag=1):
+    """
+    Fn to backtest long only entry and exit signals
+
+    :param prices: series of prices for one stock, or dates x tickers dataframe
+    :param entries: boolean series/dataframe like prices, True to open a
+                position at the bar's close
+    :param exits: boolean series/dataframe like prices, True to close a
+                position at the bar's close
+    :param cost: proportional cost charged on each change of position, e.g.
+                0.001 for 10 basis points
+    :param lag: bars between a signal and the position being held, 1 trades on
+                the close the signal is known on
+    :return: backtest_result
+    """
+    frame = _frame(prices)
+    values = frame.to_numpy(dtype=float)
+    n, m = values.shape
+    signals = signal_positions(_frame(entries).to_numpy(dtype=bool),
+                               _frame(exits).to_numpy(dtype=bool))
+    held = np.zeros((n, m))
+    held[lag:] = signals[:n - lag]
+
+    bar_returns = np.zeros((n, m))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bar_returns[1:] = values[1:] / values[:-1] - 1
+    bar_returns = np.nan_to_num(bar_returns, nan=0.0, posinf=0.0, neginf=0.0)
+    turnover = np.abs(np.diff(held, axis=0, prepend=0.0))
+    strategy_returns = held * bar_returns - cost * turnover
+
+    trades = _trades(frame, held, values)
+    wrap = (lambda a: pd.Series(a[:, 0], index=prices.index, name=prices.name)) \
+           if isinstance(prices, pd.Series) else \
+           (lambda a: pd.DataFrame(a, index=frame.index, columns=frame.columns))
+    return backtest_result(prices, wrap(held), wrap(strategy_returns), trades)
+
+
+def _trades(frame, held, values):
+    """
+    Fn to list trades from held positions, open trades are closed at the last
+    bar. Entry and exit prices are the closes before the first and on the last
+    bar held.
+    """
+    padded = np.vstack([np.zeros((1, held.shape[1])), held,
+                        np.zeros((1, held.shape[1]))])
+    change = np.diff(padded, axis=0)
+    tickers, first = np.nonzero(change.T > 0)                                  # transposed so trades are ordered by ticker then date
+    last = np.nonzero(change.T < 0)[1] - 1                                      # first and last bars held
+    signal = np.maximum(first - 1, 0)                                           # bar the position was bought on the close of
+    entry_price = values[signal, tickers]
+    exit_price = values[last, tickers]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = exit_price / entry_price - 1
+    return pd.DataFrame({
+        'ticker': np.asarray(frame.columns)[tickers],
+        'entry_date': frame.index[signal],
+        'exit_date': frame.index[last],
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'bars': last - first + 1,
+        'return': returns,
+        'open': last == len(values) - 1})
+
+
+def universe_frame(stock_classes):
+    """
+    Fn to combine many stock dataframes into one dataframe with (column,
+    ticker) MultiIndex columns, so frame['Close'] is a dates x tickers panel
+    and a strategy written for one stock_dataframe.df works unchanged
+    """
+    frames = {ticker: stock_class.df
+              for ticker, stock_class in stock_classes.items()}
+    frame = pd.concat(frames, axis=1).swaplevel(axis=1)
+    return frame.sort_index(axis=1, level=0, sort_remaining=False)
+
+
+def backtest_strategy(df, strategy, price_column='Close', **kwargs):
+    """
+    Fn to backtest a strategy on one stock dataframe or a universe_frame
+
+    :param df: stock_dataframe.df, or universe_frame of many stocks
+    :param strategy: fn taking df and returning (entries, exits), e.g.
+                lambda df: (df['Close_RSI_14'] < 30, df['Close_RSI_14'] > 70)
+    :param price_column: column traded
+    :param kwargs: passed to backtest e.g. cost
+    :return: backtest_result
+    """
+    entries, exits = strategy(df)
+    return backtest(df[price_column], entries, exits, **kwargs)
+
+
+def backtest_universe(stock_classes, strategy, price_column='Close', **kwargs):
+    """
+    Fn to backtest one strategy across many stocks in a single vectorised call
+
+    :param stock_classes: dict of ticker: stock_dataframe with metric columns
+    :param strategy: fn as for backtest_strategy
+    :return: backtest_result with a column per ticker
+    """
+    return backtest_strategy(universe_frame(stock_classes), strategy,
+                             price_column, **kwargs)
+
+
+def _frame(x):
+    """
+    Fn to view a series as a single column dataframe
+    """
+    return x.to_frame() if isinstance(x, pd.Series) else x
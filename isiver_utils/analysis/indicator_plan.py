@@ -0,0 +1,124 @@
+"""
+Module to calculate many metric columns in a single fused pass.
+
+An indicator_plan collects add_metric_column style requests, drops outputs that
+would be overwritten later, shares intermediates (rolling means, rolling
+standard deviations and exponential moving averages per column and window)
+between metrics, e.g. bollinger reusing the moving average and std columns, and
+builds every output column in one array before adding it to the dataframe.
+"""
+
+
+import numpy as np
+import pandas as pd
+
+
+from isiver_utils.analysis import metrics
+
+
+class indicator_plan():
+    def __init__(self):
+        """
+        This class represents a set of metric columns to calculate together
+        """
+        self.outputs = {}
+
+    def add(self, metric, columns, windows, metric_col_name, **kwargs):
+        """
+        Fn to add metric columns to the plan, same arguments as
+        stock_dataframe.add_metric_column. A label added again replaces the
+        earlier output and moves to the end, as check_columns does.
+        """
+        for c in columns:
+            for w in windows:
+                label = f'{c}_{metric_col_name}_{w}'
+                self.outputs.pop(label, None)
+                self.outputs[label] = (metric, c, w, kwargs)
+        return self
+
+    def lookback(self):
+        """
+        Fn to get the trailing rows needed to recalculate every output, None if
+        any output needs the whole column
+        """
+        lookbacks = [metrics.lookback(metric, w)
+                     for metric, _, w, _ in self.outputs.values()]
+        if None in lookbacks:
+            return None
+        return max(lookbacks, default=0)
+
+    def compute(self, df, cache=None):
+        """
+        Fn to calculate all planned outputs for df
+
+        :param df: stock dataframe containing the input columns
+        :param cache: optional metric_cache.metric_cache to get metric results
+                    from
+        :return: dataframe of output columns with the same index as df
+        """
+        call = cache.call if cache is not None else \
+               lambda metric, column, w, **kwargs: metric(column, w, **kwargs)
+        intermediates = {}
+
+        def shared(kind, c, w):
+            if (kind, c, w) not in intermediates:
+                metric = {'mean': metrics.moving_average, 'std': metrics.std,
+                          'ewm': metrics.exp_moving_average}[kind]
+                intermediates[kind, c, w] = call(metric, df[c], w)
+            return intermediates[kind, c, w].to_numpy()
+
+        out = np.empty((len(df), len(self.outputs)))
+        for i, (metric, c, w, kwargs) in enumerate(self.outputs.values()):
+            if metric is metrics.moving_average:
+                out[:, i] = shared('mean', c, w)
+            elif metric is metrics.std:
+                out[:, i] = shared('std', c, w)
+            elif metric is metrics.exp_moving_average:
+                out[:, i] = shared('ewm', c, w)
+            elif metric is metrics.macd:
+                out[:, i] = shared('ewm', c, w[0]) - shared('ewm', c, w[1])
+            elif metric is metrics.bollinger and \
+                    kwargs.get('bound', 'Upper') in ('Upper', 'Lower'):
+                sign = 1 if kwargs.get('bound', 'Upper') == 'Upper' else -1
+                out[:, i] = shared('mean', c, w) + sign * (2 * shared('std', c, w))
+            else:
+                out[:, i] = call(metric, df[c], w, **kwargs)
+        return pd.DataFrame(out, index=df.index, columns=list(self.outputs))
+
+    def apply(self, df, tail=None, cache=None):
+        """
+        Fn to add all planned output columns to df
+
+        :param df: stock dataframe containing the input columns
+        :param tail: number of new rows at the end of df to calculate, None to
+                    calculate whole columns
+        :param cache: optional metric_cache.metric_cache used when calculating
+                    whole columns
+        :return: dataframe with output columns added
+        """
+        labels = list(self.outputs)
+        lookback = self.lookback()
+        if tail and lookback and all(label in df for label in labels):
+            start = max(len(df) - tail - lookback + 1, 0)
+            out = self.compute(df.iloc[start:])
+            df.loc[df.index[-tail:], labels] = out.iloc[-tail:].to_numpy()
+            return df
+        out = self.compute(df, cache)
+        return pd.concat([df.drop(columns=[l for l in labels if l in df]), out],
+                         axis=1)
+
+
+def default_plan():
+    """
+    Fn to get the plan of default metrics added by
+    stock_dataframe.get_default_metrics
+    """
+    plan = indicator_plan()
+    plan.add(metrics.moving_average, ['Returns', 'Close'], (30, 50), 'MA')
+    plan.add(metrics.exp_moving_average, ['Close'], (30, 50), 'EMA')
+    plan.add(metrics.std, ['Close'], (12, 26), 'std')
+    plan.add(metrics.rsi, ['Close'], (14,), 'RSI')
+    plan.add(metrics.macd, ['Close'], ((12, 26),), 'MACD')
+    plan.add(metrics.bollinger, ['Close'], (20,), 'Boll_Upper', bound='Upper')
+    plan.add(metrics.bollinger, ['Close'], (20,), 'Boll_Lower', bound='Lower')
+    return plan
@@ -0,0 +1,263 @@
+"""
+Memoising cache of metric results, so the same metric on the same column isn't
+recalculated by every report or plot.
+
+Results are keyed by the metric, its window and keyword arguments and a
+fingerprint of the input column's values and dates, so a changed or extended
+column is a miss rather than a stale hit. The cache holds at most max_bytes of
+results, evicting the least recently used, and can optionally keep results on
+disk between sessions.
+"""
+
+
+import os
+import json
+import types
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+
+def fingerprint(df_column):
+    """
+    Fn to get a short hash of a column's values, dates and dtype
+
+    :param df_column: series (or dataframe) passed to a metric
+    :return: hex digest string
+    """
+    h = hashlib.blake2b(digest_size=16)
+    values = np.ascontiguousarray(df_column.to_numpy())
+    h.update(str((values.dtype, values.shape)).encode())
+    h.update(values.tobytes())
+    index = df_column.index
+    if isinstance(index, pd.DatetimeIndex):
+        h.update(np.ascontiguousarray(index.asi8).tobytes())
+    else:
+        h.update(repr(list(index)).encode())
+    if isinstance(df_column, pd.DataFrame):
+        h.update(repr(list(df_column.columns)).encode())
+    return h.hexdigest()
+
+
+def metric_name(metric, seen=None):
+    """
+    Fn to get a name identifying a metric fn by value, the same way in every
+    process. The fn's code, defaults, closure values and the values of the
+    module globals it reads (fns by their own metric_name, modules by name)
+    are hashed into its qualified name, so a redefined fn or a changed global
+    gives a new name
+
+    :param metric: metric fn
+    :return: name string, or None if the fn can't be identified by value
+    """
+    if not isinstance(metric, types.FunctionType):
+        return None
+    seen = set() if seen is None else seen
+    if id(metric) in seen:                                                      # recursive fns
+        return f'{metric.__module__}.{metric.__qualname__}'
+    seen.add(id(metric))
+    try:
+        values = [metric.__defaults__, metric.__kwdefaults__,
+                  [cell.cell_contents for cell in metric.__closure__ or ()]]
+        parts = [_code_repr(metric.__code__)] + \
+            [_value_repr(v, seen) for v in values] + \
+            [f'{g}={_value_repr(metric.__globals__[g], seen)}'
+             for g in sorted(_global_names(metric.__code__))
+             if g in metric.__globals__]
+    except ValueError:                                                          # empty closure cell
+        return None
+    if any(' at 0x' in part for part in parts):                                 # repr depends on object ids
+        return None
+    return f'{metric.__module__}.{metric.__qualname__}@' + hashlib.blake2b(
+        '|'.join(parts).encode(), digest_size=16).hexdigest()
+
+
+def _code_repr(code):
+    consts = [_code_repr(c) if isinstance(c, types.CodeType) else repr(c)
+              for c in code.co_consts]
+    return repr((code.co_code, code.co_names, code.co_varnames, consts))
+
+
+def _global_names(code):
+    names = set(code.co_names)
+    for c in code.co_consts:
+        if isinstance(c, types.CodeType):
+            names |= _global_names(c)
+    return names
+
+
+def _value_repr(value, seen):
+    if isinstance(value, (list, tuple)):
+        return '(' + ','.join(_value_repr(v, seen) for v in value) + ')'
+    if isinstance(value, dict):
+        return '{' + ','.join(f'{_value_repr(k, seen)}:{_value_repr(v, seen)}'
+                              for k, v in value.items()) + '}'
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return fingerprint(value)
+    if isinstance(value, np.ndarray):
+        return hashlib.blake2b(repr((value.dtype, value.shape)).encode() +
+                               np.ascontiguousarray(value).tobytes(),
+                               digest_size=16).hexdigest()
+    if isinstance(value, types.FunctionType):
+        name = metric_name(value, seen)
+        return ' at 0x' if name is None else name
+    if isinstance(value, types.ModuleType):
+        return f'module {value.__name__}'
+    if isinstance(value, (type, types.BuiltinFunctionType)):
+        return f'{value.__module__}.{value.__qualname__}'
+    return repr(value)
+
+
+class metric_cache():
+    def __init__(self, max_bytes=64 * 2**20, cache_dir=None):
+        """
+        This class represents an LRU cache of metric results
+
+        :param max_bytes: maximum total size of results held in memory
+        :param cache_dir: optional directory to also store series results in,
+                        read back on a miss in memory
+        """
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def __getstate__(self):
+        """
+        Fn to pickle an empty cache with the same settings, e.g. for worker
+        processes, which share results through cache_dir if one is set
+        """
+        return {'max_bytes': self.max_bytes, 'cache_dir': self.cache_dir}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def key(self, metric, df_column, window, kwargs, name=None):
+        if name is None:
+            name = metric_name(metric)
+        if name is None:                                                        # only valid while metric is alive, never stored
+            name = f'{getattr(metric, "__qualname__", type(metric).__name__)}' \
+                f'@{id(metric)}'
+        return hashlib.blake2b(
+            repr((name, window, sorted(kwargs.items()),
+                  fingerprint(df_column))).encode(),
+            digest_size=16).hexdigest()
+
+    def call(self, metric, df_column, window, **kwargs):
+        """
+        Fn to get metric(df_column, window, **kwargs), from the cache if it has
+        been calculated before
+
+        :return: copy of the cached result, so callers can modify it. Results
+                of fns that metric_name can't identify are only held in memory
+        """
+        name = metric_name(metric)
+        key = self.key(metric, df_column, window, kwargs, name)
+        with self.lock:
+            result = self.entries.get(key)
+            if result is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return result.copy()
+        result = self.load(key) if name is not None else None
+        if result is not None:
+            with self.lock:
+                self.disk_hits += 1
+        else:
+            with self.lock:
+                self.misses += 1
+            result = metric(df_column, window, **kwargs)
+            if name is not None:
+                self.save(key, result)
+        self.put(key, result)
+        return result.copy()
+
+    def wrap(self, metric):
+        """
+        Fn to get a cached version of a metric with the same arguments
+        """
+        def cached(df_column, window, **kwargs):
+            return self.call(metric, df_column, window, **kwargs)
+        cached.__name__ = metric.__name__
+        cached.__wrapped__ = metric
+        return cached
+
+    def put(self, key, result):
+        size = _nbytes(result)
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = result
+            self.nbytes += size
+            while self.nbytes > self.max_bytes and len(self.entries) > 1:
+                _, old = self.entries.popitem(last=False)
+                self.nbytes -= _nbytes(old)
+                self.evictions += 1
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.npz')
+
+    def save(self, key, result):
+        """
+        Fn to write a series result to cache_dir, other results are only held
+        in memory
+        """
+        if self.cache_dir is None or not isinstance(result, pd.Series) or \
+                not isinstance(result.index, pd.DatetimeIndex) or \
+                not isinstance(result.name, (str, type(None))):
+            return
+        tmp_path = self.path(key) + '.tmp.npz'
+        np.savez(tmp_path, values=result.to_numpy(), index=result.index.values,
+                 meta=json.dumps({'name': result.name,
+                                  'index_name': result.index.name}))
+        os.replace(tmp_path, self.path(key))
+
+    def load(self, key):
+        """
+        Fn to read a result from cache_dir
+
+        :return: series or None if not stored
+        """
+        if self.cache_dir is None or not os.path.exists(self.path(key)):
+            return None
+        with np.load(self.path(key), allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            return pd.Series(data['values'], name=meta['name'],
+                             index=pd.DatetimeIndex(data['index'],
+                                                    name=meta['index_name']))
+
+    def stats(self):
+        """
+        Fn to get hit, miss and eviction counts and current size
+        """
+        calls = self.hits + self.disk_hits + self.misses
+        return {'hits': self.hits, 'disk_hits': self.disk_hits,
+                'misses': self.misses, 'evictions': self.evictions,
+                'hit_rate': (self.hits + self.disk_hits) / calls if calls
+                            else 0.0,
+                'entries': len(self.entries), 'bytes': self.nbytes}
+
+    def clear(self, disk=False):
+        """
+        Fn to empty the cache in memory, and in cache_dir if disk
+        """
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+        if disk and self.cache_dir is not None:
+            for f in os.listdir(self.cache_dir):
+                if f.endswith('.npz'):
+                    os.remove(os.path.join(self.cache_dir, f))
+
+
+def _nbytes(result):
+    return int(np.sum(result.memory_usage(index=True)))
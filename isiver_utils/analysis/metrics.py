@@ -70,6 +70,38 @@ def bollinger(df_column, window, bound='Upper'):
         return ma - (2 * sd)
 
 
+def ewm_lookback(span, tolerance=1e-12):
+    """
+    Number of trailing values needed for an exponential moving average over
+    the trailing values to be within tolerance (relative) of the average over
+    the whole history
+
+    :param span: span of the exponential moving average
+    :param tolerance: relative tolerance of truncated average
+    """
+    return int(np.ceil(np.log(tolerance) / np.log(1 - 2 / (span + 1))))
+
+
+def lookback(metric, window):
+    """
+    Fn to get the number of trailing rows needed to recalculate the latest
+    value of a metric, used to only update the new rows of a dataframe
+
+    :param metric: metric fn from this file e.g. moving_average
+    :param window: window passed to metric
+    :return: int number of rows, or None if the whole column is needed
+    """
+    if metric in (moving_average, std, bollinger):
+        return window
+    if metric is rsi:
+        return window + 1
+    if metric is exp_moving_average:
+        return ewm_lookback(window)
+    if metric is macd:
+        return ewm_lookback(max(window))
+    return None
+
+
 def risk_free_rate(risk_free_df):
     """
     This returns the risk free rate for a specified risk free stock dataframe
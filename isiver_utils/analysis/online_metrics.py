@@ -0,0 +1,211 @@
+"""
+Module of stateful online counterparts to the metrics functions.
+
+Each class holds running sums, exponential weights or Welford variance state so
+a new price can be added in O(1), e.g. from a live price feed, without
+rebuilding a dataframe. Once warmed up the values match the batch functions in
+metrics.py for the same window.
+
+Missing (nan) prices are skipped rather than counted.
+"""
+
+
+import math
+from collections import deque
+
+
+from isiver_utils.analysis import metrics
+
+
+class online_metric():
+    """
+    Base class for online metrics, value is nan until warmed up
+    """
+    value = math.nan
+
+    def update(self, x):
+        """
+        Fn to add a new price and return the latest metric value
+        """
+        raise NotImplementedError
+
+    def update_many(self, values):
+        """
+        Fn to add a sequence of prices, returns list of metric values
+        """
+        return [self.update(x) for x in values]
+
+
+class online_moving_average(online_metric):
+    def __init__(self, window):
+        """
+        Running sum moving average, matches metrics.moving_average
+
+        :param window: int number of prices to average over
+        """
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+
+    def update(self, x):
+        if math.isnan(x):
+            return self.value
+        self.values.append(x)
+        self.total += x
+        if len(self.values) > self.window:
+            self.total -= self.values.popleft()
+        if len(self.values) == self.window:
+            self.value = self.total / self.window
+        return self.value
+
+
+class online_exp_moving_average(online_metric):
+    def __init__(self, window):
+        """
+        Exponential moving average, matches metrics.exp_moving_average
+        (pandas ewm with adjust=True) by keeping the weighted sum of prices and
+        the sum of weights
+
+        :param window: span of exponential moving average
+        """
+        self.window = window
+        self.decay = 1 - 2 / (window + 1)
+        self.weighted_sum = 0.0
+        self.weights = 0.0
+
+    def update(self, x):
+        if math.isnan(x):
+            return self.value
+        self.weighted_sum = x + self.decay * self.weighted_sum
+        self.weights = 1 + self.decay * self.weights
+        self.value = self.weighted_sum / self.weights
+        return self.value
+
+
+class online_std(online_metric):
+    def __init__(self, window):
+        """
+        Rolling sample standard deviation using Welford's algorithm with
+        removal of the oldest price, matches metrics.std
+
+        :param window: int number of prices
+        """
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.values.append(x)
+        delta = x - self.mean
+        self.mean += delta / len(self.values)
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self):
+        x = self.values.popleft()
+        if not self.values:
+            self.mean, self.m2 = 0.0, 0.0
+            return
+        delta = x - self.mean
+        self.mean -= delta / len(self.values)
+        self.m2 = max(self.m2 - delta * (x - self.mean), 0.0)
+
+    def update(self, x):
+        if math.isnan(x):
+            return self.value
+        self.add(x)
+        if len(self.values) > self.window:
+            self.remove()
+        if len(self.values) == self.window and self.window > 1:
+            self.value = math.sqrt(self.m2 / (self.window - 1))
+        return self.value
+
+
+class online_rsi(online_metric):
+    def __init__(self, window):
+        """
+        Relative strength index from running averages of price rises and
+        falls, matches metrics.rsi
+
+        :param window: int number of price changes
+        """
+        self.window = window
+        self.previous = math.nan
+        self.up = online_moving_average(window)
+        self.down = online_moving_average(window)
+
+    def update(self, x):
+        if math.isnan(x):
+            return self.value
+        if not math.isnan(self.previous):
+            delta = x - self.previous
+            up = self.up.update(max(delta, 0.0))
+            down = self.down.update(max(-delta, 0.0))
+            if down != 0:
+                self.value = 100.0 - (100.0 / (1.0 + up / down))
+            elif not math.isnan(up):
+                self.value = 100.0 if up > 0 else math.nan
+        self.previous = x
+        return self.value
+
+
+class online_macd(online_metric):
+    def __init__(self, window):
+        """
+        Moving average convergence divergence, matches metrics.macd
+
+        :param window: tuple of (short, long) exponential moving average spans
+        """
+        self.window = window
+        self.ema_1 = online_exp_moving_average(window[0])
+        self.ema_2 = online_exp_moving_average(window[1])
+
+    def update(self, x):
+        if math.isnan(x):
+            return self.value
+        self.value = self.ema_1.update(x) - self.ema_2.update(x)
+        return self.value
+
+
+class online_bollinger(online_metric):
+    def __init__(self, window, bound='Upper'):
+        """
+        Upper or lower bollinger band, matches metrics.bollinger
+
+        :param window: int number of prices
+        :param bound: 'Upper' or 'Lower'
+        """
+        self.window = window
+        self.bound = bound
+        self.std = online_std(window)
+
+    def update(self, x):
+        sd = self.std.update(x)
+        if not math.isnan(sd):
+            if self.bound == 'Upper':
+                self.value = self.std.mean + 2 * sd
+            elif self.bound == 'Lower':
+                self.value = self.std.mean - 2 * sd
+        return self.value
+
+
+online_counterparts = {
+    metrics.moving_average: online_moving_average,
+    metrics.exp_moving_average: online_exp_moving_average,
+    metrics.std: online_std,
+    metrics.rsi: online_rsi,
+    metrics.macd: online_macd,
+    metrics.bollinger: online_bollinger,
+}
+
+
+def online_metric_for(metric, window, **kwargs):
+    """
+    Fn to create the online counterpart of a batch metric, e.g. to follow the
+    columns added with stock_dataframe.add_metric_column
+
+    :param metric: metric fn from metrics.py e.g. metrics.rsi
+    :param window: window as passed to the batch metric
+    :return: online_metric instance
+    """
+    return online_counterparts[metric](window, **kwargs)
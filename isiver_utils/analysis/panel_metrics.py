@@ -0,0 +1,80 @@
+"""
+Module to calculate metrics for a whole universe of stocks at once.
+
+The metrics functions work on a 2d panel (dates x tickers) as well as on a
+single column, so each metric/window is one vectorised pandas call over every
+ticker rather than one call per stock_dataframe.
+"""
+
+
+import numpy as np
+import pandas as pd
+
+
+from isiver_utils.analysis import metrics
+
+
+# (metric, windows, metric_col_name, kwargs) as used by get_default_metrics
+default_panel_metrics = [
+    (metrics.moving_average, (30, 50), 'MA', {}),
+    (metrics.exp_moving_average, (30, 50), 'EMA', {}),
+    (metrics.std, (12, 26), 'std', {}),
+    (metrics.rsi, (14,), 'RSI', {}),
+    (metrics.macd, ((12, 26),), 'MACD', {}),
+    (metrics.bollinger, (20,), 'Boll_Upper', {'bound': 'Upper'}),
+    (metrics.bollinger, (20,), 'Boll_Lower', {'bound': 'Lower'}),
+]
+
+
+def price_panel(stock_classes, column='Close'):
+    """
+    Fn to combine one column of many stock dataframes into a dates x tickers
+    panel
+
+    :param stock_classes: dict of ticker: stock_dataframe
+    :param column: column to take from each dataframe
+    :return: dataframe with a column per ticker
+    """
+    return pd.DataFrame({ticker: stock_class.df[column]
+                         for ticker, stock_class in stock_classes.items()})
+
+
+def panel_metrics(panel, metric_specs=default_panel_metrics, column='Close'):
+    """
+    Fn to calculate metrics for every ticker in a panel
+
+    :param panel: dates x tickers dataframe of prices
+    :param metric_specs: list of (metric, windows, metric_col_name, kwargs)
+    :param column: name of the price column, used for metric labels which
+                follow add_metric_column e.g. 'Close_MA_30'
+    :return: dataframe with (metric label, ticker) MultiIndex columns
+    """
+    frames = {}
+    for metric, windows, metric_col_name, kwargs in metric_specs:
+        for w in windows:
+            frames[f'{column}_{metric_col_name}_{w}'] = metric(panel, w,
+                                                               **kwargs)
+    return pd.concat(frames, axis=1)
+
+
+def panel_metrics_array(panel, metric_specs=default_panel_metrics,
+                        column='Close', dtype=np.float64):
+    """
+    Fn to calculate metrics for every ticker in a panel into one 3d array
+
+    :param panel: dates x tickers dataframe of prices
+    :param metric_specs: list of (metric, windows, metric_col_name, kwargs)
+    :param column: name of the price column used for metric labels
+    :param dtype: dtype of output array, e.g. np.float32 for screening
+    :return: (array of shape dates x tickers x metrics, list of metric labels)
+    """
+    labels = [f'{column}_{metric_col_name}_{w}'
+              for _, windows, metric_col_name, _ in metric_specs
+              for w in windows]
+    out = np.empty((len(panel), panel.shape[1], len(labels)), dtype=dtype)
+    i = 0
+    for metric, windows, metric_col_name, kwargs in metric_specs:
+        for w in windows:
+            out[:, :, i] = metric(panel, w, **kwargs).to_numpy()
+            i += 1
+    return out, labels
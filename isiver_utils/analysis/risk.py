@@ -0,0 +1,169 @@
+"""
+Module of rolling and universe wide versions of the return metrics (beta,
+alpha and Sharpe's ratio) in metrics.py.
+
+Rolling metrics at each date equal metrics.get_return_metrics applied to the
+trailing window with each 'Returns' column rebased to 1 at the start of the
+window. They accept a Series of returns for one stock or a dates x tickers
+dataframe of returns for a whole universe.
+"""
+
+
+import numpy as np
+import pandas as pd
+
+
+def window_return(returns, window):
+    """
+    Fn to get the cumulative return over each trailing window
+
+    :param returns: cumulative 'Returns' series or dataframe
+    :param window: int number of rows in window
+    """
+    return returns / returns.shift(window - 1) - 1
+
+
+def rolling_beta(returns, base_returns, window):
+    """
+    Calculate rolling beta against a baseline
+
+    :param returns: cumulative 'Returns' series, or dataframe of many stocks
+    :param base_returns: baseline 'Returns' series e.g. FTSE 100 tracker
+    :param window: int number of rows in window
+    :return: beta for each date, same shape as returns
+    """
+    cov = returns.rolling(window).cov(base_returns)
+    var = base_returns.rolling(window).var().replace(0, np.nan)
+    # Rebasing both series to the window start scales the covariance
+    scale = base_returns.shift(window - 1)
+    return cov.mul(scale / var, axis=0) / returns.shift(window - 1)
+
+
+def rolling_alpha(returns, base_returns, risk_free_returns, window):
+    """
+    Calculate rolling alpha (in %) against a baseline
+
+    :param returns: cumulative 'Returns' series, or dataframe of many stocks
+    :param base_returns: baseline 'Returns' series e.g. FTSE 100 tracker
+    :param risk_free_returns: risk free 'Returns' series e.g. government bonds
+    :param window: int number of rows in window
+    :return: alpha for each date, same shape as returns
+    """
+    rf = window_return(risk_free_returns, window)
+    beta_value = rolling_beta(returns, base_returns, window)
+    excess_base = window_return(base_returns, window) - rf
+    return (window_return(returns, window).sub(rf, axis=0) -
+            beta_value.mul(excess_base, axis=0)) * 100
+
+
+def rolling_sharpes(returns, window, rf=0.01):
+    """
+    Calculate rolling Sharpe's ratio
+
+    :param returns: cumulative 'Returns' series, or dataframe of many stocks
+    :param window: int number of rows in window
+    :param rf: risk free rate, float or series of rates for each window
+                e.g. window_return(risk_free_returns, window)
+    :return: Sharpe's ratio for each date, same shape as returns
+    """
+    sd = returns.rolling(window).std(ddof=0) / returns.shift(window - 1)
+    return window_return(returns, window).sub(rf, axis=0) / sd.replace(0, np.nan)
+
+
+def rolling_return_metrics(df, base_df, risk_free_df, window):
+    """
+    Fn to get rolling beta, alpha and sharpes for a stock dataframe, the rolling
+    equivalent of metrics.get_return_metrics
+
+    :param df: stock dataframe of interest
+    :param base_df: baseline stock dataframe (e.g. FTSE 100 tracker)
+    :param risk_free_df: risk free stock dataframe (e.g. government bonds)
+    :param window: int number of rows in window
+    :return: dataframe with 'Beta', 'Alpha' and 'Sharpes' columns
+    """
+    rf = window_return(risk_free_df['Returns'], window)
+    return pd.DataFrame({
+        'Beta': rolling_beta(df['Returns'], base_df['Returns'], window),
+        'Alpha': rolling_alpha(df['Returns'], base_df['Returns'],
+                               risk_free_df['Returns'], window),
+        'Sharpes': rolling_sharpes(df['Returns'], window, rf)})
+
+
+def universe_return_metrics(returns, base_returns, risk_free_returns):
+    """
+    Fn to get beta, alpha and sharpes for many stocks at once, matching
+    metrics.get_return_metrics for each stock. The baseline variance is shared
+    and all covariances come from a single matrix product.
+
+    :param returns: dates x tickers dataframe of cumulative 'Returns', rows
+                aligned with base_returns and without missing values
+    :param base_returns: baseline 'Returns' series e.g. FTSE 100 tracker
+    :param risk_free_returns: risk free 'Returns' series e.g. government bonds
+    :return: dataframe indexed by ticker with 'Beta', 'Alpha' and 'Sharpes'
+    """
+    x = returns.to_numpy(dtype=float)
+    b = base_returns.to_numpy(dtype=float)
+    n = len(x)
+    b_centred = b - b.mean()
+    var = b_centred @ b_centred / (n - 1)
+    cov = (x - x.mean(axis=0)).T @ b_centred / (n - 1)
+    beta_value = cov / var if var != 0 else np.full(x.shape[1], np.nan)
+
+    rf = risk_free_returns.iloc[-1] - 1
+    excess = x[-1] - 1 - rf
+    alpha_value = (excess - beta_value * (b[-1] - 1 - rf)) * 100
+    sd = x.std(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpes_value = np.where(sd == 0, np.nan, excess / sd)
+    return pd.DataFrame({'Beta': beta_value, 'Alpha': alpha_value,
+                         'Sharpes': sharpes_value}, index=returns.columns)
+
+
+def rolling_covariance_matrix(panel, window, correlation=False, dates=None):
+    """
+    Fn to calculate the N x N covariance (or correlation) matrix of a panel over
+    each trailing window, by sliding running sums of outer products
+
+    Output holds len(dates) x N x N floats, so pass dates to limit memory for
+    large universes.
+
+    :param panel: dates x tickers dataframe without missing values, e.g.
+                daily returns
+    :param window: int number of rows in window
+    :param correlation: bool, True for correlation rather than covariance
+    :param dates: dates to return matrices for, defaults to all dates. Raises
+                KeyError for dates not in the panel
+    :return: array of shape (dates, tickers, tickers), nan before a full window
+    """
+    x = panel.to_numpy(dtype=float)
+    x = x - x.mean(axis=0)                                                      # centre to limit rounding in running sums
+    positions = np.arange(len(x)) if dates is None else \
+                panel.index.get_indexer(pd.DatetimeIndex(dates))
+    if (positions < 0).any():
+        missing = pd.DatetimeIndex(dates)[positions < 0].strftime('%Y-%m-%d')
+        raise KeyError(f'dates not in panel: {list(missing)}')
+    wanted = np.zeros(len(x), dtype=bool)
+    wanted[positions] = True
+    out = np.full((len(x), x.shape[1], x.shape[1]), np.nan) if dates is None \
+          else {}
+
+    total = np.zeros(x.shape[1])
+    products = np.zeros((x.shape[1], x.shape[1]))
+    for t in range(len(x)):
+        total += x[t]
+        products += np.outer(x[t], x[t])
+        if t >= window:
+            total -= x[t - window]
+            products -= np.outer(x[t - window], x[t - window])
+        if t >= window - 1 and wanted[t]:
+            cov = (products - np.outer(total, total) / window) / (window - 1)
+            if correlation:
+                sd = np.sqrt(np.diag(cov))
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    cov = cov / np.outer(sd, sd)
+            out[t] = cov
+
+    if dates is None:
+        return out
+    nan_matrix = np.full((x.shape[1], x.shape[1]), np.nan)
+    return np.array([out.get(t, nan_matrix) for t in positions])
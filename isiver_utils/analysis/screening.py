@@ -0,0 +1,377 @@
+"""
+Screening a universe of stocks on their latest indicator values.
+
+screen_table keeps the last two rows of every stock dataframe in one columnar
+array (row x column x ticker), so a filter is a handful of numpy comparisons
+across every ticker rather than a loop over stock classes. Filters are
+declarative strings, e.g.
+
+    RSI_14 below 30 and Close crossed above Boll_Lower_20 today
+
+Conditions compare columns or numbers with <, <=, >, >=, ==, !=, above,
+below or between x and y, and a crossed above/below b compares the latest row
+with the row before it (as backtest.crossed_above does). Conditions combine
+with and, or, not and brackets, and operands can use + - * /. Columns not in
+the table are looked up with a 'Close_' prefix, so RSI_14 is Close_RSI_14.
+Updating a ticker only rewrites its own slice of the table.
+"""
+
+
+import re
+import operator
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+
+comparisons = {'<': operator.lt, '<=': operator.le, '>': operator.gt,
+               '>=': operator.ge, '==': operator.eq, '!=': operator.ne,
+               'below': operator.lt, 'above': operator.gt}
+arithmetic = {'+': operator.add, '-': operator.sub, '*': operator.mul,
+              '/': operator.truediv}
+keywords = {'and', 'or', 'not', 'crossed', 'above', 'below', 'between',
+            'today'}
+token_pattern = re.compile(r'\s*(?:(?P<number>\d+\.?\d*(?:[eE][-+]?\d+)?)|'
+                           r'(?P<op><=|>=|==|!=|<|>|[-+*/()])|'
+                           r'(?P<name>[A-Za-z_][A-Za-z0-9_.]*))')
+
+
+def tokenise(expression):
+    """
+    Fn to split a filter expression into (kind, value) tokens
+    """
+    tokens, position = [], 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = token_pattern.match(expression, position)
+        if match is None or match.end() == position:
+            raise ValueError(f'unexpected {expression[position:]!r} in filter')
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'name' and value.lower() in keywords:
+            kind, value = 'keyword', value.lower()
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+
+class _parser():
+    """
+    Recursive descent parser turning tokens into fns of a column getter
+    get(name, row), row 0 the latest and 1 the previous row
+    """
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+        self.names = []
+
+    def peek(self, value=None):
+        if self.position >= len(self.tokens):
+            return None
+        token = self.tokens[self.position]
+        return token if value is None or token[1] == value else None
+
+    def take(self, value=None):
+        token = self.peek(value)
+        if token is None:
+            found = self.peek()
+            raise ValueError(f'expected {value or "more"} in filter, found '
+                             f'{found[1] if found else "end"}')
+        self.position += 1
+        return token
+
+    def parse(self):
+        condition = self.disjunction()
+        if self.peek() is not None:
+            raise ValueError(f'unexpected {self.peek()[1]!r} in filter')
+        return condition
+
+    def disjunction(self):
+        condition = self.conjunction()
+        while self.peek('or'):
+            self.take()
+            condition = _combine(operator.or_, condition, self.conjunction())
+        return condition
+
+    def conjunction(self):
+        condition = self.negation()
+        while self.peek('and'):
+            self.take()
+            condition = _combine(operator.and_, condition, self.negation())
+        return condition
+
+    def negation(self):
+        if self.peek('not'):
+            self.take()
+            condition = self.negation()
+            return lambda get: ~condition(get)
+        if self.peek('(') and self.is_bracketed_condition():
+            self.take('(')
+            condition = self.disjunction()
+            self.take(')')
+            return condition
+        return self.condition()
+
+    def is_bracketed_condition(self):
+        """
+        Fn to check if a bracket opens a condition rather than an operand
+        """
+        depth = 0
+        for kind, value in self.tokens[self.position:]:
+            depth += value == '(' and kind == 'op'
+            depth -= value == ')' and kind == 'op'
+            if depth == 0:
+                return False
+            if (kind == 'keyword' and value != 'today') or \
+                    (kind == 'op' and value in comparisons):
+                return True
+        return False
+
+    def condition(self):
+        left = self.operand()
+        token = self.peek()
+        if token is None:
+            raise ValueError('expected a comparison in filter')
+        kind, value = token
+        if value == 'crossed':
+            self.take()
+            direction = self.take()[1]
+            if direction not in ('above', 'below'):
+                raise ValueError(f'expected above or below after crossed, '
+                                 f'found {direction}')
+            right = self.operand()
+            now, before = (operator.gt, operator.le) if direction == 'above' \
+                else (operator.lt, operator.ge)
+            condition = lambda get: now(left(get, 0), right(get, 0)) & \
+                before(left(get, 1), right(get, 1))
+        elif value == 'between':
+            self.take()
+            low = self.operand()
+            self.take('and')
+            high = self.operand()
+            condition = lambda get: (left(get, 0) >= low(get, 0)) & \
+                (left(get, 0) <= high(get, 0))
+        elif value in comparisons and kind in ('op', 'keyword'):
+            self.take()
+            compare = comparisons[value]
+            right = self.operand()
+            condition = lambda get: compare(left(get, 0), right(get, 0))
+        else:
+            raise ValueError(f'expected a comparison in filter, found {value}')
+        if self.peek('today'):
+            self.take()
+        return condition
+
+    def operand(self):
+        value = self.term()
+        while self.peek() and self.peek()[1] in ('+', '-'):
+            apply = arithmetic[self.take()[1]]
+            value = _combine(apply, value, self.term())
+        return value
+
+    def term(self):
+        value = self.atom()
+        while self.peek() and self.peek()[1] in ('*', '/'):
+            apply = arithmetic[self.take()[1]]
+            value = _combine(apply, value, self.atom())
+        return value
+
+    def atom(self):
+        kind, value = self.take()
+        if kind == 'number':
+            number = float(value)
+            return lambda get, row: number
+        if kind == 'name':
+            self.names.append(value)
+            return lambda get, row: get(value, row)
+        if value == '-':
+            inner = self.atom()
+            return lambda get, row: -inner(get, row)
+        if value == '(':
+            inner = self.operand()
+            self.take(')')
+            return inner
+        raise ValueError(f'unexpected {value!r} in filter')
+
+
+def _combine(apply, first, second):
+    return lambda *args: apply(first(*args), second(*args))
+
+
+@lru_cache(maxsize=256)
+def compile_filter(expression):
+    """
+    Fn to parse a filter expression once, see module docstring for syntax
+
+    :param expression: filter string e.g. 'RSI_14 below 30'
+    :return: (fn of a column getter returning a boolean array, tuple of column
+            names used)
+    """
+    parser = _parser(tokenise(expression))
+    condition = parser.parse()
+    return condition, tuple(dict.fromkeys(parser.names))
+
+
+class screen_table():
+    def __init__(self, prefix='Close_'):
+        """
+        This class represents the latest and previous rows of many stock
+        dataframes, stored as one array of shape (2, columns, tickers)
+
+        :param prefix: prefix tried for column names not in the table
+        """
+        self.prefix = prefix
+        self.columns = []
+        self.column_index = {}
+        self.tickers = []
+        self.ticker_index = {}
+        self.values = np.full((2, 0, 0), np.nan)
+        self.dates = np.empty(0, dtype='M8[ns]')
+
+    @classmethod
+    def from_stock_classes(cls, stock_classes, **kwargs):
+        """
+        Fn to build a table from a dict of ticker: stock_dataframe
+        """
+        table = cls(**kwargs)
+        table.refresh(stock_classes)
+        return table
+
+    def reserve(self, columns, tickers):
+        """
+        Fn to grow the array (doubling) to hold at least the given numbers of
+        columns and tickers
+        """
+        _, column_capacity, ticker_capacity = self.values.shape
+        if columns <= column_capacity and tickers <= ticker_capacity:
+            return
+        grow = lambda n, capacity: capacity if n <= capacity else \
+            max(n, 2 * capacity)
+        shape = (2, grow(columns, column_capacity),
+                 grow(tickers, ticker_capacity))
+        values = np.full(shape, np.nan)
+        values[:, :column_capacity, :ticker_capacity] = self.values
+        self.values = values
+        dates = np.full(shape[2], np.datetime64('NaT'), dtype='M8[ns]')
+        dates[:len(self.dates)] = self.dates
+        self.dates = dates
+
+    def update(self, ticker, df):
+        """
+        Fn to replace one ticker's rows with the last two rows of its stock
+        dataframe, adding the ticker and any new numeric columns
+
+        :param ticker: ticker e.g. 'SMT.L'
+        :param df: stock_dataframe.df indexed by date
+        """
+        rows = df.iloc[-2:].select_dtypes('number')
+        new_columns = [c for c in rows.columns if c not in self.column_index]
+        new_ticker = ticker not in self.ticker_index
+        self.reserve(len(self.columns) + len(new_columns),
+                     len(self.tickers) + new_ticker)
+        for c in new_columns:
+            self.column_index[c] = len(self.columns)
+            self.columns.append(c)
+        if new_ticker:
+            self.ticker_index[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+        t = self.ticker_index[ticker]
+        self.values[:, :, t] = np.nan
+        if rows.empty:
+            self.dates[t] = np.datetime64('NaT')
+            return
+        idx = [self.column_index[c] for c in rows.columns]
+        data = rows.to_numpy(dtype=float)
+        self.values[0, idx, t] = data[-1]
+        if len(data) > 1:
+            self.values[1, idx, t] = data[-2]
+        self.dates[t] = rows.index[-1]
+
+    def refresh(self, stock_classes, tickers=None):
+        """
+        Fn to update the table from stock classes, e.g. after update_stock_df
+
+        :param stock_classes: dict of ticker: stock_dataframe
+        :param tickers: tickers to update, None for all in stock_classes
+        """
+        for ticker in stock_classes if tickers is None else tickers:
+            self.update(ticker, stock_classes[ticker].df)
+        return self
+
+    def remove(self, ticker):
+        """
+        Fn to remove a ticker, moving the last ticker into its slot
+        """
+        t = self.ticker_index.pop(ticker)
+        last = len(self.tickers) - 1
+        if t != last:
+            self.values[:, :, t] = self.values[:, :, last]
+            self.dates[t] = self.dates[last]
+            self.tickers[t] = self.tickers[last]
+            self.ticker_index[self.tickers[t]] = t
+        self.values[:, :, last] = np.nan
+        self.dates[last] = np.datetime64('NaT')
+        self.tickers.pop()
+
+    def column(self, name, row=0):
+        """
+        Fn to get one column's values for every ticker
+
+        :param name: column name, tried with prefix if not in the table
+        :param row: 0 for the latest row, 1 for the previous row
+        :return: 1d array in the order of tickers
+        """
+        c = self.column_index.get(name)
+        if c is None:
+            c = self.column_index.get(self.prefix + name)
+        if c is None:
+            raise KeyError(f'unknown column {name}')
+        return self.values[row, c, :len(self.tickers)]
+
+    def mask(self, expression, stale=False):
+        """
+        Fn to evaluate a filter for every ticker at once
+
+        :param expression: filter string, see module docstring
+        :param stale: bool, True to include tickers whose latest row is older
+                    than the latest date in the table
+        :return: boolean array in the order of tickers
+        """
+        condition, _ = compile_filter(expression)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = np.broadcast_to(condition(self.column),
+                                     len(self.tickers)).copy()
+        dates = self.dates[:len(self.tickers)]
+        if not stale and not np.isnat(dates).all():
+            result &= dates == dates[~np.isnat(dates)].max()
+        return result
+
+    def screen(self, expression, columns=None, stale=False):
+        """
+        Fn to get the tickers matching a filter with their latest values
+
+        :param expression: filter string e.g.
+                    'RSI_14 below 30 and Close crossed above Boll_Lower_20'
+        :param columns: columns to return, defaults to those in the filter
+        :return: dataframe indexed by ticker with a Date column
+        """
+        matches = np.flatnonzero(self.mask(expression, stale))
+        if columns is None:
+            columns = compile_filter(expression)[1]
+        out = pd.DataFrame({'Date': self.dates[matches]},
+                           index=pd.Index(np.asarray(self.tickers,
+                                                     dtype=object)[matches],
+                                          name='Ticker'))
+        for name in columns:
+            out[name] = self.column(name)[matches]
+        return out
+
+    def snapshot(self, row=0):
+        """
+        Fn to get the latest (or previous) row of every ticker as a dataframe
+        of tickers x columns
+        """
+        return pd.DataFrame(self.values[row, :len(self.columns),
+                                        :len(self.tickers)].T,
+                            index=pd.Index(self.tickers, name='Ticker'),
+                            columns=self.columns)
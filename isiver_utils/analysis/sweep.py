@@ -0,0 +1,136 @@
+"""
+Module to calculate a metric for many windows at once, e.g. to tune windows.
+
+Cumulative sums (and sums of squares) of a column are built once, then the sum
+over every trailing window of every length is a difference of two prefix sums.
+Each sweep returns a dates x windows dataframe whose column w equals the
+metrics function called with window w, without a rolling pass per window.
+"""
+
+
+import numpy as np
+import pandas as pd
+
+
+from isiver_utils.analysis import metrics
+
+
+def rolling_sums(values, windows, power=1):
+    """
+    Fn to get the sum of values ** power over every trailing window
+
+    :param values: 1d array, nan values make windows containing them nan
+    :param windows: sequence of int window lengths
+    :param power: power values are raised to before summing
+    :return: 2d array of shape (len(values), len(windows)), nan before a full
+            window
+    """
+    values = np.asarray(values, dtype=float)
+    missing = np.isnan(values)
+    dtype = np.longdouble if power == 2 else float                              # extended precision for sums of squares where available
+    sums = np.concatenate([[0.0], np.cumsum(np.where(missing, 0.0,
+                                                     values ** power),
+                                            dtype=dtype)])
+    counts = np.concatenate([[0], np.cumsum(missing)])
+    out = np.full((len(windows), len(values)), np.nan)                          # transposed to the column layout pandas uses
+    for i, w in enumerate(windows):
+        if w > len(values):
+            continue
+        out[i, w - 1:] = sums[w:] - sums[:-w]
+        if counts[-1]:
+            out[i, w - 1:][counts[w:] - counts[:-w] > 0] = np.nan
+    out = out.T
+    return out
+
+
+def moving_average_sweep(df_column, windows):
+    """
+    Fn to get moving averages for every window, matches metrics.moving_average
+
+    :param df_column: series of prices
+    :param windows: sequence of int windows e.g. range(5, 201)
+    :return: dates x windows dataframe
+    """
+    values = df_column.to_numpy(dtype=float)
+    centre = _centre(values)                                                    # limits rounding in long prefix sums
+    out = rolling_sums(values - centre, windows) / np.asarray(windows) + centre
+    return _frame(out, df_column, windows)
+
+
+def std_sweep(df_column, windows):
+    """
+    Fn to get rolling sample standard deviations for every window, matches
+    metrics.std
+    """
+    values = df_column.to_numpy(dtype=float)
+    values = values - _centre(values)
+    w = np.asarray(windows, dtype=float)
+    total = rolling_sums(values, windows)
+    squares = rolling_sums(values, windows, power=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var = (squares - total ** 2 / w) / (w - 1)
+    return _frame(np.sqrt(np.maximum(var, 0.0)), df_column, windows)
+
+
+def bollinger_sweep(df_column, windows, bound='Upper'):
+    """
+    Fn to get upper or lower bollinger bands for every window, matches
+    metrics.bollinger
+    """
+    ma = moving_average_sweep(df_column, windows)
+    sd = std_sweep(df_column, windows)
+    if bound == 'Upper':
+        return ma + (2 * sd)
+    elif bound == 'Lower':
+        return ma - (2 * sd)
+
+
+def rsi_sweep(df_column, windows):
+    """
+    Fn to get the relative strength index for every window, matches
+    metrics.rsi
+    """
+    delta = np.diff(df_column.to_numpy(dtype=float), prepend=np.nan)
+    up = rolling_sums(np.where(delta > 0, delta, np.where(np.isnan(delta),
+                                                          np.nan, 0.0)), windows)
+    down = rolling_sums(np.where(delta < 0, -delta, np.where(np.isnan(delta),
+                                                             np.nan, 0.0)),
+                        windows)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100.0 - (100.0 / (1.0 + up / down))
+    return _frame(out, df_column, windows)
+
+
+sweeps = {
+    metrics.moving_average: moving_average_sweep,
+    metrics.std: std_sweep,
+    metrics.bollinger: bollinger_sweep,
+    metrics.rsi: rsi_sweep,
+}
+
+
+def sweep(metric, df_column, windows, **kwargs):
+    """
+    Fn to calculate a metric for many windows, using prefix sums where the
+    metric has a sweep and calling the metric per window otherwise
+
+    :param metric: metric fn from metrics.py e.g. metrics.rsi
+    :param df_column: series of prices
+    :param windows: sequence of windows, as for add_metric_column
+    :param kwargs: passed to the metric e.g. bound='Lower'
+    :return: dates x windows dataframe
+    """
+    windows = list(windows)
+    if metric in sweeps:
+        return sweeps[metric](df_column, windows, **kwargs)
+    return pd.DataFrame({w: metric(df_column, w, **kwargs) for w in windows},
+                        index=df_column.index, columns=windows)
+
+
+def _centre(values):
+    finite = values[~np.isnan(values)]
+    return finite.mean() if len(finite) else 0.0
+
+
+def _frame(out, df_column, windows):
+    return pd.DataFrame(out, index=df_column.index, columns=list(windows))
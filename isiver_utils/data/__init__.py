@@ -1 +1,4 @@
 from isiver_utils.data.data_acquisition import stock_dataframe
+from isiver_utils.data.caching import price_cache
+from isiver_utils.data.providers import synthetic_provider, csv_provider
+from isiver_utils.data.universe import load_universe
@@ -0,0 +1,131 @@
+"""
+Local on-disk price cache used by stock_dataframe.download_data.
+
+Each ticker is stored as one columnar .npz file holding the date index, one
+array per price column and the date range that has been requested so far, so
+only missing date ranges need to be downloaded.
+"""
+
+
+import os
+import json
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+
+class price_cache():
+    def __init__(self, cache_dir, max_age=timedelta(hours=12),
+                 max_bytes=256 * 2**20):
+        """
+        This class represents a directory of cached price histories keyed by
+        ticker and covered date range.
+
+        :param cache_dir: directory to store cached price files in
+        :param max_age: timedelta after which the most recent bar of a ticker
+                        is treated as stale and downloaded again
+        :param max_bytes: maximum total size of the cache directory, least
+                        recently used tickers are evicted beyond this
+        """
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, ticker):
+        return os.path.join(self.cache_dir, f'{ticker}.npz')
+
+    def load(self, ticker):
+        """
+        Fn to load a cached price dataframe and its metadata
+
+        :return: (df, meta) or (None, None) if ticker not cached
+        """
+        path = self.path(ticker)
+        if not os.path.exists(path):
+            return None, None
+        with np.load(path, allow_pickle=False) as data:
+            columns = list(data['columns'])
+            df = pd.DataFrame({c: data[f'col_{c}'] for c in columns},
+                              index=pd.DatetimeIndex(data['index'],
+                                                     name='Date'))
+            meta = json.loads(str(data['meta']))
+        os.utime(path)                                                          # mark as recently used for eviction
+        return df, {k: pd.Timestamp(v) for k, v in meta.items()}
+
+    def save(self, ticker, df, meta):
+        """
+        Fn to write a price dataframe and its covered date range to the cache
+        """
+        arrays = {f'col_{c}': df[c].to_numpy() for c in df.columns}
+        meta = json.dumps({k: str(v) for k, v in meta.items()})
+        np.savez(self.path(ticker), index=df.index.values.astype('M8[ns]'),
+                 columns=np.array(df.columns, dtype=str), meta=np.array(meta),
+                 **arrays)
+        self.evict(keep=ticker)
+
+    def missing_ranges(self, meta, last_date, start, end, now):
+        """
+        Fn to work out which date ranges need downloading for a request
+
+        :param meta: dict of cached 'start', 'end' and 'fetched' timestamps
+        :param last_date: last date in the cached dataframe
+        :return: list of (start, end) tuples
+        """
+        ranges = []
+        if start < meta['start']:
+            ranges.append((start, meta['start']))
+        stale = (meta['fetched'].normalize() <= meta['end']
+                 and now - meta['fetched'] > self.max_age)
+        if end > meta['end'] or stale:
+            # Refetch from the last cached bar as it may have been incomplete
+            ranges.append((min(last_date, meta['end']), max(end, meta['end'])))
+        return ranges
+
+    def get(self, ticker, start, end, fetch):
+        """
+        Fn to return prices for ticker between start and end, downloading only
+        the date ranges missing from the cache
+
+        :param ticker: stock ticker
+        :param start: start date of request
+        :param end: end date of request
+        :param fetch: fn(start, end) returning a price dataframe
+        :return: price dataframe between start and end
+        """
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize()
+        now = pd.Timestamp(datetime.now())
+        df, meta = self.load(ticker)
+        if df is None:
+            df = fetch(start, end)
+            meta = {'start': start, 'end': end, 'fetched': now}
+        else:
+            last_date = df.index[-1] if len(df) else meta['end']
+            ranges = self.missing_ranges(meta, last_date, start, end, now)
+            if not ranges:
+                return df[(df.index >= start) & (df.index <= end)].copy()
+            df = pd.concat([df] + [fetch(s, e) for s, e in ranges])
+            df = df[~df.index.duplicated(keep='last')].sort_index()
+            meta = {'start': min(start, meta['start']),
+                    'end': max(end, meta['end']), 'fetched': now}
+        self.save(ticker, df, meta)
+        return df[(df.index >= start) & (df.index <= end)].copy()
+
+    def evict(self, keep=None):
+        """
+        Fn to delete least recently used tickers until the cache directory is
+        within max_bytes
+
+        :param keep: ticker which should not be evicted
+        """
+        files = [os.path.join(self.cache_dir, f)
+                 for f in os.listdir(self.cache_dir) if f.endswith('.npz')]
+        total = sum(os.path.getsize(f) for f in files)
+        for f in sorted(files, key=os.path.getmtime):
+            if total <= self.max_bytes:
+                break
+            if keep is not None and f == self.path(keep):
+                continue
+            total -= os.path.getsize(f)
+            os.remove(f)
@@ -0,0 +1,235 @@
+"""
+Vectorised cleaning functions used by stock_dataframe.clean_data.
+
+yfinance returns some LSE prices in pounds and some in pence, occasionally
+switching units part way through a history. rescale_units finds these x100 and
+/100 breaks for every price column at once, rather than walking the dataframe
+row by row.
+
+compact_dtypes downcasts a cleaned dataframe for holding many stocks in memory.
+Values are rounded to float32, i.e. a relative error below 6e-8 (about 7
+significant figures), which is well within the precision of the prices.
+"""
+
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import AbstractHolidayCalendar, Holiday, \
+    GoodFriday, EasterMonday, MO, weekend_to_monday, next_monday, \
+    next_monday_or_tuesday
+from pandas.tseries.offsets import DateOffset
+
+
+def unit_scale_exponents(values):
+    """
+    Fn to find the power of 100 each price must be multiplied by to convert the
+    whole column to pence. Mirrors the row by row stock_dataframe loop:
+    - a drop of more than x10 scales the new row up by 100
+    - once scaled, following rows stay scaled until a jump of x10 against the
+      raw price resets them
+    - a rise of more than x10 (against the possibly scaled previous row)
+      scales every earlier row up by 100
+
+    :param values: 2d numpy array of prices, rows are dates
+    :return: 2d integer array of exponents, same shape as values
+    """
+    values = np.asarray(values, dtype=float)
+    exponents = np.zeros(values.shape, dtype=int)
+    if len(values) < 2:
+        return exponents
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = values[1:] / values[:-1]
+
+    # Forward scaling state: 1 after a drop, 0 after a raw jump or bad ratio,
+    # otherwise carried on from the previous row
+    state = np.where(ratio < 0.1, 1.0, np.nan)
+    state[(ratio >= 10) | np.isnan(ratio)] = 0
+    state = np.vstack([np.zeros((1, values.shape[1])), state])
+    forward = _ffill(state).astype(int)
+
+    # Rises compared against the previous row after forward scaling
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scaled_ratio = ratio / np.power(100.0, forward[:-1])
+    jumps = (forward[1:] == 0) & (scaled_ratio > 10)
+    backward = np.zeros(values.shape, dtype=int)
+    backward[:-1] = np.cumsum(jumps[::-1], axis=0)[::-1]
+    return forward + backward
+
+
+def rescale_units(df, columns=None):
+    """
+    Fn to convert all prices in the given columns to pence.
+
+    :param df: stock dataframe
+    :param columns: columns to rescale, defaults to all but the last column
+                    (Volume) as in the original clean_data loop
+    :return: new rescaled dataframe
+    """
+    if columns is None:
+        columns = df.columns[:-1]
+    df = df.copy()
+    values = df[columns].to_numpy(dtype=float)
+    exponents = unit_scale_exponents(values)
+    if exponents.any():
+        df[columns] = values * np.power(100.0, exponents)
+    return df
+
+
+class lse_calendar(AbstractHolidayCalendar):
+    """
+    Regular London Stock Exchange holidays, one off closures (e.g. jubilees and
+    state funerals) aren't included
+    """
+    rules = [
+        Holiday('New Years Day', month=1, day=1, observance=weekend_to_monday),
+        GoodFriday,
+        EasterMonday,
+        Holiday('Early May Bank Holiday', month=5, day=1,
+                offset=DateOffset(weekday=MO(1))),
+        Holiday('Spring Bank Holiday', month=5, day=31,
+                offset=DateOffset(weekday=MO(-1))),
+        Holiday('Summer Bank Holiday', month=8, day=31,
+                offset=DateOffset(weekday=MO(-1))),
+        Holiday('Christmas Day', month=12, day=25, observance=next_monday),
+        Holiday('Boxing Day', month=12, day=26,
+                observance=next_monday_or_tuesday),
+    ]
+
+
+def trading_days(start, end, holidays=None):
+    """
+    Fn to get the business days between start and end (inclusive) excluding
+    holidays
+
+    :param holidays: None for weekdays only, 'LSE' for lse_calendar or a list
+                of dates the exchange is closed
+    """
+    if isinstance(holidays, str):
+        if holidays != 'LSE':
+            raise ValueError(f'unknown exchange calendar {holidays}')
+        holidays = lse_calendar().holidays(start, end)
+    holidays = pd.DatetimeIndex([] if holidays is None else holidays)
+    days = np.arange(np.datetime64(pd.Timestamp(start), 'D'),
+                     np.datetime64(pd.Timestamp(end), 'D') + 1)
+    days = days[np.is_busday(days, holidays=holidays.values.astype('M8[D]'))]
+    return pd.DatetimeIndex(days.astype('M8[ns]'))
+
+
+def fill_gaps(df, method='linear', holidays=None, max_gap=None):
+    """
+    Fn to insert missing dates, resample to business days and interpolate
+    missing values
+
+    :param df: stock dataframe indexed by date
+    :param method: 'linear' to interpolate between the rows either side of a
+                gap as df.interpolate('linear') does (missing values before
+                the first known value are left nan, those after the last
+                known value take it), 'ffill' to carry the last price forward, 'spline' for the
+                original (much slower) scipy order 1 spline, or None to only
+                insert missing dates
+    :param holidays: None, 'LSE' or list of dates, see trading_days. Holiday
+                rows are removed rather than filled
+    :param max_gap: maximum number of consecutive missing rows to fill, longer
+                gaps are left as nan. None to fill all gaps
+    :return: new dataframe with one row per trading day
+    """
+    if df.empty:
+        return df
+    index = trading_days(df.index[0].normalize(), df.index[-1], holidays)
+    index = pd.DatetimeIndex(index.values, name=df.index.name)
+    df = df.reindex(index)
+    missing = df.isna().to_numpy()
+    if method is None or not missing.any():
+        return df
+
+    if method == 'linear':
+        values = df.to_numpy(dtype=float)
+        rows = np.arange(len(values))
+        for j in np.flatnonzero(missing.any(axis=0)):
+            known = ~missing[:, j]
+            if known.any():
+                values[:, j] = np.interp(rows, rows[known], values[known, j],
+                                         left=np.nan)                           # like pandas, leading gaps stay nan
+        filled = pd.DataFrame(values, index=df.index, columns=df.columns)
+    elif method == 'ffill':
+        filled = df.ffill()
+    elif method == 'spline':
+        filled = df.interpolate(method='spline', order=1)
+    else:
+        raise ValueError(f'unknown gap fill method {method}')
+
+    if max_gap is not None:
+        long_gaps = gap_lengths(missing) > max_gap
+        filled = filled.mask(long_gaps)
+    return filled
+
+
+def gap_context(df):
+    """
+    Fn to get the rows from the last known value of each column to the end,
+    the rows fill_gaps needs to fill the gaps at the end of df the same way
+    once more rows are added
+
+    :param df: stock dataframe indexed by date, before filling gaps
+    :return: dataframe of the trailing rows, empty if df is
+    """
+    known = df.notna().to_numpy()
+    last = [np.flatnonzero(known[:, j])[-1] for j in range(known.shape[1])
+            if known[:, j].any()]
+    return df.iloc[min(last, default=max(len(df) - 1, 0)):].copy()
+
+
+def gap_lengths(missing):
+    """
+    Fn to get the length of the run of missing values each missing value is
+    part of, 0 for values that aren't missing
+
+    :param missing: 2d boolean array, rows are dates
+    :return: 2d integer array, same shape as missing
+    """
+    lengths = np.zeros(missing.shape, dtype=int)
+    starts = missing.copy()
+    starts[1:] &= ~missing[:-1]
+    run_ids = np.cumsum(starts, axis=0)
+    for j in range(missing.shape[1]):
+        ids = run_ids[missing[:, j], j]
+        lengths[missing[:, j], j] = np.bincount(ids)[ids]
+    return lengths
+
+
+def compact_dtypes(df, float_dtype=np.float32, int_columns=('Volume',)):
+    """
+    Fn to downcast price and metric columns to float32 and volume to the
+    smallest integer type holding it
+
+    :param df: stock dataframe
+    :param float_dtype: dtype for all non integer columns
+    :param int_columns: columns of whole numbers, left as float_dtype if they
+                    hold missing values
+    :return: new downcast dataframe
+    """
+    columns = {}
+    for c in df.columns:
+        values = df[c]
+        if c in int_columns and values.notna().all():
+            columns[c] = pd.to_numeric(values.round(), downcast='integer')
+        else:
+            columns[c] = values.astype(float_dtype)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def memory_usage(df):
+    """
+    Fn to get the bytes held by a dataframe's values and index
+    """
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _ffill(array):
+    """
+    Forward fill nan values down the rows of a 2d array
+    """
+    mask = np.isnan(array)
+    idx = np.where(~mask, np.arange(len(array))[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return array[idx, np.arange(array.shape[1])]
@@ -0,0 +1,250 @@
+"""
+Columnar storage of stock dataframes, replacing whole object pickles.
+
+Each stock is stored in its own directory holding one raw binary file per
+column (and one for the date index) plus a small manifest.json of row count and
+column dtypes. Columns can be loaded selectively and memory mapped, new dates
+are appended to the end of each file, and the format doesn't depend on the
+stock_dataframe class layout.
+"""
+
+
+import os
+import json
+import pickle
+import numpy as np
+import pandas as pd
+from datetime import date
+
+
+from isiver_utils.data.data_acquisition import stock_dataframe
+
+
+manifest_name = 'manifest.json'
+index_name = '_index'
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, manifest_name)) as f:
+        return json.load(f)
+
+
+def write_manifest(directory, manifest):
+    manifest['updated'] = str(date.today())
+    path = os.path.join(directory, manifest_name)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(path + '.tmp', path)                                             # only replace manifest once data is written
+
+
+def column_path(directory, column):
+    return os.path.join(directory, f'{column}.bin')
+
+
+def save_df(df, directory, ticker='', start_date=None):
+    """
+    Fn to write a stock dataframe in columnar format, replacing any existing
+    data in directory
+
+    :param df: stock dataframe indexed by date
+    :param directory: directory to store columns in, created if missing
+    :param ticker: ticker stored in manifest
+    :param start_date: start date stored in manifest
+    """
+    os.makedirs(directory, exist_ok=True)
+    # Write to new files so existing memory maps of the old files stay valid
+    written = {index_name: df.index.values.astype('M8[ns]')}
+    columns = {}
+    for c in df.columns:
+        written[c] = np.ascontiguousarray(df[c].to_numpy())
+        columns[c] = written[c].dtype.str
+    for c, values in written.items():
+        values.tofile(column_path(directory, c) + '.tmp')
+    for c in written:
+        os.replace(column_path(directory, c) + '.tmp', column_path(directory, c))
+    write_manifest(directory, {'ticker': ticker,
+                               'start_date': None if start_date is None
+                                             else str(start_date),
+                               'rows': len(df), 'columns': columns})
+
+
+def save_columns(df, directory):
+    """
+    Fn to replace or add columns of stored data, keeping the other stored
+    columns
+
+    :param df: dataframe with the same dates as the stored data
+    :param directory: directory of stored stock
+    """
+    manifest = read_manifest(directory)
+    if not load_index(directory, manifest).equals(df.index):
+        raise ValueError('dates of df do not match stored dates')
+    for c in df.columns:
+        values = np.ascontiguousarray(df[c].to_numpy())
+        values.tofile(column_path(directory, c) + '.tmp')
+        manifest['columns'][c] = values.dtype.str
+    for c in df.columns:
+        os.replace(column_path(directory, c) + '.tmp', column_path(directory, c))
+    write_manifest(directory, manifest)
+
+
+def save_stock_class(stock_class, directory):
+    """
+    Fn to write a stock_dataframe in columnar format
+    """
+    save_df(stock_class.df, directory, stock_class.ticker,
+            stock_class.start_date)
+
+
+def append_df(df, directory):
+    """
+    Fn to append rows for dates after the last stored date, e.g. following
+    stock_dataframe.update_stock_df
+
+    :param df: stock dataframe with the same columns as the stored data, rows
+            up to the last stored date are ignored
+    :param directory: directory of stored stock
+    :return: number of rows appended
+    """
+    manifest = read_manifest(directory)
+    if set(df.columns) != set(manifest['columns']):
+        raise ValueError('columns of df do not match stored columns')
+    index = load_index(directory, manifest, mmap=True)
+    if len(index):
+        df = df[df.index > index[-1]]
+    if df.empty:
+        return 0
+    with open(column_path(directory, index_name), 'ab') as f:
+        df.index.values.astype('M8[ns]').tofile(f)
+    for c, dtype in manifest['columns'].items():
+        with open(column_path(directory, c), 'ab') as f:
+            df[c].to_numpy().astype(dtype).tofile(f)
+    manifest['rows'] += len(df)
+    write_manifest(directory, manifest)
+    return len(df)
+
+
+def load_index(directory, manifest=None, mmap=True):
+    if manifest is None:
+        manifest = read_manifest(directory)
+    return pd.DatetimeIndex(load_column(directory, index_name, '<M8[ns]',
+                                        manifest['rows'], mmap), name='Date')
+
+
+def load_column(directory, column, dtype, rows, mmap=True):
+    """
+    Fn to read one stored column, memory mapped read only if mmap
+    """
+    path = column_path(directory, column)
+    if rows == 0:
+        return np.empty(0, dtype=dtype)
+    if mmap:
+        return np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+    return np.fromfile(path, dtype=dtype, count=rows)
+
+
+def load_df(directory, columns=None, mmap=True):
+    """
+    Fn to load a stored stock dataframe
+
+    :param directory: directory of stored stock
+    :param columns: list of columns to load, None for all
+    :param mmap: bool, True to memory map columns so only the pages used are
+            read from disk
+    :return: dataframe indexed by date
+    """
+    manifest = read_manifest(directory)
+    if columns is None:
+        columns = list(manifest['columns'])
+    data = {c: load_column(directory, c, manifest['columns'][c],
+                           manifest['rows'], mmap) for c in columns}
+    return pd.DataFrame(data, index=load_index(directory, manifest, mmap),
+                        columns=columns, copy=False)
+
+
+class stored_stock_dataframe(stock_dataframe):
+    def __init__(self, directory, columns=None, mmap=True, **kwargs):
+        """
+        stock_dataframe backed by columnar storage, the dataframe is only read
+        from disk when df is first used
+
+        :param directory: directory of stored stock
+        :param columns: list of columns to load, None for all
+        :param mmap: bool, True to memory map columns
+        :param kwargs: passed to stock_dataframe e.g. provider
+        """
+        self.directory = directory
+        self.load_columns = columns
+        self.mmap = mmap
+        manifest = read_manifest(directory)
+        super().__init__(manifest['ticker'], manifest['start_date'], None,
+                         **kwargs)
+
+    @property
+    def df(self):
+        if self._df is None:
+            self._df = load_df(self.directory, self.load_columns, self.mmap)
+        return self._df
+
+    @df.setter
+    def df(self, df):
+        self._df = df
+
+    def save(self):
+        """
+        Fn to write the dataframe back to the store, appending if only new
+        dates have been added. If df lacks stored columns (e.g. it was loaded
+        with columns) only its columns are written, which needs the stored
+        dates to be unchanged
+        """
+        if self._df is None:
+            return
+        manifest = read_manifest(self.directory)
+        if set(manifest['columns']) - set(self._df.columns):
+            save_columns(self._df, self.directory)
+        elif set(self._df.columns) == set(manifest['columns']) and \
+                self.unchanged(manifest):
+            append_df(self._df, self.directory)
+        else:
+            save_df(self._df, self.directory, self.ticker, self.start_date)
+
+    def unchanged(self, manifest):
+        """
+        Fn to check the stored rows are the first rows of df, with the same
+        values in every column
+        """
+        rows = manifest['rows']
+        if len(self._df) < rows or not (self._df.index[:rows] ==
+                                        load_index(self.directory,
+                                                   manifest)).all():
+            return False
+        for c, dtype in manifest['columns'].items():
+            stored = load_column(self.directory, c, dtype, rows)
+            values = self._df[c].to_numpy()[:rows]
+            if not np.array_equal(stored, values,
+                                  equal_nan=stored.dtype.kind == 'f' and
+                                  values.dtype.kind == 'f'):
+                return False
+        return True
+
+
+def load_stock_class(directory, columns=None, mmap=True, **kwargs):
+    """
+    Fn to lazily load a stored stock as a stock_dataframe
+    """
+    return stored_stock_dataframe(directory, columns, mmap, **kwargs)
+
+
+def convert_pickle(pkl_path, directory):
+    """
+    Fn to convert a stock class pickled by pickle_data.pickle_stock_class to
+    columnar format
+
+    :param pkl_path: path of .pkl file
+    :param directory: directory to store columns in
+    """
+    with open(pkl_path, 'rb') as f:
+        stock_class = pickle.load(f)
+    save_df(stock_class.df, directory, stock_class.ticker,
+            getattr(stock_class, 'start_date', None))
+    return directory
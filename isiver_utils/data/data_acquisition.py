@@ -6,48 +6,210 @@ single stock analysis with.
 
 Limitations of yfinance API are that prices for some stock codes are lacking in
 places and intraday frequency is not possible for download periods of >60 days.
+With a frequency set, minute bars are accumulated over time (optionally in an
+intraday.intraday_store) and resampled to that frequency instead.
 """
 
 
-import yfinance as yf
-from pandas_datareader import data as pdr
-yf.pdr_override()
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta, date
-from isiver_utils.analysis import metrics
+from isiver_utils.analysis import metrics, indicator_plan, sweep
+from isiver_utils.data import cleaning, intraday
+from isiver_utils.data.providers import yahoo_provider
+from isiver_utils.data.instrumentation import instrumented
 
 
 class stock_dataframe():
-    def __init__(self, ticker, start_date, df):
+    # Defaults for attributes added since stock classes were first pickled
+    provider = None
+    price_cache = None
+    compact = False
+    memory_report = None
+    instrumentation = None
+    gap_fill = None
+    gap_context = None
+    metric_cache = None
+    frequency = None
+    bar_store = None
+    bars = None
+
+    def __init__(self, ticker, start_date, df, price_cache=None,
+                 provider=None, compact=False, instrumentation=None,
+                 gap_fill=None, metric_cache=None, frequency=None,
+                 bar_store=None):
         """
         This class represents a dataframe that can gather data from the
-        yfinance API, clean, and perform single stock calcs.
+        yfinance API (or another provider), clean, and perform single stock
+        calcs.
 
         :param ticker: the code used to represent the stock entered in from
                         suitable for SQL and adjusted here for yfinance
         :param start_date: date from which the market data should be gathered
                         can be None and will download past 5 years
         :param df: can input existing dataframe to update
+        :param price_cache: optional caching.price_cache to read prices from
+                        before downloading
+        :param provider: providers.data_provider to download prices with,
+                        defaults to the yfinance API
+        :param compact: bool, True to downcast the dataframe to float32 and
+                        integer volume after preprocessing
+        :param instrumentation: optional instrumentation.instrumentation to
+                        record the time, rows and memory of each stage
+        :param gap_fill: dict of cleaning.fill_gaps options used when cleaning,
+                        e.g. {'method': 'ffill', 'holidays': 'LSE',
+                        'max_gap': 5}. Defaults to linear interpolation
+        :param metric_cache: optional metric_cache.metric_cache, shared between
+                        stock classes, to reuse results of identical metric
+                        calculations
+        :param frequency: None for daily prices, or a fixed frequency e.g.
+                        '5min', '15min', '1h', 'D' to build the dataframe from
+                        minute bars resampled to that frequency
+        :param bar_store: optional intraday.intraday_store to accumulate minute
+                        bars in between sessions, otherwise they are held in
+                        memory in bars
         """
         self.ticker = ticker.replace("_", ".")
         self.ticker = ''.join([i for i in self.ticker if not i.isdigit()])
         self.start_date = start_date
         self.df = df
+        self.price_cache = price_cache
+        self.provider = provider
+        self.compact = compact
+        self.memory_report = None
+        self.instrumentation = instrumentation
+        self.gap_fill = dict(gap_fill or {})
+        self.metric_cache = metric_cache
+        self.frequency = frequency
+        self.bar_store = bar_store
+        self.bars = None
 
+    @instrumented
     def download_data(self):
+        """
+        Fn to get prices from start_date until today, via the price cache if
+        one has been given. With a frequency set, minute bars after the last
+        bar held are downloaded and df is every bar since start_date
+        """
+        if self.frequency is not None:
+            if not self.start_date:
+                self.start_date = datetime.today() - timedelta(days=30)
+            self.add_bars(self.fetch_bars(self.bars_start(), datetime.today()))
+            self.df = self.get_bars(self.start_date)
+            return self.df
         if not self.start_date:
             self.start_date = datetime.today() - timedelta(days=1825)
-        self.df = pdr.get_data_yahoo(self.ticker, self.start_date,
-                                                            datetime.today())
-        self.df.columns = ['Open', 'High', 'Low', 'Close', 'AdjClose', 'Volume']
+        self.df = self.get_prices(self.start_date, datetime.today())
         return self.df
 
-    def clean_data(self):
+    def get_prices(self, start, end):
+        """
+        Fn to get prices between start and end, via the price cache if one has
+        been given
+        """
+        if self.price_cache is not None:
+            return self.price_cache.get(self.ticker, start, end,
+                                        self.fetch_data)
+        return self.fetch_data(start, end)
+
+    def get_provider(self):
+        """
+        Fn to get the data provider, the yfinance API if none has been given
+        """
+        if self.provider is None:
+            self.provider = yahoo_provider()
+        return self.provider
+
+    def fetch_data(self, start, end):
+        """
+        Fn to download prices between start and end from the data provider
+        """
+        return self.get_provider().get_history(self.ticker, start, end)
+
+    def fetch_bars(self, start, end):
+        """
+        Fn to download minute bars between start and end from the data provider
+        """
+        return self.get_provider().get_intraday(self.ticker, start, end)
+
+    def add_bars(self, bars):
+        """
+        Fn to accumulate minute bars after the last bar held, in bar_store if
+        one has been given, otherwise in memory
+
+        :param bars: dataframe of OHLCV minute bars
+        :return: number of bars added
+        """
+        bars = bars[~bars.index.duplicated(keep='last')].sort_index()
+        if self.bar_store is not None:
+            return self.bar_store.append(bars)
+        if self.bars is not None and len(self.bars):
+            bars = bars[bars.index > self.bars.index[-1]]
+            bars = pd.concat([self.bars, bars])
+        added = len(bars) - (0 if self.bars is None else len(self.bars))
+        self.bars = bars
+        return added
+
+    def get_bars(self, start=None):
+        """
+        Fn to get the minute bars held from start onwards, as float prices
+        """
+        if self.bar_store is not None:
+            bars = self.bar_store.load(start)
+        elif self.bars is not None:
+            bars = self.bars if start is None else \
+                self.bars[self.bars.index >= pd.Timestamp(start)]
+        else:
+            return pd.DataFrame(columns=yahoo_provider.columns,
+                                index=pd.DatetimeIndex([], name='Date'))
+        return bars.astype(float)
+
+    def last_bar(self):
+        """
+        Fn to get the time of the last minute bar held, None if none
+        """
+        if self.bar_store is not None:
+            return self.bar_store.last()
+        if self.bars is None or self.bars.empty:
+            return None
+        return self.bars.index[-1]
+
+    def bars_start(self):
+        last = self.last_bar()
+        if last is None or last < pd.Timestamp(self.start_date):
+            return self.start_date
+        return last + timedelta(minutes=1)
+
+    @instrumented
+    def clean_data(self, vectorised=True):
         """
         This fn used to clean downloaded data from yfinance
         - converts all prices to pence
         - inserts missing dates and resamples to business days
-        - interpolates missing values
+        - interpolates missing values, configured with gap_fill
+        - or with a frequency set, resamples minute bars to that frequency
+          without inserting bars where there were no trades
+
+        :param vectorised: bool, False to convert to pence with the original
+                        row by row loop
+        """
+        if vectorised:
+            self.df = cleaning.rescale_units(self.df)
+        elif not self.rescale_units_loop():
+            return False
+        if self.frequency is not None:
+            self.df = intraday.resample_ohlcv(self.df, self.frequency)
+            return self.df
+        self.gap_context = cleaning.gap_context(self.df)
+        self.df = cleaning.fill_gaps(self.df, **(self.gap_fill or {}))
+        return self.df
+
+    def rescale_units_loop(self):
+        """
+        Row by row conversion of all prices to pence, reference implementation
+        for cleaning.rescale_units
+
+        :return: True or False depending on whether operation was successful
         """
         for i in range(len(self.df) - 1):
             for j in range(len(self.df.columns) - 1):
@@ -56,10 +218,7 @@ class stock_dataframe():
                 elif (self.df.iloc[i+1][j] / self.df.iloc[i][j] > 10):
                     if not self.update_previous(i, j):
                         return False
-        self.df = self.df.asfreq('D')
-        self.df = self.df[self.df.index.dayofweek < 5]
-        self.df = self.df.interpolate(method='spline', order=1)
-        return self.df
+        return True
 
     def update_previous(self, i, j):
         """
@@ -77,34 +236,57 @@ class stock_dataframe():
         else:
             return True
 
-    def returns(self):
+    @instrumented
+    def returns(self, tail=None):
         """
         Creates a cumulative returns column and appends to stock dataframe
+
+        :param tail: number of new rows at the end of the dataframe to
+                    calculate returns for, None to calculate for all rows
         """
+        if tail and 'Returns' in self.df:
+            prev = self.df.iloc[-tail - 1]
+            self.df.loc[self.df.index[-tail:], 'Returns'] = prev['Returns'] * \
+                        self.df['AdjClose'].iloc[-tail:] / prev['AdjClose']
+            return self.df
         self.check_columns('Returns')
         self.df['Returns'] = ((self.df['AdjClose'].pct_change() + 1).cumprod())
         self.df.iat[0, len(self.df.columns) - 1] = 1
         return self.df
 
-    def get_default_metrics(self):
+    @instrumented
+    def get_default_metrics(self, tail=None, fused=True):
         """
         Function to apply all above metrics to supplied stock dataframe
+
+        :param tail: number of new rows at the end of the dataframe to
+                    calculate metrics for, None to calculate for all rows
+        :param fused: bool, False to add each metric column separately rather
+                    than in a single pass sharing intermediates
         """
+        if fused:
+            self.df = indicator_plan.default_plan().apply(
+                self.df, tail=tail, cache=self.metric_cache)
+            return self.df
         self.add_metric_column(metrics.moving_average, ['Returns', 'Close'],
-                                (30,50), 'MA')
-        self.add_metric_column(metrics.moving_average, ['Close'], (30,50), 'EMA')
-        self.add_metric_column(metrics.exp_moving_average, ['Close'], (30,50), 'EMA')
-        self.add_metric_column(metrics.std, ['Close'], (12,26), 'std')
-        self.add_metric_column(metrics.rsi, ['Close'], (14,), 'RSI')
-        self.add_metric_column(metrics.macd, ['Close'], ((12, 26),), 'MACD')
+                                (30,50), 'MA', tail=tail)
+        self.add_metric_column(metrics.moving_average, ['Close'], (30,50), 'EMA',
+                               tail=tail)
+        self.add_metric_column(metrics.exp_moving_average, ['Close'], (30,50), 'EMA',
+                               tail=tail)
+        self.add_metric_column(metrics.std, ['Close'], (12,26), 'std', tail=tail)
+        self.add_metric_column(metrics.rsi, ['Close'], (14,), 'RSI', tail=tail)
+        self.add_metric_column(metrics.macd, ['Close'], ((12, 26),), 'MACD',
+                               tail=tail)
         self.add_metric_column(metrics.bollinger, ['Close'], (20,), 'Boll_Upper',
-                               bound='Upper')
+                               tail=tail, bound='Upper')
         self.add_metric_column(metrics.bollinger, ['Close'], (20,), 'Boll_Lower',
-                               bound='Lower')
+                               tail=tail, bound='Lower')
         return self.df
 
+    @instrumented
     def add_metric_column(self, metric, columns, windows, metric_col_name,
-                                                            **kwargs):
+                                                    tail=None, **kwargs):
         """
         Generalised function to add columns to the dataframe based on a
         specified function
@@ -114,12 +296,43 @@ class stock_dataframe():
         :param windows: tuple of windows to calculate metric over
         :param metric_col_name: abreviation to be added to col name in df
                         e.g. 'MA''
+        :param tail: number of new rows at the end of the dataframe to
+                    calculate, only the trailing rows the metric depends on
+                    are used. None to calculate the whole column
         """
         for c in columns:
             for w in windows:
-                self.check_columns(f'{c}_{metric_col_name}_{w}')
-                self.df[f'{c}_{metric_col_name}_{w}'] = metric(self.df[c], w,
-                                                                    **kwargs)
+                col = f'{c}_{metric_col_name}_{w}'
+                lookback = metrics.lookback(metric, w)
+                if tail and lookback and col in self.df:
+                    start = max(len(self.df) - tail - lookback + 1, 0)
+                    values = metric(self.df[c].iloc[start:], w, **kwargs)
+                    self.df.loc[self.df.index[-tail:], col] = values.iloc[-tail:]
+                    continue
+                self.check_columns(col)
+                if self.metric_cache is not None:
+                    self.df[col] = self.metric_cache.call(metric, self.df[c], w,
+                                                          **kwargs)
+                else:
+                    self.df[col] = metric(self.df[c], w, **kwargs)
+        return self.df
+
+    @instrumented
+    def add_sweep_columns(self, metric, columns, windows, metric_col_name,
+                          **kwargs):
+        """
+        Fn to add a metric column for every window at once, e.g. to tune
+        windows over range(5, 201). Same arguments and column names as
+        add_metric_column, but moving average, std, rsi and bollinger columns
+        share one set of prefix sums per column (see sweep.py)
+        """
+        frames = []
+        for c in columns:
+            frame = sweep.sweep(metric, self.df[c], windows, **kwargs)
+            frame.columns = [f'{c}_{metric_col_name}_{w}' for w in frame.columns]
+            frames.append(frame)
+        self.check_columns(*[label for frame in frames for label in frame])
+        self.df = pd.concat([self.df] + frames, axis=1)
         return self.df
 
     def check_columns(self, *columns):
@@ -132,6 +345,7 @@ class stock_dataframe():
                 del self.df[column]
         return self.df
 
+    @instrumented
     def pre_process(self, clean):
         """
         Function to preprocess a dataframe by cleaning and calculating default
@@ -143,8 +357,23 @@ class stock_dataframe():
             self.clean_data()
         self.returns()
         self.get_default_metrics()
+        if self.compact:
+            self.compact_dtypes()
         return self.df
 
+    def compact_dtypes(self):
+        """
+        Fn to downcast prices and metrics to float32 and volume to an integer
+        type, see cleaning.compact_dtypes
+
+        :return: dict of dataframe bytes 'before' and 'after' downcasting
+        """
+        before = cleaning.memory_usage(self.df)
+        self.df = cleaning.compact_dtypes(self.df)
+        self.memory_report = {'before': before,
+                              'after': cleaning.memory_usage(self.df)}
+        return self.memory_report
+
     def new_stock_df(self):
         """
         Function to grab a new stock dataframe with default metrics
@@ -152,12 +381,116 @@ class stock_dataframe():
         self.download_data()
         return self.pre_process(True)
 
+    @instrumented
     def update_stock_df(self):
         """
-        Updates a current stock dataframe to up-to-date prices and recalcs
-        default metrics
+        Updates a current stock dataframe to up-to-date prices, only
+        downloading, cleaning and recalculating default metrics for dates after
+        the last row
         """
-        old_df = self.df.copy()
-        self.download_data()
-        self.df = pd.concat([old_df, self.df])
-        return self.pre_process(True)
+        if self.df.empty:
+            return self.new_stock_df()
+        if self.frequency is not None:
+            return self.update_bars()
+        last_date = self.df.index[-1]
+        new_df = self.get_prices(last_date + timedelta(days=1), datetime.today())
+        new_df = new_df[new_df.index > last_date]
+        new_df = new_df[~new_df.index.duplicated(keep='last')]
+        if new_df.empty:
+            return self.df
+
+        # Clean new rows with the raw rows back to the start of any gap at the
+        # end of df as context, so gaps are filled as a full clean fills them
+        columns = list(new_df.columns)
+        gap_fill = self.gap_fill or {}
+        if gap_fill.get('method') == 'spline':
+            # The spline is fitted to every raw row, download and clean all
+            # rows again
+            return self.new_stock_df()
+        context = self.tail_context(columns)
+        tail_df = cleaning.rescale_units(pd.concat([context, new_df]))
+        if not np.array_equal(tail_df.iloc[:len(context)].to_numpy(dtype=float),
+                              context.to_numpy(dtype=float), equal_nan=True):
+            # Unit change reaching back into history, clean all rows again
+            self.df = pd.concat([self.df[columns].astype(float), new_df])
+            return self.pre_process(True)
+        self.gap_context = cleaning.gap_context(tail_df)
+        tail_df = cleaning.fill_gaps(tail_df, **gap_fill)
+        tail_df = tail_df[tail_df.index > context.index[0]]
+        replace = len(self.df) - self.df.index.searchsorted(context.index[0],
+                                                            side='right')
+        return self.add_tail(tail_df, replace)
+
+    def tail_context(self, columns):
+        """
+        Fn to get the raw rows from the last known value of each column to the
+        end of df, kept by clean_data. Falls back to the last row of df when
+        they weren't kept or df has changed since
+
+        :param columns: columns of the new rows
+        """
+        context = self.gap_context
+        if context is not None and not context.empty and \
+                set(columns) <= set(context.columns):
+            context = context[columns]
+            current = self.df[columns].reindex(context.index).to_numpy(float)
+            known = context.notna().to_numpy()
+            if context.index[-1] == self.df.index[-1] and np.allclose(
+                    current[known], context.to_numpy(float)[known], rtol=1e-6):
+                return context
+        return self.df[columns].iloc[[-1]]
+
+    def add_tail(self, tail_df, replace=0):
+        """
+        Fn to add cleaned rows to the end of df and calculate returns and
+        default metrics for only those rows. If compact, only the trailing rows
+        the new metrics depend on are upcast, and only they are downcast again
+
+        :param tail_df: cleaned OHLCV rows to add
+        :param replace: number of rows at the end of df tail_df replaces
+        """
+        keep = len(self.df) - replace
+        head = None
+        if self.compact:
+            lookback = indicator_plan.default_plan().lookback()
+            split = max(keep - lookback - 1, 0) if lookback else 0              # one more row for returns
+            head = self.df.iloc[:split]
+            self.df = pd.concat([self.df.iloc[split:keep].astype(float),
+                                 tail_df])
+        else:
+            self.df = pd.concat([self.df.iloc[:keep], tail_df])
+        self.returns(tail=len(tail_df))
+        self.get_default_metrics(tail=len(tail_df))
+        if head is not None:
+            work = cleaning.compact_dtypes(self.df)
+            work = work.astype({c: head[c].dtype for c in work if c in head and
+                                np.can_cast(work[c].dtype, head[c].dtype)})
+            self.df = pd.concat([head, work])
+        return self.df
+
+    def update_bars(self):
+        """
+        Updates a dataframe built from minute bars, downloading bars after the
+        last bar held and recalculating only the last (possibly incomplete)
+        resampled bar and those after it
+        """
+        if not self.add_bars(self.fetch_bars(self.bars_start(),
+                                             datetime.today())):
+            return self.df
+        if len(self.df) < 2:
+            self.df = self.get_bars(self.start_date)
+            return self.pre_process(True)
+
+        # Clean bars from the start of the last row with the row before it as
+        # context
+        bars = self.get_bars(self.df.index[-1])
+        columns = list(bars.columns)
+        tail_df = cleaning.rescale_units(pd.concat([self.df[columns].iloc[[-2]],
+                                                    bars]))
+        if not np.array_equal(tail_df.iloc[0].to_numpy(dtype=float),
+                              self.df[columns].iloc[-2].to_numpy(dtype=float),
+                              equal_nan=True):
+            self.df = self.get_bars(self.start_date)
+            return self.pre_process(True)
+        tail_df = intraday.resample_ohlcv(tail_df.iloc[1:], self.frequency)
+        return self.add_tail(tail_df, replace=1)
@@ -0,0 +1,152 @@
+"""
+Optional per stage timing of stock_dataframe processing.
+
+Give a stock_dataframe an instrumentation object and each instrumented stage
+(download, cleaning, returns, metrics, plotting) records its wall time, the
+rows of the dataframe afterwards and the change in memory. Records are kept in
+a list and passed to an optional callback, e.g. to export them to a log or
+metrics server. Without an instrumentation object a stage only costs one
+attribute lookup.
+
+import_profile times importing a module in a fresh interpreter and lists the
+heavy dependencies the import loads.
+"""
+
+
+import sys
+import json
+import time
+import subprocess
+import tracemalloc
+import functools
+from contextlib import contextmanager
+import pandas as pd
+
+
+heavy_modules = ('yfinance', 'pandas_datareader', 'matplotlib',
+                 'matplotlib.pyplot', 'scipy')
+
+
+class instrumentation():
+    def __init__(self, callback=None, trace_memory=False):
+        """
+        This class collects timing records for stock_dataframe stages
+
+        :param callback: fn called with each record dict as stages finish
+        :param trace_memory: bool, True to measure memory allocated by Python
+                    during each stage with tracemalloc (slower). Otherwise the
+                    memory delta is the change in dataframe size
+        """
+        self.callback = callback
+        self.trace_memory = trace_memory
+        self.records = []
+        self.depth = 0
+
+    def record(self, stage, ticker, seconds, rows, memory_delta):
+        """
+        Fn to store a record and pass it to the callback
+        """
+        record = {'stage': stage, 'ticker': ticker, 'seconds': seconds,
+                  'rows': rows, 'memory_delta': memory_delta,
+                  'depth': self.depth}
+        self.records.append(record)
+        if self.callback is not None:
+            self.callback(record)
+        return record
+
+    def to_dataframe(self):
+        """
+        Fn to get all records as a dataframe, one row per stage run
+        """
+        return pd.DataFrame(self.records, columns=['stage', 'ticker', 'seconds',
+                                                   'rows', 'memory_delta',
+                                                   'depth'])
+
+    def summary(self):
+        """
+        Fn to get number of runs, total and mean seconds and total rows per
+        stage
+        """
+        return self.to_dataframe().groupby('stage', sort=False).agg(
+            runs=('seconds', 'size'), seconds=('seconds', 'sum'),
+            mean_seconds=('seconds', 'mean'), rows=('rows', 'sum'))
+
+    def clear(self):
+        self.records = []
+
+
+def df_bytes(df):
+    return 0 if df is None else int(df.memory_usage(index=True).sum())
+
+
+@contextmanager
+def stage(instr, name, ticker='', get_df=None):
+    """
+    Context manager recording one stage if instr is not None
+
+    :param instr: instrumentation object or None
+    :param name: stage name
+    :param ticker: ticker of stock being processed
+    :param get_df: fn returning the dataframe to count rows and size of
+    """
+    if instr is None:
+        yield
+        return
+    started = instr.trace_memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    if instr.trace_memory:
+        memory = tracemalloc.get_traced_memory()[0]
+    else:
+        memory = df_bytes(get_df()) if get_df else 0
+    instr.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        instr.depth -= 1
+        df = get_df() if get_df else None
+        if instr.trace_memory:
+            memory_delta = tracemalloc.get_traced_memory()[0] - memory
+            if started:
+                tracemalloc.stop()                                              # tracing slows all allocations, only trace inside stages
+        else:
+            memory_delta = df_bytes(df) - memory
+        instr.record(name, ticker, seconds, 0 if df is None else len(df),
+                     memory_delta)
+
+
+def instrumented(fn):
+    """
+    Decorator recording a stock_dataframe method as a stage when the instance
+    has an instrumentation object
+    """
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        instr = getattr(self, 'instrumentation', None)
+        if instr is None:
+            return fn(self, *args, **kwargs)
+        with stage(instr, fn.__name__, self.ticker,
+                   lambda: getattr(self, 'df', None)):
+            return fn(self, *args, **kwargs)
+    return wrapper
+
+
+def import_profile(module):
+    """
+    Fn to import a module in a new interpreter
+
+    :param module: dotted module name
+    :return: (seconds to import, list of heavy modules loaded by the import)
+    """
+    code = ('import sys, time, json\n'
+            't = time.perf_counter()\n'
+            f'import {module}\n'
+            't = time.perf_counter() - t\n'
+            f'print(json.dumps([t, [m for m in {heavy_modules!r} '
+            'if m in sys.modules]]))')
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                         text=True, check=True).stdout
+    seconds, loaded = json.loads(out.splitlines()[-1])
+    return seconds, loaded
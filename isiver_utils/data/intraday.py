@@ -0,0 +1,167 @@
+"""
+Intraday bars: resampling minute bars to coarser OHLCV bars and accumulating
+them over time.
+
+Providers only serve a few weeks of minute bars (30 days for yfinance), so
+intraday_store appends each download to a columnar store (see columnar_store)
+to build up a longer history. resample_ohlcv aggregates bars into 5min, 15min,
+1h, daily etc. bars in one pass over the sorted bars, only creating bars that
+contain trades rather than a dense grid covering nights and weekends.
+"""
+
+
+import os
+import numpy as np
+import pandas as pd
+
+
+aggregations = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last',
+                'AdjClose': 'last', 'Volume': 'sum'}
+
+
+def bin_starts(index, rule):
+    """
+    Fn to get the position of the first bar in each bin of sorted bars
+
+    :param index: sorted datetime index of bars
+    :param rule: fixed frequency e.g. '15min', '1h', 'D'
+    :return: (bin labels, int array of first positions)
+    """
+    bins = index.floor(rule)
+    keys = bins.asi8
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+    return bins[starts], starts
+
+
+def resample_ohlcv(df, rule):
+    """
+    Fn to aggregate OHLCV bars into longer bars, open of the first bar, high
+    max, low min, close of the last bar and volume sum. Matches
+    df.resample(rule).agg(aggregations) with empty bins dropped
+
+    :param df: dataframe of bars sorted by time, other columns take the last
+            value in each bin
+    :param rule: fixed frequency e.g. '5min', '15min', '1h', 'D'
+    :return: dataframe of bars labelled by bin start, only bins containing bars
+    """
+    df = df.dropna(how='all')
+    if df.empty:
+        return df.copy()
+    if not df.index.is_monotonic_increasing:
+        raise ValueError('bars must be sorted by time')
+    labels, starts = bin_starts(df.index, rule)
+    ends = np.append(starts[1:], len(df)) - 1
+    out = {}
+    for c in df.columns:
+        values = df[c].to_numpy()
+        how = aggregations.get(c, 'last')
+        if how in ('first', 'last'):
+            out[c] = _first_last(values, starts, ends, how)
+        elif how == 'max':
+            out[c] = np.fmax.reduceat(values, starts)                           # fmax/fmin skip nan like pandas
+        elif how == 'min':
+            out[c] = np.fmin.reduceat(values, starts)
+        else:
+            if values.dtype.kind == 'f':
+                values = np.nan_to_num(values)
+            out[c] = np.add.reduceat(values, starts)
+    return pd.DataFrame(out, index=pd.DatetimeIndex(labels,
+                                                    name=df.index.name),
+                        columns=df.columns)
+
+
+def _first_last(values, starts, ends, how):
+    """
+    Fn to get the first or last non nan value in each bin, nan for bins with
+    none, like pandas first/last
+    """
+    if values.dtype.kind != 'f':
+        return values[starts if how == 'first' else ends]
+    valid = np.flatnonzero(~np.isnan(values))
+    if how == 'first':
+        i = np.searchsorted(valid, starts)
+        position = valid[np.minimum(i, len(valid) - 1)] if len(valid) else ends
+        found = (i < len(valid)) & (position <= ends)
+    else:
+        i = np.searchsorted(valid, ends, side='right') - 1
+        position = valid[np.maximum(i, 0)] if len(valid) else starts
+        found = (i >= 0) & (position >= starts)
+    return np.where(found, values[position], np.nan)
+
+
+class intraday_store():
+    def __init__(self, directory, ticker=''):
+        """
+        This class represents an append only columnar store of minute bars for
+        one stock, prices as float32 and volume as int64
+
+        :param directory: directory to store bars in, created on first append
+        :param ticker: ticker stored in the manifest
+        """
+        self.directory = directory
+        self.ticker = ticker
+
+    def exists(self):
+        from isiver_utils.data import columnar_store                           # columnar_store imports stock_dataframe
+        return os.path.exists(os.path.join(self.directory,
+                                           columnar_store.manifest_name))
+
+    def compact(self, bars):
+        bars = bars[~bars.index.duplicated(keep='last')].sort_index()
+        out = pd.DataFrame(index=pd.DatetimeIndex(bars.index, name='Date'))
+        for c in bars.columns:
+            if c == 'Volume':
+                out[c] = bars[c].fillna(0).to_numpy().astype(np.int64)
+            else:
+                out[c] = bars[c].to_numpy().astype(np.float32)
+        return out
+
+    def append(self, bars):
+        """
+        Fn to add bars after the last stored bar, earlier bars are ignored
+
+        :param bars: dataframe of OHLCV bars
+        :return: number of bars added
+        """
+        from isiver_utils.data import columnar_store
+        if bars.empty:
+            return 0
+        bars = self.compact(bars)
+        if not self.exists():
+            columnar_store.save_df(bars, self.directory, self.ticker)
+            return len(bars)
+        return columnar_store.append_df(bars, self.directory)
+
+    def last(self):
+        """
+        Fn to get the time of the last stored bar, None if empty
+        """
+        from isiver_utils.data import columnar_store
+        if not self.exists():
+            return None
+        index = columnar_store.load_index(self.directory)
+        return index[-1] if len(index) else None
+
+    def load(self, start=None, end=None, columns=None):
+        """
+        Fn to load stored bars between start and end (inclusive), only the
+        rows in range are read from the memory mapped columns
+
+        :param columns: list of columns to load, None for all
+        :return: dataframe of bars
+        """
+        from isiver_utils.data import columnar_store
+        if not self.exists():
+            return pd.DataFrame(columns=columns,
+                                index=pd.DatetimeIndex([], name='Date'))
+        df = columnar_store.load_df(self.directory, columns)
+        i = 0 if start is None else df.index.searchsorted(pd.Timestamp(start))
+        j = len(df) if end is None else \
+            df.index.searchsorted(pd.Timestamp(end), side='right')
+        return df.iloc[i:j].copy()
+
+    def resample(self, rule, start=None, end=None):
+        """
+        Fn to load stored bars and aggregate them, see resample_ohlcv
+        """
+        return resample_ohlcv(self.load(start, end), rule)
@@ -0,0 +1,153 @@
+"""
+On disk panel of many stocks, memory mapped so it is never loaded whole.
+
+A panel directory holds one array of dates x tickers x fields (e.g. 'Close',
+'RSI_14') and a manifest of the dates, tickers and fields. The array is stored
+field major, so the dates x tickers panel of one field is a contiguous block
+that metrics functions can be applied to directly. Opening a panel_store only
+maps the file, and pickling one (e.g. to send to worker processes) sends the
+path rather than the data, so every process reads the same pages read only.
+"""
+
+
+import os
+import numpy as np
+import pandas as pd
+
+
+from isiver_utils.data.columnar_store import read_manifest, write_manifest, \
+    column_path, index_name
+
+
+array_name = 'panel'
+
+
+def save_panel(stock_classes, directory, fields=None, dtype=np.float64):
+    """
+    Fn to write the dataframes of many stock classes to one panel
+
+    :param stock_classes: dict of ticker: stock_dataframe
+    :param directory: directory to store panel in, created if missing
+    :param fields: list of columns to store, defaults to the columns of the
+                first stock dataframe
+    :param dtype: dtype of stored values
+    :return: panel_store of the saved panel
+    """
+    dfs = {ticker: stock_class.df for ticker, stock_class in
+           stock_classes.items()}
+    if fields is None:
+        fields = list(next(iter(dfs.values())).columns) if dfs else []
+    dates = pd.DatetimeIndex([])
+    for df in dfs.values():
+        dates = dates.union(df.index)
+
+    os.makedirs(directory, exist_ok=True)
+    shape = (len(fields), len(dates), len(dfs))
+    tmp_path = column_path(directory, array_name) + '.tmp'
+    if 0 in shape:
+        open(tmp_path, 'wb').close()
+    else:
+        out = np.memmap(tmp_path, dtype=dtype, mode='w+', shape=shape)
+        for j, df in enumerate(dfs.values()):
+            values = df.reindex(index=dates, columns=fields).to_numpy(dtype=dtype)
+            out[:, :, j] = values.T
+        out.flush()
+        del out
+    os.replace(tmp_path, column_path(directory, array_name))
+    dates.values.astype('M8[ns]').tofile(column_path(directory, index_name))
+    write_manifest(directory, {'rows': len(dates), 'tickers': list(dfs),
+                               'fields': list(fields),
+                               'dtype': np.dtype(dtype).str})
+    return panel_store(directory)
+
+
+class panel_store():
+    def __init__(self, directory):
+        """
+        This class represents a memory mapped panel of dates x tickers x fields
+
+        :param directory: directory of panel written by save_panel
+        """
+        self.directory = directory
+        manifest = read_manifest(directory)
+        self.tickers = manifest['tickers']
+        self.fields = manifest['fields']
+        self.ticker_index = {t: i for i, t in enumerate(self.tickers)}
+        self.field_index = {f: i for i, f in enumerate(self.fields)}
+        self.dtype = np.dtype(manifest['dtype'])
+        self.dates = pd.DatetimeIndex(
+            np.fromfile(column_path(directory, index_name), dtype='<M8[ns]',
+                        count=manifest['rows']), name='Date')
+        shape = (len(self.fields), len(self.dates), len(self.tickers))
+        if 0 in shape:
+            self.data = np.empty(shape, dtype=self.dtype)
+        else:
+            self.data = np.memmap(column_path(directory, array_name),
+                                  dtype=self.dtype, mode='r', shape=shape)
+
+    def __getstate__(self):
+        return {'directory': self.directory}                                    # workers reopen the map rather than copy it
+
+    def __setstate__(self, state):
+        self.__init__(state['directory'])
+
+    @property
+    def array(self):
+        """
+        Read only view of the whole panel with shape dates x tickers x fields
+        """
+        return np.moveaxis(self.data, 0, -1)
+
+    def positions(self, tickers=None, dates=None):
+        """
+        Fn to get ticker positions and a date slice for selecting from the panel
+        """
+        if tickers is None:
+            tickers = slice(None)
+        else:
+            tickers = [self.ticker_index[t] for t in tickers]
+        if dates is None:
+            dates = slice(None)
+        else:
+            dates = self.dates.slice_indexer(*dates)
+        return tickers, dates
+
+    def field(self, field, tickers=None, dates=None):
+        """
+        Fn to get a dates x tickers dataframe of one field, without copying
+        when all tickers are used
+
+        :param field: field name e.g. 'Close'
+        :param tickers: list of tickers, None for all
+        :param dates: (start, end) tuple of dates, None for all
+        :return: dataframe with a column per ticker
+        """
+        ticker_pos, date_pos = self.positions(tickers, dates)
+        values = self.data[self.field_index[field], date_pos]
+        if tickers is not None:
+            values = values[:, ticker_pos]
+        return pd.DataFrame(values, index=self.dates[date_pos],
+                            columns=tickers if tickers is not None
+                                    else self.tickers, copy=False)
+
+    def ticker(self, ticker, fields=None, dates=None):
+        """
+        Fn to get a dates x fields dataframe for one ticker, like the
+        stock_dataframe.df it was saved from
+
+        :param ticker: ticker of stock
+        :param fields: list of fields, None for all
+        :param dates: (start, end) tuple of dates, None for all
+        """
+        fields = self.fields if fields is None else fields
+        _, date_pos = self.positions(None, dates)
+        j = self.ticker_index[ticker]
+        values = self.data[[self.field_index[f] for f in fields], date_pos, j]
+        return pd.DataFrame(values.T, index=self.dates[date_pos],
+                            columns=fields)
+
+    def nbytes(self):
+        """
+        Fn to get the size of the panel on disk in bytes
+        """
+        return self.data.nbytes
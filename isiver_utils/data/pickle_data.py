@@ -3,12 +3,16 @@
 
 Contains functions to download (via data_acquisition) and pickle stock classes,
 for ease of access.
+
+store_stock_class writes the columnar format of columnar_store instead, which
+can be loaded a column at a time and appended to.
 """
 
 
 import pickle
 import pandas as pd
 from isiver_utils.data import stock_dataframe
+from isiver_utils.data import columnar_store
 from datetime import date, timedelta
 
 
@@ -23,3 +27,16 @@ def pickle_stock_class(ticker, history_days, outdir):
     stock_class.new_stock_df()
     stock_class.pre_process(True)
     pickle.dump(stock_class, open(out_loc, 'wb'))
+
+
+def store_stock_class(ticker, history_days, outdir):
+    """
+    Function to download and preprocess a stock via data_acquisition, and store
+    in columnar format in a directory named after the ticker.
+    """
+    out_loc = f'{outdir}/{ticker}'
+    start_date = str(date.today() - timedelta(days=history_days))
+    stock_class = stock_dataframe(ticker, start_date, pd.DataFrame())
+    stock_class.new_stock_df()
+    columnar_store.save_stock_class(stock_class, out_loc)
+    return out_loc
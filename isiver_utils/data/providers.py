@@ -0,0 +1,221 @@
+"""
+Data providers used by stock_dataframe to download price histories.
+
+Every provider returns a dataframe indexed by date with the columns in
+data_provider.columns. yahoo_provider wraps the yfinance API, while
+synthetic_provider and csv_provider allow the cleaning, metrics and plotting
+pipeline to be run and benchmarked with no network access.
+"""
+
+
+import os
+import zlib
+import numpy as np
+import pandas as pd
+
+
+class data_provider():
+    """
+    Base class for price data providers
+    """
+    columns = ['Open', 'High', 'Low', 'Close', 'AdjClose', 'Volume']
+
+    def get_history(self, ticker, start, end):
+        """
+        Fn to get daily prices for ticker between start and end
+
+        :param ticker: yfinance style ticker e.g. 'SMT.L'
+        :param start: start date
+        :param end: end date
+        :return: dataframe of daily OHLCV prices indexed by date
+        """
+        raise NotImplementedError
+
+    def get_intraday(self, ticker, start, end, interval='1m'):
+        """
+        Fn to get intraday bars for ticker between start and end
+
+        :param interval: bar length e.g. '1m'
+        :return: dataframe of OHLCV bars indexed by (exchange local) bar start
+        """
+        raise NotImplementedError(f'{type(self).__name__} has no intraday data')
+
+
+class yahoo_provider(data_provider):
+    """
+    Provider downloading prices from the yfinance API via pandas_datareader,
+    which are only imported on first download.
+
+    yfinance only serves 1 minute bars for the last 30 days, 7 days per
+    request, so intraday ranges are split into requests of
+    intraday_request_days and history has to be accumulated over time (see
+    intraday.intraday_store).
+    """
+    pdr = None
+    intraday_request_days = 7
+
+    @staticmethod
+    def load():
+        if yahoo_provider.pdr is None:
+            import yfinance as yf
+            from pandas_datareader import data as pdr
+            yf.pdr_override()
+            yahoo_provider.pdr = pdr
+        return yahoo_provider.pdr
+
+    def get_history(self, ticker, start, end):
+        df = self.load().get_data_yahoo(ticker, start, end)
+        df.columns = self.columns
+        return df
+
+    def get_intraday(self, ticker, start, end, interval='1m'):
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        step = pd.Timedelta(days=self.intraday_request_days)
+        frames = []
+        while start < end:
+            chunk_end = min(start + step, end)
+            df = self.load().get_data_yahoo(ticker, start, chunk_end,
+                                            interval=interval)
+            start = chunk_end
+            if df.empty:
+                continue
+            df.columns = self.columns
+            if df.index.tz is not None:
+                df.index = df.index.tz_localize(None)
+            frames.append(df)
+        if not frames:
+            return pd.DataFrame(columns=self.columns,
+                                index=pd.DatetimeIndex([], name='Date'))
+        df = pd.concat(frames)
+        df = df[~df.index.duplicated(keep='last')]
+        df.index.name = 'Date'
+        return df
+
+
+class synthetic_provider(data_provider):
+    def __init__(self, seed=0, epoch='2000-01-03', start_price=1000.,
+                 drift=0.0002, volatility=0.015):
+        """
+        Provider generating deterministic random walk OHLCV prices, so any
+        number of tickers can be produced offline.
+
+        Prices are generated from epoch onwards with a generator seeded from
+        the ticker and seed, so the same ticker always has the same price on a
+        given date whatever range is requested.
+
+        :param seed: int to vary the generated universe
+        :param epoch: first business day prices are generated from
+        :param start_price: price at epoch in pence
+        :param drift: mean daily log return
+        :param volatility: standard deviation of daily log returns
+        """
+        self.seed = seed
+        self.epoch = pd.Timestamp(epoch)
+        self.start_price = start_price
+        self.drift = drift
+        self.volatility = volatility
+
+    def rng(self, ticker):
+        return np.random.default_rng([self.seed, zlib.crc32(ticker.encode())])
+
+    def get_history(self, ticker, start, end):
+        start = max(pd.Timestamp(start).normalize(), self.epoch)
+        index = pd.bdate_range(self.epoch, pd.Timestamp(end).normalize(),
+                               name='Date')
+        n = len(index)
+        # One row of draws per date so earlier dates don't depend on end
+        z = self.rng(ticker).standard_normal((n, 5))
+        close = self.start_price * np.exp(np.cumsum(self.drift +
+                                                    self.volatility * z[:, 0]))
+        open_ = np.concatenate([[self.start_price], close[:-1]]) * \
+                np.exp(self.volatility / 4 * z[:, 1])
+        spread = np.abs(self.volatility / 2 * z[:, 2:4]).T
+        df = pd.DataFrame({'Open': open_,
+                           'High': np.maximum(open_, close) * (1 + spread[0]),
+                           'Low': np.minimum(open_, close) * (1 - spread[1]),
+                           'Close': close,
+                           'AdjClose': close,
+                           'Volume': np.round(np.exp(12 + 0.5 * z[:, 4]))},
+                          index=index)
+        return df[df.index >= start]
+
+    def get_intraday(self, ticker, start, end, interval='1m'):
+        """
+        Fn to generate 1 minute bars for LSE trading hours (08:00-16:29), each
+        day a random walk from that day's synthetic open, so bars for a date
+        don't depend on the range requested
+        """
+        if interval != '1m':
+            raise ValueError('synthetic_provider only generates 1m bars')
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        daily = self.get_history(ticker, start, end)
+        minutes = pd.timedelta_range('08:00:00', '16:29:00', freq='min')
+        frames = []
+        for day, day_open in zip(daily.index, daily['Open'].to_numpy()):
+            rng = np.random.default_rng([self.seed, zlib.crc32(ticker.encode()),
+                                         day.toordinal()])
+            z = rng.standard_normal((len(minutes), 3))
+            sd = self.volatility / np.sqrt(len(minutes))
+            close = day_open * np.exp(np.cumsum(sd * z[:, 0]))
+            open_ = np.concatenate([[day_open], close[:-1]])
+            spread = np.abs(sd / 2 * z[:, 1:3]).T
+            frames.append(pd.DataFrame({
+                'Open': open_,
+                'High': np.maximum(open_, close) * (1 + spread[0]),
+                'Low': np.minimum(open_, close) * (1 - spread[1]),
+                'Close': close,
+                'AdjClose': close,
+                'Volume': np.round(np.exp(6 + 0.5 * rng.standard_normal(
+                    len(minutes))))}, index=day + minutes))
+        if not frames:
+            return pd.DataFrame(columns=self.columns,
+                                index=pd.DatetimeIndex([], name='Date'))
+        df = pd.concat(frames)
+        df.index.name = 'Date'
+        return df[(df.index >= start) & (df.index <= end)]
+
+    @staticmethod
+    def tickers(n, suffix='.L'):
+        """
+        Fn to generate n synthetic ticker codes e.g. 'SYNAAB.L', letters only
+        as stock_dataframe strips digits from tickers. At most 26**3 codes
+        """
+        letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+        if n > len(letters) ** 3:
+            raise ValueError(f'at most {len(letters) ** 3} synthetic tickers, '
+                             f'not {n}')
+        codes = []
+        for i in range(n):
+            code = ''
+            for _ in range(3):
+                i, r = divmod(i, 26)
+                code = letters[r] + code
+            codes.append(f'SYN{code}{suffix}')
+        return codes
+
+
+class csv_provider(data_provider):
+    def __init__(self, directory):
+        """
+        Provider reading prices from one '<ticker>.csv' file per ticker, as
+        written by csv_provider.write
+
+        :param directory: directory containing csv files
+        """
+        self.directory = directory
+
+    def path(self, ticker):
+        return os.path.join(self.directory, f'{ticker}.csv')
+
+    def get_history(self, ticker, start, end):
+        df = pd.read_csv(self.path(ticker), index_col='Date', parse_dates=True)
+        df = df[self.columns]
+        return df[(df.index >= pd.Timestamp(start).normalize()) &
+                  (df.index <= pd.Timestamp(end))]
+
+    def write(self, ticker, df):
+        """
+        Fn to save a price dataframe as a csv fixture for ticker
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        df[self.columns].to_csv(self.path(ticker), index_label='Date')
@@ -0,0 +1,141 @@
+"""
+Functions to download and preprocess a whole universe of tickers at once.
+
+Downloads are I/O bound so run in a bounded thread pool, while cleaning and
+metrics are CPU bound so run in a process pool. Failed tickers are reported
+rather than aborting the batch.
+"""
+
+
+import os
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+from isiver_utils.data.data_acquisition import stock_dataframe
+
+
+def download_universe(tickers, start_date=None, provider=None,
+                      price_cache=None, max_workers=8):
+    """
+    Fn to download prices for many tickers concurrently
+
+    :param tickers: list of tickers as accepted by stock_dataframe
+    :param start_date: date to gather data from, None for past 5 years
+    :param provider: providers.data_provider shared by all tickers
+    :param price_cache: optional caching.price_cache shared by all tickers
+    :param max_workers: maximum number of concurrent downloads
+    :return: (dict of ticker: stock_dataframe, dict of ticker: exception)
+    """
+    def download(ticker):
+        stock_class = stock_dataframe(ticker, start_date, pd.DataFrame(),
+                                      price_cache=price_cache,
+                                      provider=provider)
+        if stock_class.download_data().empty:
+            raise ValueError(f'no price data returned for {ticker}')
+        return stock_class
+
+    stock_classes, failures = {}, {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {ticker: executor.submit(download, ticker)
+                   for ticker in tickers}
+        for ticker, future in futures.items():
+            try:
+                stock_classes[ticker] = future.result()
+            except Exception as e:
+                failures[ticker] = e
+    return stock_classes, failures
+
+
+def _pre_process_df(df, options):
+    """
+    Process pool worker to clean and calculate default metrics for a dataframe
+
+    :param options: stock_dataframe kwargs, see _worker_options
+    :return: (preprocessed dataframe, memory_report, gap_context)
+    """
+    stock_class = stock_dataframe('', None, df, **options)
+    stock_class.pre_process(True)
+    return stock_class.df, stock_class.memory_report, stock_class.gap_context
+
+
+def _worker_options(stock_class):
+    """
+    Fn to get the options of a stock class which change how it is
+    preprocessed, to send to a worker with its dataframe
+    """
+    return {'compact': stock_class.compact,
+            'gap_fill': stock_class.gap_fill,
+            'frequency': stock_class.frequency,
+            'metric_cache': stock_class.metric_cache}
+
+
+def pre_process_universe(stock_classes, processes=None, compact=False):
+    """
+    Fn to clean and calculate default metrics for many stock classes in
+    parallel, only the dataframes and preprocessing options (compact,
+    gap_fill, frequency and metric_cache) are sent to the worker processes
+
+    :param stock_classes: dict of ticker: stock_dataframe with downloaded data
+    :param processes: number of worker processes, None for one per cpu and 0
+                    to run in this process
+    :param compact: bool, True to downcast each dataframe after preprocessing,
+                    see stock_dataframe.compact_dtypes
+    :return: (dict of ticker: stock_dataframe, dict of ticker: exception)
+    """
+    done, failures = {}, {}
+    for stock_class in stock_classes.values():
+        stock_class.compact = compact
+    if processes == 0:
+        for ticker, stock_class in stock_classes.items():
+            try:
+                stock_class.pre_process(True)
+                done[ticker] = stock_class
+            except Exception as e:
+                failures[ticker] = e
+        return done, failures
+
+    with ProcessPoolExecutor(max_workers=processes or os.cpu_count()) as executor:
+        futures = {ticker: executor.submit(_pre_process_df, stock_class.df,
+                                           _worker_options(stock_class))
+                   for ticker, stock_class in stock_classes.items()}
+        for ticker, future in futures.items():
+            try:
+                stock_classes[ticker].df, memory_report, \
+                    stock_classes[ticker].gap_context = future.result()
+                if compact:
+                    stock_classes[ticker].memory_report = memory_report
+                done[ticker] = stock_classes[ticker]
+            except Exception as e:
+                failures[ticker] = e
+    return done, failures
+
+
+def load_universe(tickers, start_date=None, provider=None, price_cache=None,
+                  max_workers=8, processes=None, panel=False, compact=False):
+    """
+    Fn to download and preprocess a list of tickers, the batch equivalent of
+    calling stock_dataframe(...).new_stock_df() for each
+
+    :param tickers: list of tickers as accepted by stock_dataframe
+    :param start_date: date to gather data from, None for past 5 years
+    :param provider: providers.data_provider shared by all tickers
+    :param price_cache: optional caching.price_cache shared by all tickers
+    :param max_workers: maximum number of concurrent downloads
+    :param processes: number of preprocessing processes, 0 for in process
+    :param panel: bool, True to return a single dataframe with (ticker, column)
+                MultiIndex columns rather than a dict of stock classes
+    :param compact: bool, True to downcast dataframes to float32 prices and
+                integer volume
+    :return: (dict of ticker: stock_dataframe or panel dataframe,
+              dict of ticker: exception for failed tickers)
+    """
+    stock_classes, failures = download_universe(tickers, start_date, provider,
+                                                price_cache, max_workers)
+    stock_classes, process_failures = pre_process_universe(stock_classes,
+                                                           processes, compact)
+    failures.update(process_failures)
+    if panel:
+        frames = {t: stock_classes[t].df for t in tickers if t in stock_classes}
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame(), failures
+    return stock_classes, failures
@@ -0,0 +1,87 @@
+"""
+Headless batch rendering of daily OHLCV charts to image files.
+
+Charts are drawn on object oriented Figures with the Agg canvas, so no pyplot
+state or display is needed, and many tickers are rendered in a process pool.
+Each figure is cleared once saved to keep memory flat.
+"""
+
+
+import os
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+from isiver_utils.plotting import visualisation
+
+
+def render_chart(stock_df, ticker, out_dir, fmt='png', dpi=100, **kwargs):
+    """
+    Fn to render a daily OHLCV chart for one stock dataframe to a file
+
+    :param stock_df: stock dataframe with OHLCV columns
+    :param ticker: ticker used for the title and file name
+    :param out_dir: directory to save chart in
+    :param fmt: image format, e.g. 'png' or 'svg'
+    :param dpi: resolution of raster images
+    :param kwargs: plot kwargs as for visualisation.daily_ohlcv
+    :return: path of saved chart
+    """
+    fig = Figure(dpi=dpi)                                                       # decimation sizes bars from fig.dpi
+    FigureCanvasAgg(fig)
+    try:
+        visualisation.draw_daily_ohlcv(stock_df, ticker, fig=fig, **kwargs)
+        path = os.path.join(out_dir, f'{ticker}.{date.today()}.{fmt}')
+        fig.savefig(path, format=fmt, dpi=dpi)
+    finally:
+        fig.clear()
+    return path
+
+
+def _render_worker(stock_df, ticker, out_dir, fmt, dpi, kwargs):
+    """
+    Process pool worker for render_charts
+    """
+    return render_chart(stock_df, ticker, out_dir, fmt, dpi, **kwargs)
+
+
+def render_charts(stock_classes, out_dir, fmt='png', dpi=100, processes=None,
+                  **kwargs):
+    """
+    Fn to render daily OHLCV charts for many stocks in parallel
+
+    :param stock_classes: dict of ticker: stock_dataframe, or list of
+                        stock_dataframes titled by their ticker
+    :param out_dir: directory to save charts in, created if missing
+    :param fmt: image format, e.g. 'png' or 'svg'
+    :param dpi: resolution of raster images
+    :param processes: number of worker processes, None for one per cpu and 0
+                    to render in this process
+    :param kwargs: plot kwargs as for visualisation.daily_ohlcv
+    :return: (dict of ticker: saved path, dict of ticker: exception)
+    """
+    if not isinstance(stock_classes, dict):
+        stock_classes = {s.ticker: s for s in stock_classes}
+    os.makedirs(out_dir, exist_ok=True)
+    paths, failures = {}, {}
+    if processes == 0:
+        for ticker, stock_class in stock_classes.items():
+            try:
+                paths[ticker] = render_chart(stock_class.df, ticker, out_dir,
+                                             fmt, dpi, **kwargs)
+            except Exception as e:
+                failures[ticker] = e
+        return paths, failures
+
+    with ProcessPoolExecutor(max_workers=processes or os.cpu_count()) as executor:
+        futures = {ticker: executor.submit(_render_worker, stock_class.df,
+                                           ticker, out_dir, fmt, dpi, kwargs)
+                   for ticker, stock_class in stock_classes.items()}
+        for ticker, future in futures.items():
+            try:
+                paths[ticker] = future.result()
+            except Exception as e:
+                failures[ticker] = e
+    return paths, failures
@@ -2,7 +2,7 @@
 File containing formatting functionality for visualisation.py
 '''
 
-import matplotlib.pyplot as plt
+from matplotlib.artist import setp
 import matplotlib.ticker as mticker
 import matplotlib.dates as mdates
 
@@ -15,25 +15,26 @@ def format_plot(fig, title, **kwargs):
     format_ohlcv(fig.axes[0])
 
 
-def format_fig(fig, title, plot_size=(14, 9), background_colour='#07000d'):
+def format_fig(fig, title, plot_size=(14, 9), background_colour='#07000d',
+               **kwargs):
     '''
     Format figure titles, colour and plot size
     '''
     fig.suptitle(title, color='w')
     fig.set_size_inches(plot_size)
     fig.set_facecolor(background_colour)
-    plt.gca().yaxis.set_major_locator(mticker.MaxNLocator(prune='upper'))
+    fig.gca().yaxis.set_major_locator(mticker.MaxNLocator(prune='upper'))
 
 
 def format_axes(fig, ax_colour='#07000d', spine_colour='#1ABC9C',
-                tick_colour='w', max_dticks=30):
+                tick_colour='w', max_dticks=30, **kwargs):
     '''
     Fn to format ax objects in fig
     '''
     for ax in fig.axes:
         ax.set_facecolor(ax_colour)
-        plt.setp(ax.get_xticklabels(), rotation=30, ha='right') #readable labels
-        plt.setp(ax.spines.values(), color=spine_colour)
+        setp(ax.get_xticklabels(), rotation=30, ha='right') #readable labels
+        setp(ax.spines.values(), color=spine_colour)
         ax.tick_params(colors=tick_colour)
         ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
         ax.xaxis.set_major_locator(mticker.MaxNLocator(max_dticks))
@@ -7,6 +7,9 @@ standalone module to give greater flexibility in plotting.
 
 
 from matplotlib.lines import TICKLEFT, TICKRIGHT, Line2D
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba_array
+import matplotlib.dates as mdates
 import numpy as np
 
 
@@ -113,6 +116,95 @@ def _plot_day_summary(ax, quotes, ticksize=3,
     return lines
 
 
+def plot_day_summary_ohlc_collection(ax, quotes, ticksize=3,
+                                     colorup='k', colordown='r'):
+    """Plots day summary with a handful of artists rather than three
+        `Line2D` artists per bar, otherwise the same as
+        `plot_day_summary_ohlc`.
+    Parameters
+    ----------
+    ax : `Axes`
+        an `Axes` instance to plot to
+    quotes : sequence of (time, open, high, low, close, ...) sequences
+        data to plot.  time can be in float date format or datetimes
+    ticksize : int
+        open/close tick marker in points
+    colorup : color
+        the color of the lines where close >= open
+    colordown : color
+        the color of the lines where close <  open
+    Returns
+    -------
+    lines : tuple
+        (`LineCollection` of vertical lines, list of open/close tick lines)
+    """
+    quotes = np.asarray(quotes, dtype=object)
+    t = quotes[:, 0]
+    if not np.issubdtype(np.asarray(t).dtype, np.number):
+        t = mdates.date2num(list(t))
+    opens, highs, lows, closes = (quotes[:, i].astype(float) for i in range(1, 5))
+    return plot_day_summary_arrays(ax, t, opens, highs, lows, closes,
+                                   ticksize=ticksize, colorup=colorup,
+                                   colordown=colordown)
+
+
+def plot_day_summary_arrays(ax, t, opens, highs, lows, closes, ticksize=3,
+                            colorup='k', colordown='r', linewidth=None):
+    """Plots day summary from arrays using a `LineCollection` for the
+        vertical low to high lines and one marker `Line2D` per colour for the
+        open and close ticks, built without a Python loop over bars.
+    Parameters
+    ----------
+    ax : `Axes`
+        an `Axes` instance to plot to
+    t : array
+        times in float date format - see date2num
+    opens, highs, lows, closes : array
+        prices for each time
+    ticksize : int
+        open/close tick marker in points
+    colorup : color
+        the color of the lines where close >= open
+    colordown : color
+        the color of the lines where close <  open
+    linewidth : float
+        width of the vertical lines, defaults to scaling with the number of
+        bars as in `_plot_day_summary`
+    Returns
+    -------
+    lines : tuple
+        (`LineCollection` of vertical lines, list of open/close tick lines)
+    """
+    t, opens, highs, lows, closes = (np.asarray(a, dtype=float) for a in
+                                     (t, opens, highs, lows, closes))
+    _check_input(opens, closes, highs, lows)
+    if linewidth is None:
+        linewidth = len(t) / 300
+
+    up = closes >= opens
+    colours = to_rgba_array([colordown, colorup])[up.astype(int)]
+    segments = np.empty((len(t), 2, 2))
+    segments[:, :, 0] = t[:, None]
+    segments[:, 0, 1] = lows
+    segments[:, 1, 1] = highs
+    vlines = LineCollection(segments, colors=colours, linewidths=linewidth,
+                            antialiaseds=False, zorder=Line2D.zorder)
+    ax.add_collection(vlines)
+
+    ticks = []
+    for mask, color in ((up, colorup), (~up, colordown)):
+        for prices, marker in ((opens, TICKLEFT), (closes, TICKRIGHT)):
+            tick = Line2D(t[mask], prices[mask], color=color, linestyle='None',
+                          antialiased=False, marker=marker,
+                          markersize=ticksize)
+            ax.add_line(tick)
+            ticks.append(tick)
+
+    ax.autoscale_view()
+
+    return vlines, ticks
+
+
 def _check_input(opens, closes, highs, lows, miss=-1):
     """Checks that *opens*, *highs*, *lows* and *closes* have the same length.
     NOTE: this code assumes if any value open, high, low, close is
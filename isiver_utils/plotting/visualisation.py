@@ -25,12 +25,12 @@ import os
 import numpy as np
 import pandas as pd
 from datetime import date
-import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from matplotlib.ticker import Formatter
+from matplotlib.collections import PolyCollection
 
 
-from isiver_utils import default_plot_dir
+from isiver_utils.data import instrumentation
 from isiver_utils.plotting import mpl_finance_modified as mpf
 from isiver_utils.plotting import formatting
 
@@ -58,6 +58,9 @@ def daily_ohlcv(*stock_classes, output_window=True, save_fig=False, **kwargs):
         tick_colour - X/Y tick colour
         max_dticks - assign maximum number of date ticks on bottom axis for readability
         fill_dates - choose False to include weekends in plot
+        renderer - 'collection' (default) or 'lines' for per bar artists
+        decimate - False to draw every bar rather than at most one per pixel
+        max_bars - maximum number of bars when decimating
         save_fig - toggle if matplotlib saves plot
         save_dir - directory to save plot in
 
@@ -66,25 +69,90 @@ def daily_ohlcv(*stock_classes, output_window=True, save_fig=False, **kwargs):
     # Initialise empty lists for fig objects if they need to be returned
     plot_list = []
 
-    for stock_class in stock_classes:                                           # REORDER AS NECESSARY - Make sure following functions are in order called
-        format_dates(stock_class.df)
-        fig, ohlcv_ax = generate_fig_ax()                                       # CREATE SUBPLOT AXES HERE WITH CONDITIONAL AND KWARGS
-        generate_daily_ohlcv(stock_class.df, fig, ohlcv_ax, **kwargs)
-        volume_ax = plot_volume(stock_class.df, ohlcv_ax, **kwargs)
-        formatting.format_plot(fig, stock_class.ticker, **kwargs)
+    for stock_class in stock_classes:
+        instr = getattr(stock_class, 'instrumentation', None)                   # records plotting stages if set
+        with instrumentation.stage(instr, 'draw_daily_ohlcv', stock_class.ticker,
+                                   lambda: stock_class.df):
+            fig = draw_daily_ohlcv(stock_class.df, stock_class.ticker, **kwargs)
         plot_list.append([fig])
-        process_fig(**kwargs)
+        with instrumentation.stage(instr, 'process_fig', stock_class.ticker):
+            process_fig(fig, stock_class.ticker, save_fig=save_fig,
+                        output_window=output_window, **kwargs)
 
     return plot_list
 
 
-def generate_fig_ax():
+def draw_daily_ohlcv(stock_df, ticker, fig=None, decimate=True, max_bars=None,
+                     **kwargs):
+    """
+    Fn to draw daily OHLC graph with volume overlay for one stock dataframe
+
+    fig - figure to draw on, e.g. an object oriented Figure for headless
+          rendering, creates a pyplot figure if None
+    decimate - aggregate bars so there are no more bars than pixels across the
+               price axis, keeps render time bounded for long histories
+    max_bars - maximum number of bars to draw, defaults to the pixel width
+    **kwargs - as for daily_ohlcv
+
+    returns fig object
+    """
+    format_dates(stock_df)                                                      # REORDER AS NECESSARY - Make sure following functions are in order called
+    fig, ohlcv_ax = generate_fig_ax(fig)                                        # CREATE SUBPLOT AXES HERE WITH CONDITIONAL AND KWARGS
+    if decimate:
+        if max_bars is None:
+            max_bars = axes_pixel_width(fig, **kwargs)
+        stock_df = decimate_ohlcv(stock_df, max_bars)
+    ohlcv = prepare_ohlcv_arrays(stock_df)                                      # shared by all renderers for this chart
+    generate_daily_ohlcv(stock_df, fig, ohlcv_ax, ohlcv=ohlcv, **kwargs)
+    volume_ax = plot_volume(stock_df, ohlcv_ax, ohlcv=ohlcv, **kwargs)
+    formatting.format_plot(fig, ticker, **kwargs)
+    return fig
+
+
+def axes_pixel_width(fig, plot_size=(14, 9), **kwargs):
+    """
+    Fn to get the width in pixels of the price axes once the figure has been
+    resized to plot_size by formatting.format_fig
+    """
+    params = fig.subplotpars
+    return int(plot_size[0] * fig.dpi * (params.right - params.left))
+
+
+def decimate_ohlcv(stock_df, max_bars):
+    """
+    Fn to aggregate consecutive bars so there are at most max_bars, keeping
+    OHLCV semantics: first open, max high, min low, last close and summed
+    volume. Each bar is labelled with the date of its first row.
+
+    returns stock_df unchanged if it is already short enough
+    """
+    n = len(stock_df)
+    if n <= max_bars:
+        return stock_df
+    k = -(-n // max_bars)                                                       # rows per bar, rounded up
+    starts = np.arange(0, n, k)
+    ends = np.append(starts[1:], n) - 1
+    return pd.DataFrame({
+        'Open': stock_df['Open'].to_numpy()[starts],
+        'High': np.fmax.reduceat(stock_df['High'].to_numpy(), starts),
+        'Low': np.fmin.reduceat(stock_df['Low'].to_numpy(), starts),
+        'Close': stock_df['Close'].to_numpy()[ends],
+        'Volume': np.add.reduceat(np.nan_to_num(stock_df['Volume'].to_numpy()),
+                                  starts)},
+        index=stock_df.index[starts])
+
+
+def generate_fig_ax(fig=None):
     """
     Fn to generate figure and axis objects for plotting stock information
+
+    fig - existing figure to add axis to, creates a pyplot figure if None
     """
     # Create figure and specify dimensions
-    fig = plt.figure() # create figure
-    ax = plt.subplot2grid((6,4), (1,0), rowspan=4, colspan=4, fig=fig)
+    if fig is None:
+        import matplotlib.pyplot as plt                                         # only load pyplot for interactive figures
+        fig = plt.figure() # create figure
+    ax = fig.add_subplot(fig.add_gridspec(6, 4)[1:5, 0:4])
     return fig, ax
 
 
@@ -98,25 +166,45 @@ def format_dates(stock_df):
     return stock_df
 
 
-def process_fig(save_fig=False, save_dir=default_plot_dir, output_window=True):
+def process_fig(fig, ticker, save_fig=False, save_dir=None,
+                output_window=True, **kwargs):
     """
     Fn to save and/or output figure depending on save_fig and output_window
-    Booleans.
+    Booleans. save_dir defaults to isiver_utils.default_plot_dir
     """
     if save_fig == True:
-        plt.savefig(f'{save_dir}{stock_class.ticker}.{date.today()}.png')
+        if save_dir is None:
+            from isiver_utils import default_plot_dir
+            save_dir = default_plot_dir
+        os.makedirs(save_dir, exist_ok=True)
+        fig.savefig(os.path.join(save_dir, f'{ticker}.{date.today()}.png'))
     if output_window == True:
+        import matplotlib.pyplot as plt
         plt.show()
 
 
 def generate_daily_ohlcv(stock_df, fig, ohlcv_ax, up_colour='#53c156',
-                         down_colour='#ff1717', volume_plot='bar', **kwargs):
+                         down_colour='#ff1717', volume_plot='bar',
+                         renderer='collection', ohlcv=None, **kwargs):
     """
     Generate daily ohlcv fig and ax objects with modified mpl-finance module
+
+    renderer - 'collection' to draw all bars with a few collection artists or
+               'lines' for the original three Line2D artists per bar
+    ohlcv - arrays from prepare_ohlcv_arrays, built from stock_df if None
     """
-    ohlcv = prepare_ohlcv_list(stock_df)
-    mpf.plot_day_summary_ohlc(ohlcv_ax, ohlcv, ticksize = 3, colorup=up_colour,
-                              colordown=down_colour)
+    if renderer == 'lines':
+        mpf.plot_day_summary_ohlc(ohlcv_ax, prepare_ohlcv_list(stock_df),
+                                  ticksize = 3, colorup=up_colour,
+                                  colordown=down_colour)
+        return fig, ohlcv_ax
+    if ohlcv is None:
+        ohlcv = prepare_ohlcv_arrays(stock_df)
+    ohlcv_ax.xaxis_date()
+    mpf.plot_day_summary_arrays(ohlcv_ax, ohlcv['Date'], ohlcv['Open'],
+                                ohlcv['High'], ohlcv['Low'], ohlcv['Close'],
+                                ticksize = 3, colorup=up_colour,
+                                colordown=down_colour)
     return fig, ohlcv_ax
 
 
@@ -131,26 +219,53 @@ def prepare_ohlcv_list(stock_df):
     return ohlcv
 
 
-def plot_volume(stock_df, ohlcv_ax, volume_plot='bar'):
+def prepare_ohlcv_arrays(stock_df):
+    """
+    Formats data into float64 arrays for the array based renderers, without
+    creating Python objects per row.
+
+    Returns dict of 'Date' (matplotlib date numbers), 'Open', 'High', 'Low',
+    'Close' and 'Volume', each a contiguous view of one block of memory.
+    """
+    columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+    values = np.empty((len(columns) + 1, len(stock_df)))
+    values[0] = mdates.date2num(stock_df.index)
+    values[1:] = stock_df[columns].to_numpy(dtype=np.float64).T
+    return dict(zip(['Date'] + columns, values))
+
+
+def plot_volume(stock_df, ohlcv_ax, volume_plot='bar', ohlcv=None, **kwargs):
     """
     Function to overlay volume on OHLCV price plot
+
+    ohlcv - arrays from prepare_ohlcv_arrays, built from stock_df if None
     """
-    ohlcv = prepare_ohlcv_list(stock_df)
     if volume_plot != 'off':
+        if ohlcv is None:
+            ohlcv = prepare_ohlcv_arrays(stock_df)
         volumeMin = 0
-        volume_data = [line[5] for line in ohlcv]
-        dates = [line[0] for line in ohlcv]
+        volume_data = ohlcv['Volume']
+        dates = ohlcv['Date']
         volume_ax = ohlcv_ax.twinx()
 
         if volume_plot == 'bar':
-            volume_ax.bar(dates, volume_data, color='#1ABC9C', alpha=.3)
+            # One PolyCollection rather than a Rectangle patch per bar, 0.8 of
+            # the bar spacing wide (0.8 days for undecimated daily bars)
+            width = .8 * np.median(np.diff(dates)) if len(dates) > 1 else .8
+            verts = np.empty((len(dates), 4, 2))
+            verts[:, :, 0] = dates[:, None] + width * np.array([-.5, -.5, .5, .5])
+            verts[:, 1:3, 1] = volume_data[:, None]
+            verts[:, [0, 3], 1] = volumeMin
+            volume_ax.add_collection(PolyCollection(verts, facecolors='#1ABC9C',
+                                                    linewidths=0, alpha=.3))
+            volume_ax.autoscale_view()
 
         if volume_plot == 'fill':
             volume_ax.fill_between(dates, volumeMin, volume_data, facecolor='#1ABC9C',
                              alpha=.3)
 
         # Set max bar height lower than ohlc markers for ease of viewing
-        volume_ax.set_ylim(0, 4*max(volume_data))
+        volume_ax.set_ylim(0, 4*volume_data.max())
         volume_ax.set_ylabel('Volume', color='w')
         return volume_ax
     return ohlcv_ax
@@ -6,7 +6,7 @@ setup(name='isiver_utils',
     author='Ollie Sellers, Isaac Rayment',
     author_email='olliejsellers@gmail.com, isaacrayment123@gmail.com',
     license='MIT',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks*', 'tests*']),
     include_package_data=True,
     install_requires=[
         'numpy',
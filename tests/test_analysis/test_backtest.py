@@ -0,0 +1,105 @@
+"""
+Unit testing for vectorised backtesting against a bar by bar loop
+"""
+
+
+import unittest
+import numpy as np
+import pandas as pd
+
+
+from isiver_utils.analysis import backtest
+from isiver_utils.data import synthetic_provider
+from isiver_utils.data.universe import load_universe
+
+
+def rsi_strategy(df):
+    return df['Close_RSI_14'] < 35, df['Close_RSI_14'] > 65
+
+
+def loop_backtest(close, entries, exits, cost):
+    """
+    Bar by bar reference implementation with lag 1
+    """
+    position, held, returns, trades = 0, [], [], []
+    for t in range(len(close)):
+        hold = position
+        ret = hold * (close[t] / close[t - 1] - 1) if t else 0.0
+        previous = held[-1] if held else 0
+        returns.append(ret - cost * abs(hold - previous))
+        held.append(hold)
+        if hold and not previous:
+            trades.append([t - 1, None])
+        if previous and not hold:
+            trades[-1][1] = t - 1
+        if exits[t]:
+            position = 0
+        elif entries[t]:
+            position = 1
+    if held[-1]:
+        trades[-1][1] = len(close) - 1
+    return np.array(held), np.array(returns), trades
+
+
+class test_backtest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stock_classes, _ = load_universe(
+            synthetic_provider.tickers(3), '2018-01-01',
+            provider=synthetic_provider(), processes=0)
+
+    def test_matches_loop(self):
+        """
+        Fn to test positions, returns and trades match the loop
+        """
+        df = next(iter(self.stock_classes.values())).df
+        entries, exits = rsi_strategy(df)
+        result = backtest.backtest(df['Close'], entries, exits, cost=0.001)
+        held, returns, trades = loop_backtest(df['Close'].to_numpy(),
+                                              entries.to_numpy(),
+                                              exits.to_numpy(), 0.001)
+        np.testing.assert_array_equal(result.positions.to_numpy(), held)
+        np.testing.assert_allclose(result.returns.to_numpy(), returns,
+                                   rtol=1e-12)
+        self.assertGreater(len(trades), 2)
+        self.assertEqual(list(result.trades['entry_date']),
+                         [df.index[a] for a, _ in trades])
+        self.assertEqual(list(result.trades['exit_date']),
+                         [df.index[b] for _, b in trades])
+        close = df['Close'].to_numpy()
+        np.testing.assert_allclose(result.trades['return'],
+                                   [close[b] / close[a] - 1 for a, b in trades])
+        self.assertAlmostEqual(result.drawdown.min(),
+                               result.summary()['max_drawdown'].iloc[0])
+        self.assertTrue((result.drawdown <= 0).all())
+
+    def test_universe(self):
+        """
+        Fn to test a universe backtest matches backtesting each stock
+        """
+        result = backtest.backtest_universe(self.stock_classes, rsi_strategy)
+        summary = result.summary()
+        self.assertEqual(list(summary.index), list(self.stock_classes))
+        for ticker, stock_class in self.stock_classes.items():
+            single = backtest.backtest_strategy(stock_class.df, rsi_strategy)
+            np.testing.assert_allclose(result.equity[ticker], single.equity)
+            self.assertEqual(summary.loc[ticker, 'trades'], len(single.trades))
+
+    def test_signals(self):
+        """
+        Fn to test crossovers and that exits win over entries on one bar
+        """
+        a = pd.Series([1., 3., 2., 0., 4.])
+        np.testing.assert_array_equal(backtest.crossed_above(a, 2),
+                                      [False, True, False, False, True])
+        np.testing.assert_array_equal(backtest.crossed_below(a, 2),
+                                      [False, False, False, True, False])
+        positions = backtest.signal_positions(
+            np.array([[1], [0], [1], [0]], dtype=bool),
+            np.array([[0], [1], [1], [0]], dtype=bool))
+        np.testing.assert_array_equal(positions[:, 0], [1, 0, 0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
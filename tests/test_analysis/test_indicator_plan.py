@@ -0,0 +1,49 @@
+"""
+Unit testing for indicator_plan file against the unfused metric columns
+"""
+
+
+import unittest
+import pandas as pd
+
+
+from isiver_utils.analysis import metrics
+from isiver_utils.analysis.indicator_plan import indicator_plan
+from isiver_utils.data import stock_dataframe, synthetic_provider
+
+
+class test_indicator_plan(unittest.TestCase):
+
+    df = synthetic_provider().get_history('SYNAAA.L', '2016-01-01',
+                                          '2020-12-31')
+
+    def test_default_metrics(self):
+        """
+        Fn to test fused default metrics are identical to adding each column
+        separately, including column order
+        """
+        fused = stock_dataframe('SYNAAA_L', None, self.df.copy())
+        fused.pre_process(True)
+        unfused = stock_dataframe('SYNAAA_L', None, self.df.copy())
+        unfused.clean_data()
+        unfused.returns()
+        unfused.get_default_metrics(fused=False)
+        pd.testing.assert_frame_equal(fused.df, unfused.df)
+
+    def test_replaced_label(self):
+        """
+        Fn to test a label added twice is only calculated for the last metric
+        """
+        plan = indicator_plan()
+        plan.add(metrics.moving_average, ['Close'], (10,), 'EMA')
+        plan.add(metrics.exp_moving_average, ['Close'], (10,), 'EMA')
+        out = plan.compute(self.df)
+        self.assertEqual(list(out.columns), ['Close_EMA_10'])
+        pd.testing.assert_series_equal(out['Close_EMA_10'],
+                                       metrics.exp_moving_average(
+                                           self.df['Close'], 10),
+                                       check_names=False, check_freq=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+"""
+Unit testing for the memoising metric cache
+"""
+
+
+import os
+import tempfile
+import unittest
+import pandas as pd
+
+
+from isiver_utils.analysis import metrics
+from isiver_utils.analysis.metric_cache import metric_cache, metric_name
+from isiver_utils.data import stock_dataframe, synthetic_provider
+
+
+class test_metric_cache(unittest.TestCase):
+
+    def setUp(self):
+        self.close = synthetic_provider().get_history(
+            'SYNAAA.L', '2019-01-01', '2020-12-31')['Close']
+
+    def test_hits_and_misses(self):
+        """
+        Fn to test repeated calls hit, and changed inputs or arguments miss
+        """
+        cache = metric_cache()
+        first = cache.call(metrics.rsi, self.close, 14)
+        pd.testing.assert_series_equal(first, metrics.rsi(self.close, 14))
+        first.iloc[:] = 0                                                       # results are copies
+        pd.testing.assert_series_equal(cache.call(metrics.rsi, self.close, 14),
+                                       metrics.rsi(self.close, 14))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        changed = self.close.copy()
+        changed.iloc[-1] += 1
+        cache.call(metrics.rsi, changed, 14)
+        cache.call(metrics.rsi, self.close, 20)
+        cache.call(metrics.bollinger, self.close, 20, bound='Upper')
+        lower = cache.call(metrics.bollinger, self.close, 20, bound='Lower')
+        pd.testing.assert_series_equal(lower, metrics.bollinger(
+            self.close, 20, bound='Lower'))
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 5))
+        self.assertEqual(stats['entries'], 5)
+
+    def test_lru_eviction(self):
+        """
+        Fn to test least recently used results are evicted beyond max_bytes
+        """
+        size = int(self.close.memory_usage(index=True))
+        cache = metric_cache(max_bytes=2 * size)
+        cache.call(metrics.moving_average, self.close, 10)
+        cache.call(metrics.moving_average, self.close, 20)
+        cache.call(metrics.moving_average, self.close, 10)                      # 10 now most recently used
+        cache.call(metrics.moving_average, self.close, 30)
+        self.assertEqual(cache.evictions, 1)
+        self.assertLessEqual(cache.nbytes, 2 * size)
+        cache.call(metrics.moving_average, self.close, 10)
+        self.assertEqual(cache.hits, 2)
+        cache.call(metrics.moving_average, self.close, 20)
+        self.assertEqual(cache.misses, 4)
+
+    def test_disk(self):
+        """
+        Fn to test results persist in cache_dir between cache instances
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            metric_cache(cache_dir=tmp).call(metrics.std, self.close, 12)
+            cache = metric_cache(cache_dir=tmp)
+            result = cache.call(metrics.std, self.close, 12)
+            self.assertEqual((cache.disk_hits, cache.misses), (1, 0))
+            pd.testing.assert_series_equal(result, metrics.std(self.close, 12),
+                                           check_freq=False)
+            cache.clear(disk=True)
+            cache.call(metrics.std, self.close, 12)
+            self.assertEqual(cache.misses, 1)
+
+    def test_local_fns(self):
+        """
+        Fn to test lambdas are keyed by their code and closure values rather
+        than object id, and unidentifiable fns are never stored on disk
+        """
+        def scaled(k):
+            return lambda df_column, window: metrics.moving_average(
+                df_column, window) * k
+        self.assertEqual(metric_name(scaled(2)), metric_name(scaled(2)))
+        self.assertNotEqual(metric_name(scaled(2)), metric_name(scaled(3)))
+        self.assertNotEqual(metric_name(lambda c, w: c + w),
+                            metric_name(lambda c, w: c - w))
+        with tempfile.TemporaryDirectory() as tmp:
+            metric_cache(cache_dir=tmp).call(scaled(2), self.close, 10)
+            cache = metric_cache(cache_dir=tmp)
+            result = cache.call(scaled(3), self.close, 10)
+            self.assertEqual(cache.misses, 1)
+            pd.testing.assert_series_equal(
+                result, metrics.moving_average(self.close, 10) * 3)
+            cache.call(scaled(2), self.close, 10)
+            self.assertEqual(cache.disk_hits, 1)
+
+            holder = object()
+            unidentified = lambda df_column, window: df_column + id(holder)
+            self.assertIsNone(metric_name(unidentified))
+            cache.call(unidentified, self.close, 1)
+            self.assertEqual(len(os.listdir(tmp)), 2)
+
+    def test_redefined_fns(self):
+        """
+        Fn to test redefining a module level fn, or changing a global it
+        reads, is a miss rather than a stale hit
+        """
+        module = {'__name__': 'user_metrics', 'metrics': metrics, 'k': 2}
+        exec('def m(df_column, window):\n'
+             '    return metrics.moving_average(df_column, window) * k',
+             module)
+        cache = metric_cache()
+        first = metric_name(module['m'])
+        cache.call(module['m'], self.close, 10)
+        module['k'] = 3
+        self.assertNotEqual(metric_name(module['m']), first)
+        pd.testing.assert_series_equal(
+            cache.call(module['m'], self.close, 10),
+            metrics.moving_average(self.close, 10) * 3)
+        exec('def m(df_column, window):\n'
+             '    return metrics.moving_average(df_column, window) - k',
+             module)
+        pd.testing.assert_series_equal(
+            cache.call(module['m'], self.close, 10),
+            metrics.moving_average(self.close, 10) - 3)
+        self.assertEqual((cache.hits, cache.misses), (0, 3))
+        module['k'] = object()                                                  # no stable value, memory only
+        self.assertIsNone(metric_name(module['m']))
+
+    def test_stock_dataframe(self):
+        """
+        Fn to test stock classes sharing a cache reuse default metrics and
+        add_metric_column results unchanged
+        """
+        cache = metric_cache()
+        dfs = []
+        for _ in range(2):
+            stock_class = stock_dataframe('SYNAAA_L', '2019-01-01',
+                                          pd.DataFrame(),
+                                          provider=synthetic_provider(),
+                                          metric_cache=cache)
+            stock_class.new_stock_df()
+            stock_class.add_metric_column(metrics.rsi, ['Close'], (7,), 'RSI')
+            dfs.append(stock_class.df)
+        self.assertEqual(cache.hits, cache.misses)
+        uncached = stock_dataframe('SYNAAA_L', '2019-01-01', pd.DataFrame(),
+                                   provider=synthetic_provider())
+        uncached.new_stock_df()
+        uncached.add_metric_column(metrics.rsi, ['Close'], (7,), 'RSI')
+        for df in dfs:
+            pd.testing.assert_frame_equal(df, uncached.df)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Unit testing for online_metrics file against the batch metrics functions
+"""
+
+
+import unittest
+import numpy as np
+
+
+from isiver_utils.analysis import metrics
+from isiver_utils.analysis.online_metrics import online_metric_for
+from isiver_utils.data import synthetic_provider
+
+
+class test_online_metrics(unittest.TestCase):
+
+    close = synthetic_provider().get_history('SYNAAA.L', '2015-01-01',
+                                             '2020-12-31')['Close']
+
+    def check_metric(self, metric, window, **kwargs):
+        expected = metric(self.close, window, **kwargs).values
+        online = online_metric_for(metric, window, **kwargs)
+        result = np.array(online.update_many(self.close.values))
+        np.testing.assert_array_equal(np.isnan(result), np.isnan(expected))
+        np.testing.assert_allclose(result, expected, rtol=1e-9, atol=1e-9)
+
+    def test_rolling(self):
+        """
+        Fn to test rolling window online metrics match the batch functions
+        """
+        for window in (5, 30):
+            self.check_metric(metrics.moving_average, window)
+            self.check_metric(metrics.std, window)
+            self.check_metric(metrics.rsi, window)
+            self.check_metric(metrics.bollinger, window, bound='Upper')
+            self.check_metric(metrics.bollinger, window, bound='Lower')
+
+    def test_exponential(self):
+        """
+        Fn to test exponential online metrics match the batch functions
+        """
+        self.check_metric(metrics.exp_moving_average, 30)
+        self.check_metric(metrics.macd, (12, 26))
+
+    def test_single_update(self):
+        """
+        Fn to test update returns the latest value and skips missing prices
+        """
+        online = online_metric_for(metrics.moving_average, 3)
+        self.assertTrue(np.isnan(online.update(1.0)))
+        online.update(2.0)
+        self.assertEqual(online.update(3.0), 2.0)
+        self.assertEqual(online.update(np.nan), 2.0)
+        self.assertEqual(online.update(7.0), 4.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
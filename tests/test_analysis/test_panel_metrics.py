@@ -0,0 +1,51 @@
+"""
+Unit testing for panel_metrics file against single stock metric columns
+"""
+
+
+import unittest
+import numpy as np
+import pandas as pd
+
+
+from isiver_utils.analysis import panel_metrics
+from isiver_utils.data import stock_dataframe, synthetic_provider
+
+
+class test_panel_metrics(unittest.TestCase):
+
+    provider = synthetic_provider()
+    stock_classes = {}
+    for ticker in synthetic_provider.tickers(5):
+        stock_classes[ticker] = stock_dataframe(ticker, '2019-01-01',
+                                                pd.DataFrame(),
+                                                provider=provider)
+        stock_classes[ticker].new_stock_df()
+
+    def test_panel_metrics(self):
+        """
+        Fn to test panel metrics match the columns from get_default_metrics
+        """
+        panel = panel_metrics.price_panel(self.stock_classes)
+        result = panel_metrics.panel_metrics(panel)
+        for ticker, stock_class in self.stock_classes.items():
+            for label in result.columns.levels[0]:
+                np.testing.assert_allclose(result[label][ticker],
+                                           stock_class.df[label], rtol=1e-12)
+
+    def test_panel_metrics_array(self):
+        """
+        Fn to test 3d array output matches the MultiIndex dataframe output
+        """
+        panel = panel_metrics.price_panel(self.stock_classes)
+        array, labels = panel_metrics.panel_metrics_array(panel,
+                                                          dtype=np.float32)
+        frame = panel_metrics.panel_metrics(panel)
+        self.assertEqual(array.shape, (len(panel), 5, 10))
+        self.assertEqual(array.dtype, np.float32)
+        np.testing.assert_allclose(array[:, 2, labels.index('Close_RSI_14')],
+                                   frame['Close_RSI_14'].iloc[:, 2], rtol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
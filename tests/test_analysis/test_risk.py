@@ -0,0 +1,102 @@
+"""
+Unit testing for risk file against metrics.get_return_metrics
+"""
+
+
+import unittest
+import numpy as np
+import pandas as pd
+
+
+from isiver_utils.analysis import metrics, risk
+from isiver_utils.data import stock_dataframe, synthetic_provider
+
+
+def returns_df(ticker, start_date='2019-01-01', end_date='2020-12-31'):
+    """
+    Fn to get a synthetic dataframe with a Returns column
+    """
+    df = synthetic_provider().get_history(ticker, start_date, end_date)
+    return stock_dataframe(ticker, None, df).returns()
+
+
+class test_risk(unittest.TestCase):
+
+    tickers = synthetic_provider.tickers(4)
+    dfs = {t: returns_df(t) for t in tickers}
+    base_df = returns_df('BASE.L')
+    risk_free_df = returns_df('GILT.L')
+
+    def rebased(self, df, end, window):
+        """
+        Fn to get a trailing window of df with Returns rebased to 1 at its start
+        """
+        df = df.iloc[end - window + 1:end + 1]
+        return stock_dataframe('', None, df.copy()).returns()
+
+    def test_rolling_return_metrics(self):
+        """
+        Fn to test rolling metrics equal get_return_metrics over each window
+        """
+        window = 60
+        df = self.dfs[self.tickers[0]]
+        rolling = risk.rolling_return_metrics(df, self.base_df,
+                                              self.risk_free_df, window)
+        self.assertTrue(rolling.iloc[:window - 1].isna().all().all())
+        for end in (window - 1, 200, len(df) - 1):
+            expected = metrics.get_return_metrics(
+                self.rebased(df, end, window),
+                self.rebased(self.base_df, end, window),
+                self.rebased(self.risk_free_df, end, window))
+            np.testing.assert_allclose(rolling.iloc[end].values,
+                                       [float(np.squeeze(v)) for v in expected],
+                                       rtol=1e-8)
+
+    def test_rolling_universe(self):
+        """
+        Fn to test rolling beta of a returns panel matches each stock
+        """
+        panel = pd.DataFrame({t: df['Returns'] for t, df in self.dfs.items()})
+        beta = risk.rolling_beta(panel, self.base_df['Returns'], 30)
+        single = risk.rolling_beta(self.dfs[self.tickers[2]]['Returns'],
+                                   self.base_df['Returns'], 30)
+        pd.testing.assert_series_equal(beta[self.tickers[2]], single,
+                                       check_names=False)
+
+    def test_universe_return_metrics(self):
+        """
+        Fn to test universe metrics match get_return_metrics for each stock
+        """
+        panel = pd.DataFrame({t: df['Returns'] for t, df in self.dfs.items()})
+        result = risk.universe_return_metrics(panel, self.base_df['Returns'],
+                                              self.risk_free_df['Returns'])
+        for ticker, df in self.dfs.items():
+            expected = metrics.get_return_metrics(df, self.base_df,
+                                                  self.risk_free_df)
+            np.testing.assert_allclose(result.loc[ticker].values,
+                                       [float(np.squeeze(v)) for v in expected],
+                                       rtol=1e-8)
+
+    def test_rolling_covariance_matrix(self):
+        """
+        Fn to test rolling covariance and correlation matrices against numpy
+        """
+        panel = pd.DataFrame({t: df['Close'].pct_change()
+                              for t, df in self.dfs.items()}).iloc[1:]
+        cov = risk.rolling_covariance_matrix(panel, 40)
+        self.assertEqual(cov.shape, (len(panel), 4, 4))
+        self.assertTrue(np.isnan(cov[38]).all())
+        for end in (39, 300, len(panel) - 1):
+            window = panel.iloc[end - 39:end + 1].to_numpy()
+            np.testing.assert_allclose(cov[end], np.cov(window.T), rtol=1e-8)
+        corr = risk.rolling_covariance_matrix(panel, 40, correlation=True,
+                                              dates=panel.index[[10, -1]])
+        self.assertTrue(np.isnan(corr[0]).all())
+        np.testing.assert_allclose(corr[1], np.corrcoef(window.T), rtol=1e-8)
+        with self.assertRaises(KeyError):
+            risk.rolling_covariance_matrix(panel, 40, dates=[panel.index[-1],
+                                                             '1999-01-01'])
+
+
+if __name__ == '__main__':
+    unittest.main()
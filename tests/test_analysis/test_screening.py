@@ -0,0 +1,115 @@
+"""
+Unit testing for screening a universe on latest indicator values
+"""
+
+
+import copy
+import unittest
+import numpy as np
+import pandas as pd
+
+
+from isiver_utils.analysis.backtest import crossed_above
+from isiver_utils.analysis.screening import screen_table, compile_filter
+from isiver_utils.data import synthetic_provider
+from isiver_utils.data.universe import load_universe
+
+
+class test_screening(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        tickers = synthetic_provider.tickers(30)
+        cls.stock_classes, _ = load_universe(tickers, '2020-01-01',
+                                             provider=synthetic_provider(),
+                                             processes=0)
+
+    def setUp(self):
+        self.table = screen_table.from_stock_classes(self.stock_classes)
+
+    def expected(self, condition):
+        return [ticker for ticker, stock_class in self.stock_classes.items()
+                if condition(stock_class.df)]
+
+    def test_filters_match_dataframes(self):
+        """
+        Fn to test filters select the same tickers as filtering each stock
+        dataframe
+        """
+        cases = {
+            'RSI_14 below 50': lambda df: df['Close_RSI_14'].iloc[-1] < 50,
+            'Close crossed above Close_MA_30 or Close crossed below MA_30 today':
+                lambda df: crossed_above(df['Close'], df['Close_MA_30']).iloc[-1]
+                or crossed_above(df['Close_MA_30'], df['Close']).iloc[-1],
+            'not (RSI_14 between 40 and 60) and Close > MA_50 * 1.01':
+                lambda df: not 40 <= df['Close_RSI_14'].iloc[-1] <= 60 and
+                df['Close'].iloc[-1] > df['Close_MA_50'].iloc[-1] * 1.01,
+            '(Close - Close_MA_50) / std_26 >= -1.5':
+                lambda df: (df['Close'].iloc[-1] - df['Close_MA_50'].iloc[-1]) /
+                df['Close_std_26'].iloc[-1] >= -1.5,
+        }
+        for expression, condition in cases.items():
+            self.assertEqual(list(self.table.screen(expression).index),
+                             self.expected(condition), expression)
+        self.assertTrue(self.expected(
+            list(cases.values())[1]))                                           # crossover case has matches
+
+    def test_screen_output(self):
+        """
+        Fn to test screen returns the latest values of the filter's columns
+        """
+        result = self.table.screen('RSI_14 < 50 and Close > 0')
+        self.assertEqual(list(result.columns), ['Date', 'RSI_14', 'Close'])
+        ticker = result.index[0]
+        df = self.stock_classes[ticker].df
+        self.assertEqual(result.loc[ticker, 'Date'], df.index[-1])
+        self.assertEqual(result.loc[ticker, 'RSI_14'], df['Close_RSI_14'].iloc[-1])
+        pd.testing.assert_frame_equal(
+            self.table.snapshot(1).loc[[ticker]].iloc[:, :3],
+            df.iloc[[-2], :3].set_axis(pd.Index([ticker], name='Ticker')),
+            check_dtype=False)
+
+    def test_incremental_refresh(self):
+        """
+        Fn to test updating or removing tickers matches rebuilding the table,
+        and tickers without the latest date are excluded unless stale
+        """
+        ticker = self.table.tickers[3]
+        stock_classes = dict(self.stock_classes)
+        stock_classes[ticker] = copy.copy(stock_classes[ticker])
+        stock_classes[ticker].df = stock_classes[ticker].df.iloc[:-1]
+        self.table.refresh(stock_classes, [ticker])
+        rebuilt = screen_table.from_stock_classes(stock_classes)
+        pd.testing.assert_frame_equal(self.table.snapshot(),
+                                      rebuilt.snapshot())
+        self.assertFalse(self.table.mask('Close > 0')[3])
+        self.assertTrue(self.table.mask('Close > 0', stale=True)[3])
+
+        self.table.remove(self.table.tickers[0])
+        self.assertEqual(len(self.table.tickers), 29)
+        self.assertEqual(self.table.tickers[0], rebuilt.tickers[-1])
+        pd.testing.assert_frame_equal(
+            self.table.snapshot().sort_index(),
+            rebuilt.snapshot().drop(rebuilt.tickers[0]).sort_index())
+
+        df = pd.DataFrame({'Close': [1., 2.], 'Score': [0., 5.]},
+                          index=pd.bdate_range(end=rebuilt.dates[0],
+                                               periods=2))
+        self.table.update('NEW.L', df)
+        self.assertEqual(list(self.table.screen('Score > 1').index), ['NEW.L'])
+
+    def test_errors(self):
+        """
+        Fn to test invalid filters and unknown columns raise
+        """
+        for expression in ('RSI_14 below', 'RSI_14 30', 'Close crossed 30',
+                           '(RSI_14 < 30', 'RSI_14 < 30 $'):
+            with self.assertRaises(ValueError):
+                compile_filter(expression)
+        with self.assertRaises(KeyError):
+            self.table.mask('Missing_Column > 1')
+        self.assertTrue(np.array_equal(screen_table().mask('1 < 2'), []))
+
+
+if __name__ == '__main__':
+    unittest.main()
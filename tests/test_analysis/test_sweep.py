@@ -0,0 +1,63 @@
+"""
+Unit testing for prefix sum window sweeps against the metrics functions
+"""
+
+
+import unittest
+import numpy as np
+import pandas as pd
+
+
+from isiver_utils.analysis import metrics, sweep
+from isiver_utils.data import stock_dataframe, synthetic_provider
+
+
+class test_sweep(unittest.TestCase):
+
+    def setUp(self):
+        self.close = synthetic_provider().get_history(
+            'SYNAAA.L', '2010-01-01', '2020-12-31')['Close']
+        self.close.iloc[[50, 51, 400]] = np.nan
+
+    def test_sweeps_match_metrics(self):
+        """
+        Fn to test each sweep matches calling the metric per window,
+        including nan handling
+        """
+        windows = list(range(2, 60)) + [250]
+        for metric, kwargs in ((metrics.moving_average, {}), (metrics.std, {}),
+                               (metrics.rsi, {}),
+                               (metrics.bollinger, {'bound': 'Lower'}),
+                               (metrics.exp_moving_average, {})):
+            result = sweep.sweep(metric, self.close, windows, **kwargs)
+            self.assertEqual(list(result.columns), windows)
+            expected = pd.DataFrame({w: metric(self.close, w, **kwargs)
+                                     for w in windows})
+            pd.testing.assert_frame_equal(result, expected, rtol=1e-8,
+                                          atol=1e-5, check_names=False)
+
+    def test_rolling_sums_short(self):
+        """
+        Fn to test windows longer than the data are all nan
+        """
+        out = sweep.rolling_sums(np.arange(4.), [2, 5])
+        np.testing.assert_array_equal(out[:, 0], [np.nan, 1, 3, 5])
+        self.assertTrue(np.isnan(out[:, 1]).all())
+
+    def test_add_sweep_columns(self):
+        """
+        Fn to test sweep columns match add_metric_column
+        """
+        df = synthetic_provider().get_history('SYNAAA.L', '2019-01-01',
+                                              '2020-12-31')
+        swept = stock_dataframe('SYNAAA_L', None, df.copy())
+        swept.add_sweep_columns(metrics.rsi, ['Close', 'Open'], range(5, 30, 5),
+                                'RSI')
+        single = stock_dataframe('SYNAAA_L', None, df.copy())
+        single.add_metric_column(metrics.rsi, ['Close', 'Open'],
+                                 range(5, 30, 5), 'RSI')
+        pd.testing.assert_frame_equal(swept.df, single.df, rtol=1e-8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Unit testing for caching file and price_cache class
+"""
+
+
+import os
+import tempfile
+import unittest
+import pandas as pd
+from datetime import datetime, timedelta
+
+
+from isiver_utils.data import price_cache, stock_dataframe
+
+
+class counting_fetch():
+    """
+    Fake download fn returning deterministic business day prices and recording
+    each requested range
+    """
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, start, end):
+        self.calls.append((pd.Timestamp(start), pd.Timestamp(end)))
+        index = pd.bdate_range(start, end, name='Date')
+        close = (index - pd.Timestamp('2000-01-01')).days.to_numpy(float)
+        return pd.DataFrame({'Open': close, 'High': close + 1,
+                             'Low': close - 1, 'Close': close,
+                             'AdjClose': close, 'Volume': close * 10.0},
+                            index=index)
+
+
+class test_price_cache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.fetch = counting_fetch()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cache_hit(self):
+        """
+        Fn to test a repeated request is served from disk without downloading
+        """
+        cache = price_cache(self.tmp.name)
+        first = cache.get('TEST.L', '2020-01-01', '2020-06-30', self.fetch)
+        second = cache.get('TEST.L', '2020-02-01', '2020-06-30', self.fetch)
+        self.assertEqual(len(self.fetch.calls), 1)
+        pd.testing.assert_frame_equal(second, first[first.index >= '2020-02-01'],
+                                      check_freq=False)
+
+    def test_missing_ranges(self):
+        """
+        Fn to test only dates outside the cached range are downloaded
+        """
+        cache = price_cache(self.tmp.name)
+        cache.get('TEST.L', '2020-03-01', '2020-06-30', self.fetch)
+        df = cache.get('TEST.L', '2020-01-01', '2020-09-30', self.fetch)
+        self.assertEqual(self.fetch.calls[1],
+                         (pd.Timestamp('2020-01-01'), pd.Timestamp('2020-03-01')))
+        self.assertEqual(self.fetch.calls[2][1], pd.Timestamp('2020-09-30'))
+        self.assertTrue(df.index.is_unique and df.index.is_monotonic_increasing)
+        pd.testing.assert_frame_equal(
+            df, self.fetch(pd.Timestamp('2020-01-01'), pd.Timestamp('2020-09-30')),
+            check_freq=False)
+
+    def test_staleness(self):
+        """
+        Fn to test the last bar is refetched once a recent entry is stale
+        """
+        cache = price_cache(self.tmp.name, max_age=timedelta(0))
+        today = datetime.today()
+        cache.get('TEST.L', today - timedelta(days=30), today, self.fetch)
+        cache.get('TEST.L', today - timedelta(days=30), today, self.fetch)
+        self.assertEqual(len(self.fetch.calls), 2)
+        self.assertGreaterEqual(self.fetch.calls[1][0],
+                                pd.Timestamp(today - timedelta(days=5)).normalize())
+
+    def test_eviction(self):
+        """
+        Fn to test least recently used tickers are evicted beyond max_bytes
+        """
+        cache = price_cache(self.tmp.name)
+        cache.get('A', '2020-01-01', '2020-12-31', self.fetch)
+        size = os.path.getsize(cache.path('A'))
+        cache.max_bytes = int(size * 2.5)
+        cache.get('B', '2020-01-01', '2020-12-31', self.fetch)
+        os.utime(cache.path('A'), (0, 0))
+        cache.get('C', '2020-01-01', '2020-12-31', self.fetch)
+        self.assertFalse(os.path.exists(cache.path('A')))
+        self.assertTrue(os.path.exists(cache.path('B')))
+        self.assertTrue(os.path.exists(cache.path('C')))
+
+    def test_download_data(self):
+        """
+        Fn to test stock_dataframe.download_data reads through the cache
+        """
+        cache = price_cache(self.tmp.name)
+        stock_class = stock_dataframe('TEST_L', '2020-01-01', pd.DataFrame(),
+                                      price_cache=cache)
+        stock_class.fetch_data = self.fetch
+        stock_class.download_data()
+        stock_class.download_data()
+        self.assertEqual(len(self.fetch.calls), 1)
+        self.assertTrue(os.path.exists(cache.path('TEST.L')))
+
+        del stock_class.__dict__['price_cache']                                 # as pickled before price caching
+        stock_class.download_data()
+        self.assertEqual(len(self.fetch.calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+"""
+Unit testing for cleaning file, checks vectorised unit conversion against the
+original stock_dataframe loop
+"""
+
+
+import unittest
+import warnings
+import numpy as np
+import pandas as pd
+
+
+from isiver_utils.data import stock_dataframe
+from isiver_utils.data import cleaning
+
+
+def unit_switch_df(n_rows, seed):
+    """
+    Fn to generate an OHLCV dataframe in pence with random stretches quoted in
+    pounds, as returned by yfinance for some LSE stocks
+    """
+    rng = np.random.default_rng(seed)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.01, n_rows)))
+    prices = np.column_stack([close * (1 + rng.normal(0, 0.002, n_rows))
+                              for _ in range(5)])
+    pounds = np.zeros(n_rows, dtype=bool)
+    for start in rng.integers(0, n_rows, 4):
+        pounds[start:start + rng.integers(1, n_rows // 4)] = True
+    prices[pounds] /= 100
+    prices[rng.integers(0, n_rows, 3), rng.integers(0, 5, 3)] /= 100
+    df = pd.DataFrame(prices, index=pd.bdate_range('2019-01-01', periods=n_rows),
+                      columns=['Open', 'High', 'Low', 'Close', 'AdjClose'])
+    df['Volume'] = rng.integers(1e4, 1e6, n_rows).astype(float)
+    return df
+
+
+class test_cleaning(unittest.TestCase):
+
+    def loop_rescale(self, df):
+        stock_class = stock_dataframe('TEST', None, df.copy())
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', FutureWarning)
+            self.assertTrue(stock_class.rescale_units_loop())
+        return stock_class.df
+
+    def test_rescale_parity(self):
+        """
+        Fn to test rescale_units gives the same output as the row by row loop
+        over a range of random unit switches
+        """
+        for seed in range(20):
+            df = unit_switch_df(120, seed)
+            expected = self.loop_rescale(df)
+            result = cleaning.rescale_units(df)
+            np.testing.assert_allclose(result.values, expected.values,
+                                       rtol=1e-12)
+
+    def test_rescale_edge_cases(self):
+        """
+        Fn to test rescale_units matches the loop on a leading pound price,
+        repeated switches and missing values
+        """
+        close = [1.0, 1.0, 100.0, 1.0, 100.0, np.nan, 1.0, 100.0, 0.5, 0.5]
+        df = pd.DataFrame({c: close for c in ['Open', 'Close']},
+                          index=pd.bdate_range('2020-01-01', periods=10))
+        df['Volume'] = 1.0
+        expected = self.loop_rescale(df)
+        result = cleaning.rescale_units(df)
+        np.testing.assert_allclose(result.values, expected.values, rtol=1e-12)
+
+    def test_clean_data(self):
+        """
+        Fn to test both clean_data paths produce the same cleaned dataframe
+        """
+        df = unit_switch_df(80, 0)
+        vectorised = stock_dataframe('TEST', None, df.copy()).clean_data()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', FutureWarning)
+            loop = stock_dataframe('TEST', None, df.copy()).clean_data(
+                vectorised=False)
+        pd.testing.assert_frame_equal(vectorised, loop, rtol=1e-12)
+
+
+    def gappy_df(self):
+        """
+        Fn to get a dataframe missing a single day, a three day gap and a
+        weekend row
+        """
+        df = unit_switch_df(40, 1).iloc[:, [0, 5]]
+        df = df.drop(df.index[[5, 12, 13, 14]])
+        saturday = df.index[0] + pd.Timedelta(days=5 - df.index[0].dayofweek)
+        return pd.concat([df, df.iloc[[0]].set_axis([saturday])]).sort_index()
+
+    def test_fill_gaps_methods(self):
+        """
+        Fn to test linear and ffill gap filling against pandas, and that the
+        spline mode matches the original clean_data
+        """
+        df = self.gappy_df()
+        expected = df.asfreq('D')
+        expected = expected[expected.index.dayofweek < 5]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)                        # scipy smoothing spline iterations
+            pd.testing.assert_frame_equal(
+                cleaning.fill_gaps(df, method='spline'),
+                expected.interpolate(method='spline', order=1),
+                check_freq=False)
+        pd.testing.assert_frame_equal(
+            cleaning.fill_gaps(df), expected.interpolate(method='linear'),
+            check_freq=False)
+        pd.testing.assert_frame_equal(cleaning.fill_gaps(df, method='ffill'),
+                                      expected.ffill(), check_freq=False)
+        self.assertEqual(cleaning.fill_gaps(df, method=None).isna().sum().sum(),
+                         8)
+
+    def test_fill_gaps_linear_edges(self):
+        """
+        Fn to test linear filling leaves leading gaps and carries the last
+        value over trailing gaps, as pandas interpolate does
+        """
+        df = pd.DataFrame({'Close': [np.nan, np.nan, 3., np.nan, 5., np.nan]},
+                          index=pd.bdate_range('2021-03-01', periods=6))
+        filled = cleaning.fill_gaps(df)
+        np.testing.assert_array_equal(filled['Close'],
+                                      [np.nan, np.nan, 3, 4, 5, 5])
+        pd.testing.assert_frame_equal(filled, df.interpolate(method='linear'),
+                                      check_freq=False)
+
+    def test_fill_gaps_max_gap(self):
+        """
+        Fn to test gaps longer than max_gap are left missing
+        """
+        df = self.gappy_df()
+        filled = cleaning.fill_gaps(df, max_gap=2)
+        self.assertFalse(filled.iloc[5].isna().any())
+        self.assertTrue(filled.iloc[12:15].isna().all().all())
+        self.assertEqual(filled.isna().sum().sum(), 6)
+
+    def test_trading_days(self):
+        """
+        Fn to test LSE holidays, including weekend substitutes, are removed
+        """
+        holidays = cleaning.lse_calendar().holidays('2021-01-01', '2021-12-31')
+        self.assertEqual([str(d.date()) for d in holidays],
+                         ['2021-01-01', '2021-04-02', '2021-04-05',
+                          '2021-05-03', '2021-05-31', '2021-08-30',
+                          '2021-12-27', '2021-12-28'])
+        days = cleaning.trading_days('2021-12-20', '2021-12-31', 'LSE')
+        self.assertEqual(len(days), 8)
+        df = pd.DataFrame({'Close': [1., 2.]},
+                          index=pd.DatetimeIndex(['2021-12-24', '2021-12-29']))
+        filled = cleaning.fill_gaps(df, holidays='LSE')
+        self.assertEqual(list(filled['Close']), [1., 2.])
+        with self.assertRaises(ValueError):
+            cleaning.trading_days('2021-12-20', '2021-12-31', 'NYSE')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Unit testing for the columnar storage of stock dataframes
+"""
+
+
+import os
+import pickle
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+
+from isiver_utils.data import stock_dataframe, synthetic_provider
+from isiver_utils.data import columnar_store
+
+
+class test_columnar_store(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, 'SYNAAA.L')
+        self.stock_class = stock_dataframe('SYNAAA_L', '2020-01-01',
+                                           pd.DataFrame(),
+                                           provider=synthetic_provider())
+        self.stock_class.new_stock_df()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        """
+        Fn to test a stored stock dataframe loads back unchanged, with or
+        without memory mapping
+        """
+        columnar_store.save_stock_class(self.stock_class, self.directory)
+        for mmap in (True, False):
+            df = columnar_store.load_df(self.directory, mmap=mmap)
+            pd.testing.assert_frame_equal(df, self.stock_class.df,
+                                          check_freq=False)
+
+    def test_selected_columns(self):
+        """
+        Fn to test only requested columns are loaded
+        """
+        columnar_store.save_stock_class(self.stock_class, self.directory)
+        df = columnar_store.load_df(self.directory, columns=['Close', 'Volume'])
+        self.assertEqual(list(df.columns), ['Close', 'Volume'])
+        np.testing.assert_array_equal(df['Close'],
+                                      self.stock_class.df['Close'])
+
+    def test_append(self):
+        """
+        Fn to test only dates after the stored data are appended
+        """
+        df = self.stock_class.df
+        columnar_store.save_df(df.iloc[:-10], self.directory)
+        self.assertEqual(columnar_store.append_df(df, self.directory), 10)
+        self.assertEqual(columnar_store.append_df(df, self.directory), 0)
+        pd.testing.assert_frame_equal(columnar_store.load_df(self.directory),
+                                      df, check_freq=False)
+        with self.assertRaises(ValueError):
+            columnar_store.append_df(df[['Close']], self.directory)
+
+    def test_lazy_stock_class(self):
+        """
+        Fn to test a loaded stock class only reads its dataframe when used,
+        and saves appended rows back
+        """
+        df = self.stock_class.df
+        columnar_store.save_df(df.iloc[:-5], self.directory, 'SYNAAA.L',
+                               '2020-01-01')
+        stock_class = columnar_store.load_stock_class(
+            self.directory, provider=synthetic_provider())
+        self.assertIsNone(stock_class._df)
+        self.assertEqual(stock_class.ticker, 'SYNAAA.L')
+        self.assertEqual(len(stock_class.df), len(df) - 5)
+
+        stock_class.df = df.copy()
+        stock_class.save()
+        self.assertEqual(columnar_store.read_manifest(self.directory)['rows'],
+                         len(df))
+        pd.testing.assert_frame_equal(columnar_store.load_df(self.directory),
+                                      df, check_freq=False)
+
+    def test_save_changed_values(self):
+        """
+        Fn to test saving rewrites the store when stored rows have changed
+        rather than only appending new rows
+        """
+        df = self.stock_class.df
+        columnar_store.save_df(df.iloc[:-5], self.directory, 'SYNAAA.L')
+        stock_class = columnar_store.load_stock_class(self.directory)
+        changed = df.copy()
+        changed['Close'] /= 100
+        stock_class.df = changed
+        stock_class.save()
+        pd.testing.assert_frame_equal(columnar_store.load_df(self.directory),
+                                      changed, check_freq=False)
+
+    def test_save_selected_columns(self):
+        """
+        Fn to test saving a stock class loaded with some columns keeps the
+        other stored columns
+        """
+        df = self.stock_class.df
+        columnar_store.save_df(df, self.directory, 'SYNAAA.L')
+        stock_class = columnar_store.load_stock_class(self.directory,
+                                                      columns=['Close'])
+        stock_class.df = stock_class.df * 2
+        stock_class.df['Close_x'] = 1.
+        stock_class.save()
+        stored = columnar_store.load_df(self.directory)
+        self.assertEqual(list(stored.columns), list(df.columns) + ['Close_x'])
+        np.testing.assert_array_equal(stored['Close'], df['Close'] * 2)
+        np.testing.assert_array_equal(stored['Open'], df['Open'])
+
+        stock_class.df = stock_class.df.iloc[:-1]
+        with self.assertRaises(ValueError):
+            stock_class.save()
+
+    def test_convert_pickle(self):
+        """
+        Fn to test conversion of a pickled stock class
+        """
+        pkl_path = os.path.join(self.tmp.name, 'SYNAAA.L.pkl')
+        with open(pkl_path, 'wb') as f:
+            pickle.dump(self.stock_class, f)
+        columnar_store.convert_pickle(pkl_path, self.directory)
+        stock_class = columnar_store.load_stock_class(self.directory,
+                                                      mmap=False)
+        self.assertEqual(stock_class.start_date, '2020-01-01')
+        pd.testing.assert_frame_equal(stock_class.df, self.stock_class.df,
+                                      check_freq=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
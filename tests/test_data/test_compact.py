@@ -0,0 +1,96 @@
+"""
+Unit testing for compact dtype mode of stock_dataframe
+"""
+
+
+import unittest
+import numpy as np
+import pandas as pd
+
+
+from isiver_utils.data import stock_dataframe, synthetic_provider
+from isiver_utils.data.universe import load_universe
+
+
+class capped_provider(synthetic_provider):
+    """
+    Synthetic provider with no prices after end_date
+    """
+    end_date = pd.Timestamp('2021-06-30')
+
+    def get_history(self, ticker, start, end):
+        return super().get_history(ticker, start, min(pd.Timestamp(end),
+                                                      self.end_date))
+
+
+class test_compact(unittest.TestCase):
+
+    def new_stock_class(self, compact, provider=None, start_date='2019-01-01'):
+        stock_class = stock_dataframe('SYNAAA_L', start_date, pd.DataFrame(),
+                                      provider=provider or synthetic_provider(),
+                                      compact=compact)
+        stock_class.new_stock_df()
+        return stock_class
+
+    def assert_within_tolerance(self, compact_df, full_df, rtol):
+        """
+        Fn to check every column of compact_df is within rtol of full_df,
+        relative to the scale of the column
+        """
+        self.assertEqual(list(compact_df.columns), list(full_df.columns))
+        for c in full_df.columns:
+            expected = full_df[c].to_numpy(dtype=float)
+            scale = np.nanmax(np.abs(expected))
+            np.testing.assert_allclose(compact_df[c].to_numpy(dtype=float),
+                                       expected, rtol=0, atol=rtol * scale,
+                                       err_msg=c)
+
+    def test_compact_dtypes(self):
+        """
+        Fn to test downcast dtypes, memory saving and that values stay within
+        float32 rounding of the float64 results
+        """
+        full = self.new_stock_class(False)
+        compact = self.new_stock_class(True)
+        self.assertIsNone(full.memory_report)
+        self.assertTrue(np.issubdtype(compact.df['Volume'].dtype, np.integer))
+        self.assertTrue((compact.df.drop(columns='Volume').dtypes ==
+                         np.float32).all())
+        report = compact.memory_report
+        self.assertLess(report['after'], 0.6 * report['before'])
+        self.assert_within_tolerance(compact.df, full.df, 1e-6)
+
+    def test_compact_update(self):
+        """
+        Fn to test incremental updates of a compact dataframe stay compact and
+        within tolerance of the float64 update
+        """
+        provider = capped_provider()
+        full = self.new_stock_class(False, provider, '2016-01-01')
+        compact = self.new_stock_class(True, provider, '2016-01-01')
+        provider.end_date = pd.Timestamp('2021-09-30')
+        before = compact.df.copy()
+        full.update_stock_df()
+        compact.update_stock_df()
+        self.assertEqual(compact.df['Close'].dtype, np.float32)
+        self.assertTrue(np.issubdtype(compact.df['Volume'].dtype, np.integer))
+        self.assert_within_tolerance(compact.df, full.df, 1e-5)
+        head = len(before) - 700                                                # rows beyond the metric lookbacks are left as stored
+        self.assertGreater(head, 0)
+        pd.testing.assert_frame_equal(compact.df.iloc[:head],
+                                      before.iloc[:head], check_freq=False)
+
+    def test_compact_universe(self):
+        """
+        Fn to test compact mode passes through batch preprocessing
+        """
+        stock_classes, failures = load_universe(
+            synthetic_provider.tickers(2), '2020-01-01',
+            provider=synthetic_provider(), processes=0, compact=True)
+        self.assertEqual(failures, {})
+        for stock_class in stock_classes.values():
+            self.assertEqual(stock_class.df['Close'].dtype, np.float32)
+
+
+if __name__ == '__main__':
+    unittest.main()
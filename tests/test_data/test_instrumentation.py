@@ -0,0 +1,74 @@
+"""
+Unit testing for per stage instrumentation of stock_dataframe
+"""
+
+
+import unittest
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+
+
+from isiver_utils.data import stock_dataframe, synthetic_provider
+from isiver_utils.data.instrumentation import instrumentation
+from isiver_utils.plotting import visualisation
+
+
+class test_instrumentation(unittest.TestCase):
+
+    def new_stock_class(self, instr=None):
+        stock_class = stock_dataframe('SYNAAA_L', '2020-01-01', pd.DataFrame(),
+                                      provider=synthetic_provider(),
+                                      instrumentation=instr)
+        stock_class.new_stock_df()
+        return stock_class
+
+    def test_stage_records(self):
+        """
+        Fn to test each stage is recorded with rows, nesting and memory, and
+        passed to the callback
+        """
+        exported = []
+        instr = instrumentation(callback=exported.append)
+        stock_class = self.new_stock_class(instr)
+        stages = [r['stage'] for r in instr.records]
+        self.assertEqual(stages, ['download_data', 'clean_data', 'returns',
+                                  'get_default_metrics', 'pre_process'])
+        self.assertEqual(exported, instr.records)
+        records = {r['stage']: r for r in instr.records}
+        self.assertEqual(records['pre_process']['depth'], 0)
+        self.assertEqual(records['clean_data']['depth'], 1)
+        self.assertEqual(records['get_default_metrics']['rows'],
+                         len(stock_class.df))
+        self.assertGreater(records['get_default_metrics']['memory_delta'], 0)
+        self.assertTrue(all(r['seconds'] >= 0 for r in instr.records))
+
+        stock_class.add_metric_column(lambda c, w: c.diff(w), ['Close'], (5,),
+                                      'diff')
+        visualisation.daily_ohlcv(stock_class, output_window=False)
+        plt.close('all')
+        summary = instr.summary()
+        for stage in ('add_metric_column', 'draw_daily_ohlcv', 'process_fig'):
+            self.assertEqual(summary.loc[stage, 'runs'], 1)
+
+    def test_trace_memory(self):
+        """
+        Fn to test memory deltas from tracemalloc
+        """
+        instr = instrumentation(trace_memory=True)
+        self.new_stock_class(instr)
+        records = instr.to_dataframe().set_index('stage')
+        self.assertGreater(records.loc['download_data', 'memory_delta'], 0)
+
+    def test_disabled(self):
+        """
+        Fn to test results are unchanged without instrumentation
+        """
+        instr = instrumentation()
+        pd.testing.assert_frame_equal(self.new_stock_class().df,
+                                      self.new_stock_class(instr).df)
+
+
+if __name__ == '__main__':
+    unittest.main()
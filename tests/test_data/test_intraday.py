@@ -0,0 +1,112 @@
+"""
+Unit testing for minute bar accumulation and OHLCV resampling
+"""
+
+
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+
+from isiver_utils.data import stock_dataframe, synthetic_provider
+from isiver_utils.data.intraday import resample_ohlcv, intraday_store, \
+    aggregations
+
+
+class capped_provider(synthetic_provider):
+    """
+    Synthetic provider whose intraday bars stop at now, to simulate updates
+    """
+    now = pd.Timestamp('2020-12-09 11:07')
+
+    def get_intraday(self, ticker, start, end, interval='1m'):
+        return super().get_intraday(ticker, start, min(pd.Timestamp(end),
+                                                       self.now), interval)
+
+
+class test_intraday(unittest.TestCase):
+
+    def setUp(self):
+        self.bars = synthetic_provider().get_intraday(
+            'SYNAAA.L', '2020-12-01', '2020-12-09 16:30')
+
+    def test_resample_ohlcv(self):
+        """
+        Fn to test bars match pandas resample with empty bins dropped, for bars
+        with missing minutes and nan values, first and last skipping nan
+        """
+        bars = self.bars.drop(self.bars.index[100:160])
+        bars.iloc[5, [1, 2]] = np.nan
+        bars.iloc[7, 5] = np.nan
+        bars.iloc[[0, 15, 30], 0] = np.nan                                      # first bar of 5min and 15min bins
+        bars.iloc[[4, 14, 59], [3, 4]] = np.nan                                 # last bar of bins
+        bars.iloc[20:25, 0] = np.nan                                            # whole 5min bin
+        for rule in ('5min', '15min', '1h', 'D'):
+            result = resample_ohlcv(bars, rule)
+            resampled = bars.resample(rule)
+            expected = resampled.agg(aggregations)[resampled.size() > 0]
+            pd.testing.assert_frame_equal(result, expected, check_freq=False)
+        self.assertFalse((resample_ohlcv(bars, '1h').index.dayofweek > 4).any())
+        with self.assertRaises(ValueError):
+            resample_ohlcv(bars.iloc[::-1], '5min')
+
+    def test_intraday_store(self):
+        """
+        Fn to test bars accumulate in a compact store, ignoring bars already
+        stored
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            store = intraday_store(tmp, 'SYNAAA.L')
+            self.assertIsNone(store.last())
+            self.assertEqual(store.append(self.bars.iloc[:1000]), 1000)
+            self.assertEqual(store.append(self.bars.iloc[500:]),
+                             len(self.bars) - 1000)
+            self.assertEqual(store.last(), self.bars.index[-1])
+            loaded = store.load()
+            self.assertEqual(loaded['Close'].dtype, np.float32)
+            self.assertEqual(loaded['Volume'].dtype, np.int64)
+            np.testing.assert_allclose(loaded['Close'], self.bars['Close'],
+                                       rtol=1e-6)
+            part = store.load('2020-12-02', '2020-12-03 12:00')
+            self.assertEqual(part.index[0], pd.Timestamp('2020-12-02 08:00'))
+            self.assertEqual(part.index[-1], pd.Timestamp('2020-12-03 12:00'))
+            self.assertEqual(len(store.resample('D')), 7)
+
+    def test_stock_dataframe(self):
+        """
+        Fn to test a stock class built from minute bars has default metrics at
+        the bar frequency, and updating recalculates only new bars
+        """
+        for rule, bar_store in (('15min', None), ('1h', True)):
+            with tempfile.TemporaryDirectory() as tmp:
+                capped_provider.now = pd.Timestamp('2020-12-09 11:07')
+                stock_class = stock_dataframe(
+                    'SYNAAA_L', '2020-12-01', pd.DataFrame(),
+                    provider=capped_provider(), frequency=rule,
+                    bar_store=intraday_store(tmp) if bar_store else None)
+                stock_class.new_stock_df()
+                df = stock_class.df
+                self.assertEqual(df.index[-1], pd.Timestamp('2020-12-09 11:00'))
+                self.assertTrue((df.index.hour >= 8).all())
+                self.assertTrue((df.index.hour <= 16).all())
+                self.assertIn('Close_RSI_14', df)
+                pd.testing.assert_frame_equal(
+                    df[list(aggregations)],
+                    resample_ohlcv(self.bars[:'2020-12-09 11:07'], rule),
+                    check_freq=False, rtol=1e-6)
+
+                capped_provider.now = pd.Timestamp('2020-12-09 15:43')
+                stock_class.update_stock_df()
+                full = stock_dataframe('SYNAAA_L', '2020-12-01',
+                                       stock_class.get_bars('2020-12-01'),
+                                       frequency=rule)
+                full.pre_process(True)
+                pd.testing.assert_frame_equal(stock_class.df, full.df,
+                                              rtol=1e-8, check_freq=False)
+                self.assertEqual(stock_class.update_stock_df().shape,
+                                 full.df.shape)
+
+
+if __name__ == '__main__':
+    unittest.main()
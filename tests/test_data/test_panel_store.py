@@ -0,0 +1,86 @@
+"""
+Unit testing for the memory mapped multi ticker panel store
+"""
+
+
+import pickle
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+
+from isiver_utils.analysis import metrics
+from isiver_utils.analysis.panel_metrics import price_panel
+from isiver_utils.data import stock_dataframe, synthetic_provider
+from isiver_utils.data.panel_store import save_panel, panel_store
+
+
+def last_close_rsi(store):
+    """
+    Process pool worker reading a panel shared by path
+    """
+    return metrics.rsi(store.field('Close'), 14).iloc[-1]
+
+
+class test_panel_store(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        provider = synthetic_provider()
+        self.stock_classes = {}
+        for ticker, start in zip(synthetic_provider.tickers(3),
+                                 ('2020-01-01', '2020-01-01', '2020-03-01')):
+            stock_class = stock_dataframe(ticker, start, pd.DataFrame(),
+                                          provider=provider)
+            stock_class.new_stock_df()
+            self.stock_classes[ticker] = stock_class
+        self.store = save_panel(self.stock_classes, self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_slices(self):
+        """
+        Fn to test field and ticker slices match the saved dataframes
+        """
+        close = self.store.field('Close')
+        pd.testing.assert_frame_equal(close, price_panel(self.stock_classes),
+                                      check_freq=False, check_names=False)
+        for ticker, stock_class in self.stock_classes.items():
+            df = stock_class.df
+            pd.testing.assert_frame_equal(self.store.ticker(ticker).loc[df.index],
+                                          df, check_freq=False)
+        self.assertEqual(self.store.array.shape,
+                         (len(self.store.dates), 3, len(self.store.fields)))
+        ticker = self.store.tickers[1]
+        part = self.store.field('Open', [ticker], ('2020-06-01', '2020-06-30'))
+        np.testing.assert_array_equal(
+            part[ticker], self.stock_classes[ticker].df.loc[
+                '2020-06-01':'2020-06-30', 'Open'])
+
+    def test_metrics_on_field(self):
+        """
+        Fn to test metrics applied to a field panel match each stock
+        """
+        ma = metrics.moving_average(self.store.field('Close'), 30)
+        for ticker, stock_class in self.stock_classes.items():
+            df = stock_class.df
+            np.testing.assert_allclose(ma.loc[df.index, ticker],
+                                       df['Close_MA_30'], rtol=1e-9)
+
+    def test_shared_read_only(self):
+        """
+        Fn to test a pickled store reopens the map rather than copying data,
+        and can be read from worker processes
+        """
+        self.assertLess(len(pickle.dumps(self.store)), 1000)
+        self.assertFalse(self.store.data.flags.writeable)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            result = executor.submit(last_close_rsi, self.store).result()
+        pd.testing.assert_series_equal(result, last_close_rsi(self.store))
+
+
+if __name__ == '__main__':
+    unittest.main()
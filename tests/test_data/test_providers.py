@@ -0,0 +1,111 @@
+"""
+Unit testing for providers file, runs the stock_dataframe pipeline offline
+"""
+
+
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+
+from isiver_utils.data import stock_dataframe, synthetic_provider, csv_provider
+
+
+class test_providers(unittest.TestCase):
+
+    def test_synthetic_deterministic(self):
+        """
+        Fn to test synthetic prices only depend on ticker and date, not on the
+        requested range
+        """
+        provider = synthetic_provider(seed=1)
+        full = provider.get_history('SYNAAA.L', '2018-01-01', '2020-12-31')
+        part = provider.get_history('SYNAAA.L', '2019-06-01', '2019-12-31')
+        pd.testing.assert_frame_equal(part, full.loc['2019-06-01':'2019-12-31'],
+                                      check_freq=False)
+        other = provider.get_history('SYNAAB.L', '2018-01-01', '2020-12-31')
+        self.assertFalse(np.allclose(full['Close'], other['Close']))
+
+    def test_synthetic_ohlc(self):
+        """
+        Fn to test synthetic bars are valid OHLCV bars
+        """
+        df = synthetic_provider().get_history('SYNAAA.L', '2015-01-01',
+                                              '2020-01-01')
+        self.assertEqual(list(df.columns), synthetic_provider.columns)
+        self.assertTrue((df['High'] >= df[['Open', 'Close']].max(axis=1)).all())
+        self.assertTrue((df['Low'] <= df[['Open', 'Close']].min(axis=1)).all())
+        self.assertTrue((df['Volume'] > 0).all())
+        self.assertEqual(len(set(synthetic_provider.tickers(2000))), 2000)
+        self.assertEqual(len(set(synthetic_provider.tickers(26 ** 3))), 26 ** 3)
+        with self.assertRaises(ValueError):
+            synthetic_provider.tickers(26 ** 3 + 1)
+
+    def test_default_provider(self):
+        """
+        Fn to test stock classes without a provider, including those pickled
+        before providers were added, fall back to the yfinance API
+        """
+        from isiver_utils.data.providers import yahoo_provider
+        stock_class = stock_dataframe('SMT_L', None, pd.DataFrame())
+        self.assertIsInstance(stock_class.get_provider(), yahoo_provider)
+        old = stock_dataframe('SMT_L', None, pd.DataFrame(),
+                              provider=synthetic_provider())
+        del old.__dict__['provider']
+        self.assertIsInstance(old.get_provider(), yahoo_provider)
+
+    def test_yahoo_intraday_requests(self):
+        """
+        Fn to test intraday ranges are requested from yfinance in chunks of
+        at most intraday_request_days
+        """
+        from isiver_utils.data.providers import yahoo_provider
+        bars = synthetic_provider().get_intraday('SYNAAA.L', '2020-11-01',
+                                                 '2020-12-01')
+        calls = []
+
+        class recorded_api():
+            @staticmethod
+            def get_data_yahoo(ticker, start, end, interval):
+                calls.append((start, end))
+                return bars[(bars.index >= start) & (bars.index < end)].copy()
+
+        class recorded_provider(yahoo_provider):
+            @staticmethod
+            def load():
+                return recorded_api
+
+        df = recorded_provider().get_intraday('SYNAAA.L', '2020-11-01',
+                                              '2020-12-01')
+        self.assertEqual(len(calls), 5)
+        self.assertTrue(all(end - start <= pd.Timedelta(days=7)
+                            for start, end in calls))
+        pd.testing.assert_frame_equal(df, bars)
+
+    def test_csv_provider(self):
+        """
+        Fn to test csv fixtures round trip through csv_provider
+        """
+        df = synthetic_provider().get_history('SYNAAA.L', '2020-01-01',
+                                              '2020-06-30')
+        with tempfile.TemporaryDirectory() as tmp:
+            provider = csv_provider(tmp)
+            provider.write('SYNAAA.L', df)
+            loaded = provider.get_history('SYNAAA.L', '2020-02-01',
+                                          '2020-03-31')
+        pd.testing.assert_frame_equal(loaded, df.loc['2020-02-01':'2020-03-31'],
+                                      check_freq=False)
+
+    def test_offline_pipeline(self):
+        """
+        Fn to test new_stock_df runs end to end with the synthetic provider
+        """
+        df = stock_dataframe('SYNAAA_L', '2020-01-01', pd.DataFrame(),
+                             provider=synthetic_provider()).new_stock_df()
+        self.assertEqual(len(df.columns), 19)
+        self.assertFalse(df['Close'].isna().any())
+
+
+if __name__ == '__main__':
+    unittest.main()
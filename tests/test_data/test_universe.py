@@ -0,0 +1,94 @@
+"""
+Unit testing for universe file, batch download and preprocessing
+"""
+
+
+import os
+import tempfile
+import unittest
+import pandas as pd
+
+
+from isiver_utils.data import stock_dataframe, synthetic_provider
+from isiver_utils.data.universe import load_universe, pre_process_universe
+from isiver_utils.analysis.metric_cache import metric_cache
+
+
+class failing_provider(synthetic_provider):
+    """
+    Synthetic provider which fails for tickers starting with 'BAD'
+    """
+    def get_history(self, ticker, start, end):
+        if ticker.startswith('BAD'):
+            raise ConnectionError(f'{ticker} not found')
+        return super().get_history(ticker, start, end)
+
+
+class test_universe(unittest.TestCase):
+
+    tickers = synthetic_provider.tickers(4) + ['BAD.L']
+
+    def test_load_universe(self):
+        """
+        Fn to test batch output matches new_stock_df per ticker and failures
+        are reported without aborting the batch
+        """
+        provider = failing_provider()
+        for processes in (0, 2):
+            stock_classes, failures = load_universe(
+                self.tickers, '2020-01-01', provider=provider,
+                max_workers=3, processes=processes)
+            self.assertEqual(list(failures), ['BAD.L'])
+            self.assertIsInstance(failures['BAD.L'], ConnectionError)
+            self.assertEqual(sorted(stock_classes), sorted(self.tickers[:4]))
+            expected = stock_dataframe(self.tickers[1], '2020-01-01',
+                                       pd.DataFrame(),
+                                       provider=provider).new_stock_df()
+            pd.testing.assert_frame_equal(stock_classes[self.tickers[1]].df,
+                                          expected)
+
+    def test_pre_process_options(self):
+        """
+        Fn to test worker processes use each stock class's gap_fill, frequency
+        and metric_cache like preprocessing in this process
+        """
+        def stock_classes(cache_dir):
+            provider = synthetic_provider()
+            daily = stock_dataframe('SYNAAA_L', '2020-01-01', pd.DataFrame(),
+                                    provider=provider,
+                                    gap_fill={'method': 'ffill',
+                                              'holidays': 'LSE'},
+                                    metric_cache=metric_cache(
+                                        cache_dir=cache_dir))
+            daily.download_data()
+            daily.df = daily.df.drop(daily.df.index[10:14])
+            bars = stock_dataframe('SYNAAB_L', '2020-12-01', pd.DataFrame(),
+                                   frequency='1h')
+            bars.df = provider.get_intraday('SYNAAB.L', '2020-12-01',
+                                            '2020-12-04')
+            return {'SYNAAA.L': daily, 'SYNAAB.L': bars}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            expected, _ = pre_process_universe(stock_classes(None), processes=0)
+            result, failures = pre_process_universe(stock_classes(tmp),
+                                                    processes=2)
+            self.assertEqual(failures, {})
+            for ticker in expected:
+                pd.testing.assert_frame_equal(result[ticker].df,
+                                              expected[ticker].df)
+            self.assertTrue(os.listdir(tmp))                                    # workers shared the disk cache
+
+    def test_panel(self):
+        """
+        Fn to test panel output has (ticker, column) MultiIndex columns
+        """
+        panel, failures = load_universe(self.tickers[:3], '2020-01-01',
+                                        provider=synthetic_provider(),
+                                        processes=0, panel=True)
+        self.assertEqual(failures, {})
+        self.assertEqual(list(panel.columns.levels[0]), self.tickers[:3])
+        self.assertEqual(panel[self.tickers[0]].shape[1], 19)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Unit testing for incremental stock_dataframe.update_stock_df
+"""
+
+
+import unittest
+import numpy as np
+import pandas as pd
+
+
+from isiver_utils.data import stock_dataframe, synthetic_provider
+
+
+class capped_provider(synthetic_provider):
+    """
+    Synthetic provider with no prices after end_date, to mimic time passing
+    between updates
+    """
+    end_date = pd.Timestamp('2021-06-30')
+
+    def get_history(self, ticker, start, end):
+        self.requests.append(pd.Timestamp(start))
+        return super().get_history(ticker, start, min(pd.Timestamp(end),
+                                                      self.end_date))
+
+
+class gapped_provider(capped_provider):
+    """
+    Capped provider with dates missing and prices blank either side of the
+    end date of the first download
+    """
+    missing = pd.to_datetime(['2021-06-29', '2021-07-01', '2021-07-02'])
+    blank = pd.to_datetime(['2021-06-30', '2021-07-05'])
+
+    def get_history(self, ticker, start, end):
+        df = super().get_history(ticker, start, end).drop(self.missing,
+                                                          errors='ignore')
+        df.loc[df.index.isin(self.blank), ['Open', 'Close']] = np.nan
+        return df
+
+
+class test_update(unittest.TestCase):
+
+    def setUp(self):
+        self.provider = capped_provider()
+        self.provider.requests = []
+
+    def full_df(self, **kwargs):
+        return stock_dataframe('SYNAAA_L', '2020-01-01', pd.DataFrame(),
+                               provider=self.provider, **kwargs).new_stock_df()
+
+    def test_incremental_update(self):
+        """
+        Fn to test an update only downloads new dates and matches a full
+        recalculation
+        """
+        stock_class = stock_dataframe('SYNAAA_L', '2020-01-01', pd.DataFrame(),
+                                      provider=self.provider)
+        stock_class.new_stock_df()
+        self.provider.end_date = pd.Timestamp('2021-09-30')
+        df = stock_class.update_stock_df()
+        self.assertEqual(self.provider.requests[-1], pd.Timestamp('2021-07-01'))
+        self.assertTrue(df.index.is_unique)
+        expected = self.full_df()
+        self.assertEqual(list(df.columns), list(expected.columns))
+        np.testing.assert_allclose(df.values, expected.values, rtol=1e-9)
+
+    def test_gapped_update(self):
+        """
+        Fn to test a gap straddling the end of the existing rows is filled as
+        a full recalculation fills it, for each gap fill method
+        """
+        for gap_fill in ({}, {'method': 'ffill'}, {'max_gap': 3},
+                         {'max_gap': 6}, {'method': 'spline'}):
+            self.provider = gapped_provider()
+            self.provider.requests = []
+            stock_class = stock_dataframe('SYNAAA_L', '2020-01-01',
+                                          pd.DataFrame(),
+                                          provider=self.provider,
+                                          gap_fill=gap_fill)
+            stock_class.new_stock_df()
+            self.provider.end_date = pd.Timestamp('2021-09-30')
+            df = stock_class.update_stock_df()
+            expected = self.full_df(gap_fill=gap_fill)
+            self.assertEqual(list(df.index), list(expected.index))
+            np.testing.assert_allclose(df.values, expected.values, rtol=1e-9,
+                                       err_msg=str(gap_fill))
+        self.assertTrue(np.isnan(self.full_df(gap_fill={'max_gap': 3}).loc[
+            '2021-06-29':'2021-07-05', 'Close']).all())                         # gap of 5 rows
+
+    def test_no_new_rows(self):
+        """
+        Fn to test repeated updates don't add duplicate rows
+        """
+        stock_class = stock_dataframe('SYNAAA_L', '2020-01-01', pd.DataFrame(),
+                                      provider=self.provider)
+        df = stock_class.new_stock_df().copy()
+        stock_class.update_stock_df()
+        pd.testing.assert_frame_equal(stock_class.update_stock_df(), df)
+
+    def test_unit_change_falls_back(self):
+        """
+        Fn to test a unit change reaching back into history recleans all rows
+        """
+        stock_class = stock_dataframe('SYNAAA_L', '2020-01-01', pd.DataFrame(),
+                                      provider=self.provider)
+        stock_class.new_stock_df()
+        stock_class.df[['Open', 'High', 'Low', 'Close', 'AdjClose']] /= 100
+        self.provider.end_date = pd.Timestamp('2021-07-30')
+        df = stock_class.update_stock_df()
+        expected = self.full_df()
+        np.testing.assert_allclose(df['Close'], expected['Close'], rtol=1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main()
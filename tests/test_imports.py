@@ -0,0 +1,41 @@
+"""
+Unit testing that importing isiver_utils doesn't load plotting or download
+libraries
+"""
+
+
+import os
+import unittest
+
+
+from isiver_utils.data.instrumentation import import_profile
+
+
+class test_imports(unittest.TestCase):
+
+    def test_lazy_dependencies(self):
+        """
+        Fn to test data and analysis modules don't import yfinance,
+        pandas_datareader or matplotlib, and plotting doesn't load pyplot
+        """
+        for module in ('isiver_utils', 'isiver_utils.analysis.metrics',
+                       'isiver_utils.data', 'isiver_utils.data.universe'):
+            _, loaded = import_profile(module)
+            self.assertEqual(loaded, [], module)
+        _, loaded = import_profile('isiver_utils.plotting.batch_render')
+        self.assertNotIn('matplotlib.pyplot', loaded)
+        self.assertNotIn('yfinance', loaded)
+
+    def test_default_plot_dir(self):
+        """
+        Fn to test default_plot_dir follows the working directory when used
+        """
+        import isiver_utils
+        self.assertEqual(isiver_utils.default_plot_dir,
+                         os.getcwd() + '/plots/')
+        with self.assertRaises(AttributeError):
+            isiver_utils.not_an_attribute
+
+
+if __name__ == '__main__':
+    unittest.main()
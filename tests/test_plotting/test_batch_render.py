@@ -0,0 +1,92 @@
+"""
+Unit testing for headless batch_render file
+"""
+
+
+import os
+import tempfile
+import unittest
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+
+from isiver_utils.data import stock_dataframe, synthetic_provider
+from isiver_utils.plotting import batch_render, visualisation
+
+
+class test_batch_render(unittest.TestCase):
+
+    provider = synthetic_provider()
+    stock_classes = {}
+    for ticker in synthetic_provider.tickers(3):
+        stock_classes[ticker] = stock_dataframe(ticker, '2020-01-01',
+                                                pd.DataFrame(),
+                                                provider=provider)
+        stock_classes[ticker].new_stock_df()
+
+    def test_render_charts(self):
+        """
+        Fn to test charts are saved for every ticker without pyplot figures,
+        in process and in a process pool
+        """
+        for processes, fmt in ((0, 'svg'), (2, 'png')):
+            with tempfile.TemporaryDirectory() as tmp:
+                paths, failures = batch_render.render_charts(
+                    self.stock_classes, tmp, fmt=fmt, processes=processes,
+                    volume_plot='fill')
+                self.assertEqual(failures, {})
+                self.assertEqual(sorted(paths), sorted(self.stock_classes))
+                for path in paths.values():
+                    self.assertTrue(path.endswith(f'.{fmt}'))
+                    self.assertGreater(os.path.getsize(path), 0)
+            self.assertEqual(plt.get_fignums(), [])
+
+    def test_render_failure(self):
+        """
+        Fn to test a failing ticker is reported without stopping the batch
+        """
+        bad = stock_dataframe('BAD', None, pd.DataFrame({'Close': [1.0]}))
+        with tempfile.TemporaryDirectory() as tmp:
+            paths, failures = batch_render.render_charts(
+                [bad, self.stock_classes['SYNAAA.L']], tmp, processes=0)
+        self.assertEqual(list(paths), ['SYNAAA.L'])
+        self.assertIsInstance(failures['BAD'], KeyError)
+
+    def test_render_dpi(self):
+        """
+        Fn to test charts are decimated to the pixel width at the dpi they are
+        saved at
+        """
+        stock_df = self.stock_classes['SYNAAA.L'].df
+        widths = []
+        decimate_ohlcv = visualisation.decimate_ohlcv
+
+        def recorded(df, max_bars):
+            widths.append(max_bars)
+            return decimate_ohlcv(df, max_bars)
+        visualisation.decimate_ohlcv = recorded
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                for dpi in (100, 200):
+                    batch_render.render_chart(stock_df, 'SYNAAA.L', tmp,
+                                              dpi=dpi)
+        finally:
+            visualisation.decimate_ohlcv = decimate_ohlcv
+        self.assertAlmostEqual(widths[1] / widths[0], 2, delta=0.01)
+
+    def test_daily_ohlcv_save_fig(self):
+        """
+        Fn to test daily_ohlcv saves charts with save_fig
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            visualisation.daily_ohlcv(self.stock_classes['SYNAAA.L'],
+                                      output_window=False, save_fig=True,
+                                      save_dir=tmp)
+            self.assertEqual(len(os.listdir(tmp)), 1)
+        plt.close('all')
+
+
+if __name__ == '__main__':
+    unittest.main()
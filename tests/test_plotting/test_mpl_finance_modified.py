@@ -0,0 +1,61 @@
+"""
+Unit testing for collection based OHLC rendering in mpl_finance_modified
+"""
+
+
+import unittest
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.colors import to_rgba
+
+
+from isiver_utils.data import synthetic_provider
+from isiver_utils.plotting import mpl_finance_modified as mpf
+from isiver_utils.plotting import visualisation
+
+
+class test_mpl_finance_modified(unittest.TestCase):
+
+    df = synthetic_provider().get_history('SYNAAA.L', '2019-01-01',
+                                          '2019-12-31')
+
+    def test_collection_matches_lines(self):
+        """
+        Fn to test the collection renderer draws the same bars and ticks as the
+        per bar Line2D renderer with a handful of artists
+        """
+        quotes = visualisation.prepare_ohlcv_list(self.df)
+        line_ax = Figure().add_subplot()
+        lines = mpf.plot_day_summary_ohlc(line_ax, quotes, colorup='g',
+                                          colordown='r')
+        ax = Figure().add_subplot()
+        vlines, ticks = mpf.plot_day_summary_ohlc_collection(ax, quotes,
+                                                             colorup='g',
+                                                             colordown='r')
+        self.assertEqual(len(ax.lines) + len(ax.collections), 5)
+        self.assertEqual(len(line_ax.lines), 3 * len(quotes))
+
+        segments = vlines.get_segments()
+        for i in (0, 100, len(quotes) - 1):
+            np.testing.assert_allclose(segments[i],
+                                       lines[3 * i].get_xydata())
+            np.testing.assert_allclose(vlines.get_colors()[i],
+                                       to_rgba(lines[3 * i].get_color()))
+        self.assertEqual(sum(len(t.get_xdata()) for t in ticks), 2 * len(quotes))
+        np.testing.assert_allclose(ax.dataLim.bounds, line_ax.dataLim.bounds)
+
+    def test_arrays_check_input(self):
+        """
+        Fn to test mismatched array lengths are rejected
+        """
+        ax = Figure().add_subplot()
+        with self.assertRaises(ValueError):
+            mpf.plot_day_summary_arrays(ax, np.arange(3), np.ones(3),
+                                        np.ones(3), np.ones(2), np.ones(3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Unit testing for visualisation file with offline synthetic data
+"""
+
+
+import unittest
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+
+
+from isiver_utils.data import stock_dataframe, synthetic_provider
+from isiver_utils.plotting import visualisation
+
+
+class test_visualisation(unittest.TestCase):
+
+    stock_class = stock_dataframe('SYNAAA_L', '2019-01-01', pd.DataFrame(),
+                                  provider=synthetic_provider())
+    stock_class.new_stock_df()
+
+    def tearDown(self):
+        plt.close('all')
+
+    def test_prepare_ohlcv_arrays(self):
+        """
+        Fn to test array data path matches the list data path
+        """
+        ohlcv = visualisation.prepare_ohlcv_arrays(self.stock_class.df)
+        quotes = visualisation.prepare_ohlcv_list(self.stock_class.df)
+        np.testing.assert_allclose(ohlcv['Date'],
+                                   mdates.date2num([q[0] for q in quotes]))
+        for i, column in enumerate(['Open', 'High', 'Low', 'Close', 'Volume']):
+            self.assertEqual(ohlcv[column].dtype, np.float64)
+            self.assertTrue(ohlcv[column].flags['C_CONTIGUOUS'])
+            np.testing.assert_array_equal(ohlcv[column],
+                                          [q[i + 1] for q in quotes])
+
+    def test_daily_ohlcv(self):
+        """
+        Fn to test daily_ohlcv draws price and volume with a few artists
+        """
+        fig = visualisation.daily_ohlcv(self.stock_class, output_window=False,
+                                        decimate=False)[0][0]
+        ohlcv_ax, volume_ax = fig.axes
+        self.assertEqual(len(ohlcv_ax.lines) + len(ohlcv_ax.collections), 5)
+        self.assertEqual(len(volume_ax.collections), 1)
+        self.assertEqual(len(volume_ax.patches), 0)
+        self.assertEqual(volume_ax.get_ylim()[1],
+                         4 * self.stock_class.df['Volume'].max())
+
+    def test_decimate_ohlcv(self):
+        """
+        Fn to test decimated bars keep OHLCV semantics
+        """
+        df = self.stock_class.df
+        decimated = visualisation.decimate_ohlcv(df, 100)
+        self.assertLessEqual(len(decimated), 100)
+        k = -(-len(df) // 100)
+        groups = df.groupby(np.arange(len(df)) // k)
+        expected = groups.agg({'Open': 'first', 'High': 'max', 'Low': 'min',
+                               'Close': 'last', 'Volume': 'sum'})
+        np.testing.assert_allclose(decimated.values, expected.values)
+        self.assertTrue((decimated.index == df.index[::k]).all())
+        self.assertIs(visualisation.decimate_ohlcv(df, len(df)), df)
+
+    def test_daily_ohlcv_decimated(self):
+        """
+        Fn to test long histories are drawn with at most one bar per pixel
+        """
+        stock_class = stock_dataframe('SYNAAA_L', None, synthetic_provider().
+                                      get_history('SYNAAA.L', '2000-01-01',
+                                                  '2020-12-31'))
+        fig = visualisation.daily_ohlcv(stock_class, output_window=False,
+                                        plot_size=(8, 5))[0][0]
+        vlines = fig.axes[0].collections[0]
+        width = fig.axes[0].get_window_extent().width
+        self.assertLessEqual(len(vlines.get_segments()), width)
+        self.assertGreater(len(vlines.get_segments()), width / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()